@@ -0,0 +1,674 @@
+#!/usr/bin/env python3
+"""
+aig.py
+
+Array-backed AIG core shared by the reorder_aag_* scripts.
+
+The AIGER file (ASCII "aag" or binary "aig", detected from the header) is
+parsed once into compact int32 NumPy arrays, so the analysis passes never have
+to split and re-parse the text lines again:
+    inputs       - input literals (file order)
+    outputs      - output literals
+    lhs          - AND gate output literals
+    rhs0, rhs1   - AND gate fan-in literals
+    input_names  - symbol table entry of every input (None if missing)
+
+Derived per-variable data (gate levels, ...) is computed lazily on top of
+these arrays and cached on the AIG object.
+
+Usage:
+    from aig import parse_aiger
+    aig = parse_aiger("split_0.aag")          # or split_0.aig
+    aig.write_aiger("reordered_0.aig", order)  # format chosen by extension
+    write_order_file("reordered_0.order", [("std:mincut", order)])
+"""
+
+import hashlib
+
+import numpy as np
+
+# 小于该门数时逐门计算层级，否则按层整体用NumPy处理
+VECTORIZE_MIN_GATES = 4096
+# 平均每层门数低于该值时 (如长链电路) 按层处理的开销反而更大，退回逐门计算
+VECTORIZE_MIN_LEVEL_WIDTH = 64
+# 构建交互矩阵时每个稠密分块的最大元素数
+INTERACTION_BLOCK_ENTRIES = 1 << 22
+# 排列文件 (只记录输入顺序，不重写AIG) 的扩展名
+ORDER_SUFFIX = '.order'
+
+
+def _parse_int_lines(lines, width, what):
+    """把若干行整数解析为 (len(lines), width) 的int32数组"""
+    if not lines:
+        return np.zeros((0, width), dtype=np.int32)
+    try:
+        values = np.array(' '.join(lines).split(), dtype=np.int64)
+    except ValueError:
+        raise ValueError(f"Invalid {what} line in AAG file.")
+    if values.size != len(lines) * width:
+        raise ValueError(f"Invalid {what} line in AAG file.")
+    return values.astype(np.int32).reshape(len(lines), width)
+
+
+def _encode_varints(values):
+    """把非负整数数组编码为AIGER的7位变长字节串 (低位在前，最高位为续位)"""
+    values = np.asarray(values, dtype=np.int64)
+    if values.size == 0:
+        return b''
+    lengths = np.ones(values.size, dtype=np.int64)
+    rest = values >> 7
+    while rest.any():
+        lengths += rest > 0
+        rest >>= 7
+    offsets = np.cumsum(lengths) - lengths
+    out = np.empty(int(lengths.sum()), dtype=np.uint8)
+    for k in range(int(lengths.max())):
+        mask = lengths > k
+        byte = (values[mask] >> (7 * k)) & 0x7f
+        byte |= np.where(lengths[mask] > k + 1, 0x80, 0)
+        out[offsets[mask] + k] = byte
+    return out.tobytes()
+
+
+def _decode_varints(data, offset, count):
+    """从 data[offset:] 解码 count 个变长整数，返回 (int64数组, 结束位置)"""
+    if count == 0:
+        return np.zeros(0, dtype=np.int64), offset
+    buf = np.frombuffer(data, dtype=np.uint8, offset=offset)
+    ends = np.flatnonzero(buf < 0x80)[:count]
+    if len(ends) < count:
+        raise ValueError("Unexpected end of file in binary AND gate section.")
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts + 1
+    if int(lengths.max()) > 5:
+        raise ValueError("Invalid delta encoding in binary AND gate section.")
+    shift = 7 * (np.arange(int(ends[-1]) + 1) - np.repeat(starts, lengths))
+    payload = (buf[:int(ends[-1]) + 1] & 0x7f).astype(np.int64) << shift
+    return np.add.reduceat(payload, starts), offset + int(ends[-1]) + 1
+
+
+def split_symbol(name):
+    """将 var_x[y] 形式的符号拆分为 (变量名, 位位置)"""
+    if name is None:
+        return None, 0
+    if '[' in name and ']' in name:
+        var_name = name[:name.find('[')]
+        bit_str = name[name.find('[') + 1:name.find(']')]
+        try:
+            bit_pos = int(bit_str)
+        except ValueError:
+            bit_pos = 0
+        return var_name, bit_pos
+    return name, 0
+
+
+class AIG:
+    """紧凑的数组化AIG表示"""
+
+    def __init__(self, M, inputs, latch_lines, outputs, lhs, rhs0, rhs1,
+                 input_names=None, symbol_lines=None, comment_lines=None):
+        self.M = M
+        self.inputs = np.asarray(inputs, dtype=np.int32)
+        self.latch_lines = list(latch_lines)
+        self.outputs = np.asarray(outputs, dtype=np.int32)
+        self.lhs = np.asarray(lhs, dtype=np.int32)
+        self.rhs0 = np.asarray(rhs0, dtype=np.int32)
+        self.rhs1 = np.asarray(rhs1, dtype=np.int32)
+        if input_names is None:
+            input_names = [None] * len(self.inputs)
+        self.input_names = list(input_names)
+        self.symbol_lines = list(symbol_lines or [])    # 非输入符号行 (o0 x 等)
+        self.comment_lines = list(comment_lines or [])
+
+        # 变量号 -> 输入序号，非输入为 -1
+        self.input_index = np.full(M + 1, -1, dtype=np.int32)
+        self.input_index[self.inputs >> 1] = np.arange(len(self.inputs), dtype=np.int32)
+
+        self._levels = None
+        self._support_index = None
+        self._interaction_matrix = None
+        self._structural_hash = None
+
+    @property
+    def I(self):
+        return len(self.inputs)
+
+    @property
+    def L(self):
+        return len(self.latch_lines)
+
+    @property
+    def O(self):
+        return len(self.outputs)
+
+    @property
+    def A(self):
+        return len(self.lhs)
+
+    def input_of_literal(self, lits):
+        """literal(数组) -> 输入序号，非输入为 -1"""
+        return self.input_index[np.asarray(lits) >> 1]
+
+    def literal_use_counts(self):
+        """单遍统计每个输入作为AND门扇入的 (正literal, 负literal) 使用次数"""
+        counts = np.bincount(np.concatenate([self.rhs0, self.rhs1]), minlength=2 * self.M + 2)
+        positive = counts[self.inputs & ~1]
+        negative = counts[self.inputs | 1]
+        return positive, negative
+
+    def levels(self):
+        """计算门层级，返回 (level, depth_to_output)，均按变量号索引
+
+        level[v]           - 从输入到节点v的最长路径 (输入/常量为0)
+        depth_to_output[v] - 从节点v到任一输出的最长路径 (不在输出锥内为-1)
+        """
+        if self._levels is None:
+            ordered = self._is_topologically_ordered()
+            vectorize = self.A >= VECTORIZE_MIN_GATES or not ordered
+
+            level = None
+            if vectorize:
+                max_rounds = max(1, self.A // VECTORIZE_MIN_LEVEL_WIDTH) if ordered else None
+                level = self._forward_levels_vectorized(max_rounds)
+            if level is None:
+                level = self._forward_levels_sequential()
+
+            if ordered and (not vectorize or int(level.max()) * VECTORIZE_MIN_LEVEL_WIDTH > self.A):
+                depth_to_output = self._backward_depths_sequential()
+            else:
+                depth_to_output = self._backward_depths_vectorized(level)
+            self._levels = (level, depth_to_output)
+        return self._levels
+
+    def _is_topologically_ordered(self):
+        """AIGER要求 lhs > rhs0 >= rhs1，即门已按拓扑序排列"""
+        if self.A == 0:
+            return True
+        fanin = np.maximum(self.rhs0, self.rhs1) >> 1
+        return bool(np.all(fanin < (self.lhs >> 1))) and bool(np.all(np.diff(self.lhs) > 0))
+
+    def _forward_levels_sequential(self):
+        """按文件中的拓扑序逐门计算层级"""
+        level = [0] * (self.M + 1)
+        for out_lit, in1, in2 in zip(self.lhs.tolist(), self.rhs0.tolist(), self.rhs1.tolist()):
+            level[out_lit >> 1] = max(level[in1 >> 1], level[in2 >> 1]) + 1
+        return np.array(level, dtype=np.int32)
+
+    def _forward_levels_vectorized(self, max_rounds=None):
+        """Kahn算法按层推进：每一轮整体处理所有扇入已就绪的门
+
+        超过 max_rounds 轮 (电路太深) 时放弃并返回 None
+        """
+        A = self.A
+        level = np.zeros(self.M + 1, dtype=np.int32)
+        if A == 0:
+            return level
+
+        gate_var = self.lhs >> 1
+        fanin_var = np.concatenate([self.rhs0 >> 1, self.rhs1 >> 1])
+        fanin_gate = np.concatenate([np.arange(A), np.arange(A)])
+
+        # 扇出CSR: 节点 -> 读取它的门
+        order = np.argsort(fanin_var, kind='stable')
+        fanout_gate = fanin_gate[order]
+        indptr = np.zeros(self.M + 2, dtype=np.int64)
+        np.cumsum(np.bincount(fanin_var, minlength=self.M + 1), out=indptr[1:])
+
+        pending = np.full(A, 2, dtype=np.int32)
+        is_gate = np.zeros(self.M + 1, dtype=bool)
+        is_gate[gate_var] = True
+        frontier = np.flatnonzero(~is_gate)
+
+        current = 0
+        while frontier.size:
+            current += 1
+            if max_rounds is not None and current > max_rounds:
+                return None
+            touched = fanout_gate[csr_gather(indptr, frontier)]
+            if touched.size == 0:
+                break
+            pending -= np.bincount(touched, minlength=A).astype(np.int32)
+            ready = np.unique(touched[pending[touched] == 0])
+            frontier = gate_var[ready]
+            level[frontier] = current
+
+        return level
+
+    def _backward_depths_sequential(self):
+        """按拓扑逆序逐门回推到输出的最长路径"""
+        depth = [-1] * (self.M + 1)
+        for out_lit in self.outputs.tolist():
+            depth[out_lit >> 1] = 0
+        for out_lit, in1, in2 in zip(reversed(self.lhs.tolist()), reversed(self.rhs0.tolist()),
+                                     reversed(self.rhs1.tolist())):
+            d = depth[out_lit >> 1]
+            if d >= 0:
+                d += 1
+                if depth[in1 >> 1] < d:
+                    depth[in1 >> 1] = d
+                if depth[in2 >> 1] < d:
+                    depth[in2 >> 1] = d
+        return np.array(depth, dtype=np.int32)
+
+    def _backward_depths_vectorized(self, level):
+        """从输出出发按层级从高到低整体回推到输出的最长路径"""
+        depth = np.full(self.M + 1, -1, dtype=np.int32)
+        depth[self.outputs >> 1] = 0
+        if self.A == 0:
+            return depth
+
+        gate_var = self.lhs >> 1
+        for group in reversed(self._group_gates_by_level(level)):
+            group_depth = depth[gate_var[group]]
+            live = group_depth >= 0
+            if not live.any():
+                continue
+            group, group_depth = group[live], group_depth[live] + 1
+            np.maximum.at(depth, self.rhs0[group] >> 1, group_depth)
+            np.maximum.at(depth, self.rhs1[group] >> 1, group_depth)
+
+        return depth
+
+    def _group_gates_by_level(self, level):
+        gate_level = level[self.lhs >> 1]
+        order = np.argsort(gate_level, kind='stable')
+        bounds = np.flatnonzero(np.diff(gate_level[order])) + 1
+        return np.split(order, bounds) if self.A else []
+
+    def level_groups(self):
+        """按门层级从低到高分组的门下标列表"""
+        level, _ = self.levels()
+        return self._group_gates_by_level(level)
+
+    def support_index(self):
+        """每个节点的输入支撑集位图 (缓存)"""
+        if self._support_index is None:
+            self._support_index = SupportIndex(self)
+        return self._support_index
+
+    def structural_hash(self):
+        """结构哈希: 输入/输出/AND门数组及输入符号相同的AIG哈希相同 (缓存)"""
+        if self._structural_hash is None:
+            h = hashlib.sha256()
+            h.update(np.array([self.M, self.I, self.L, self.O, self.A], dtype=np.int64).tobytes())
+            for array in (self.inputs, self.outputs, self.lhs, self.rhs0, self.rhs1):
+                h.update(np.ascontiguousarray(array, dtype=np.int32).tobytes())
+            h.update('\n'.join(self.latch_lines).encode())
+            h.update(b'\0')
+            h.update('\n'.join('' if name is None else name for name in self.input_names).encode())
+            self._structural_hash = h.hexdigest()
+        return self._structural_hash
+
+    def interaction_matrix(self):
+        """输入变量间的稀疏交互矩阵 (缓存)"""
+        if self._interaction_matrix is None:
+            self._interaction_matrix = InteractionMatrix(self)
+        return self._interaction_matrix
+
+    def datapath_symbols(self):
+        """返回每个输入的 (变量名, 位位置)"""
+        return [split_symbol(name) for name in self.input_names]
+
+    def write_aag(self, output_path, order=None):
+        """按给定输入顺序写出AAG文件，order[new] = old"""
+        if order is None:
+            order = range(self.I)
+        order = list(order)
+
+        header = f"aag {self.M} {self.I} {self.L} {self.O} {self.A}\n"
+        and_rows = np.stack([self.lhs, self.rhs0, self.rhs1], axis=1).tolist()
+
+        with open(output_path, 'w') as f:
+            f.write(header)
+            f.write(''.join(f"{lit}\n" for lit in self.inputs[order].tolist()))
+            for line in self.latch_lines:
+                f.write(line + "\n")
+            f.write(''.join(f"{lit}\n" for lit in self.outputs.tolist()))
+            f.write(''.join(f"{a} {b} {c}\n" for a, b, c in and_rows))
+            old2new = {old: new for new, old in enumerate(order)}
+            for old_i, name in enumerate(self.input_names):
+                if name is not None:
+                    f.write(f"i{old2new[old_i]} {name}\n")
+            for sym in self.symbol_lines:
+                f.write(sym + "\n")
+            for line in self.comment_lines:
+                f.write(line + "\n")
+
+    def write_aig(self, output_path, order=None):
+        """按给定输入顺序写出二进制AIGER文件，order[new] = old
+
+        二进制格式要求输入依次为 2..2I、锁存器紧随其后、AND门按拓扑序编号，
+        因此所有变量按新顺序重新编号 (各扇入对调为 rhs0 >= rhs1)。
+        """
+        if order is None:
+            order = range(self.I)
+        order = np.asarray(list(order), dtype=np.int64)
+        I, L, A = self.I, self.L, self.A
+
+        latches = [line.split() for line in self.latch_lines]
+        if any(len(parts) < 2 for parts in latches):
+            raise ValueError("Invalid latch line in AAG file.")
+        latch_lits = np.array([int(parts[0]) for parts in latches], dtype=np.int64)
+
+        if self._is_topologically_ordered():
+            gate_order = np.arange(A)
+        else:
+            level, _ = self.levels()
+            gate_order = np.argsort(level[self.lhs >> 1], kind='stable')
+
+        new_var = np.zeros(self.M + 1, dtype=np.int64)
+        new_var[self.inputs[order] >> 1] = np.arange(1, I + 1)
+        new_var[latch_lits >> 1] = np.arange(I + 1, I + L + 1)
+        new_var[self.lhs[gate_order] >> 1] = np.arange(I + L + 1, I + L + A + 1)
+
+        def remap(lits):
+            lits = np.asarray(lits, dtype=np.int64)
+            return (new_var[lits >> 1] << 1) | (lits & 1)
+
+        fanin0 = remap(self.rhs0[gate_order])
+        fanin1 = remap(self.rhs1[gate_order])
+        rhs0 = np.maximum(fanin0, fanin1)
+        rhs1 = np.minimum(fanin0, fanin1)
+        lhs = np.arange(I + L + 1, I + L + A + 1, dtype=np.int64) << 1
+        if A and not np.all(lhs > rhs0):
+            raise ValueError("AIG has a combinational cycle, cannot write binary AIGER.")
+        deltas = np.empty(2 * A, dtype=np.int64)
+        deltas[0::2] = lhs - rhs0
+        deltas[1::2] = rhs0 - rhs1
+
+        latch_next = remap([int(parts[1]) for parts in latches]).tolist()
+        text = [f"aig {I + L + A} {I} {L} {self.O} {A}\n"]
+        for parts, next_lit in zip(latches, latch_next):
+            text.append(' '.join([str(next_lit)] + parts[2:]) + "\n")
+        text.extend(f"{lit}\n" for lit in remap(self.outputs).tolist())
+
+        symbols = []
+        for new_i, old_i in enumerate(order.tolist()):
+            name = self.input_names[old_i]
+            if name is not None:
+                symbols.append(f"i{new_i} {name}\n")
+        symbols.extend(sym + "\n" for sym in self.symbol_lines)
+        symbols.extend(line + "\n" for line in self.comment_lines)
+
+        with open(output_path, 'wb') as f:
+            f.write(''.join(text).encode())
+            f.write(_encode_varints(deltas))
+            f.write(''.join(symbols).encode())
+
+    def write_aiger(self, output_path, order=None):
+        """按扩展名选择格式: .aig 写二进制，其余写ASCII"""
+        if output_path.endswith('.aig'):
+            self.write_aig(output_path, order)
+        else:
+            self.write_aag(output_path, order)
+
+
+class SupportIndex:
+    """节点传递支撑集索引
+
+    bits[v] 为变量v依赖的输入集合，按输入序号打包为uint64字 (小端位序)。
+    一次拓扑扫描得到: 同一层级的门互不依赖，整层用NumPy按位或计算。
+    """
+
+    def __init__(self, aig):
+        self.aig = aig
+        self.n_inputs = aig.I
+        self.words = max(1, (aig.I + 63) // 64)
+        self.bits = np.zeros((aig.M + 1, self.words), dtype=np.uint64)
+
+        input_idx = np.arange(aig.I)
+        self.bits[aig.inputs >> 1, input_idx >> 6] = np.left_shift(
+            np.uint64(1), (input_idx & 63).astype(np.uint64))
+
+        gate_var = aig.lhs >> 1
+        fanin0 = aig.rhs0 >> 1
+        fanin1 = aig.rhs1 >> 1
+        for group in aig.level_groups():
+            self.bits[gate_var[group]] = self.bits[fanin0[group]] | self.bits[fanin1[group]]
+
+    def of_literals(self, lits):
+        """literal(数组) 的支撑集位图"""
+        return self.bits[np.asarray(lits) >> 1]
+
+    def to_bool(self, rows):
+        """位图 -> (k, I) 布尔矩阵"""
+        rows = np.ascontiguousarray(rows, dtype=np.uint64)
+        unpacked = np.unpackbits(rows.view(np.uint8), axis=1, bitorder='little')
+        return unpacked[:, :self.n_inputs].astype(bool)
+
+    def support_sizes(self, rows):
+        """每行位图中置位的输入数"""
+        rows = np.ascontiguousarray(rows, dtype=np.uint64)
+        return np.unpackbits(rows.view(np.uint8), axis=1).sum(axis=1, dtype=np.int64)
+
+
+class InteractionMatrix:
+    """输入变量间的加权交互矩阵 (对称CSR，仅存有交互的变量对)
+
+    direct[k]      两个输入同时作为某个AND门扇入的次数 (对角线为两个扇入
+                   是同一输入的门数的2倍，行和即变量的直接交互次数)
+    transitive[k]  两个输入同时出现在传递扇入中的门数
+
+    传递交互的非零模式包含直接交互，因此两者共用 indptr/indices。
+    """
+
+    def __init__(self, aig):
+        self.n_vars = n = aig.I
+        keys, self.transitive = self._transitive_pairs(aig)
+        self._keys = keys
+        self.indices = (keys % max(n, 1)).astype(np.int32)
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // max(n, 1), minlength=n), out=self.indptr[1:])
+
+        # 直接交互: 两个扇入都是输入的门，(i, j) 和 (j, i) 各计一次
+        in0 = aig.input_of_literal(aig.rhs0)
+        in1 = aig.input_of_literal(aig.rhs1)
+        both = (in0 >= 0) & (in1 >= 0)
+        in0, in1 = in0[both].astype(np.int64), in1[both].astype(np.int64)
+        direct_keys = np.concatenate([in0 * n + in1, in1 * n + in0])
+        self.direct = np.zeros(len(keys), dtype=np.int64)
+        np.add.at(self.direct, np.searchsorted(keys, direct_keys), 1)
+
+    @staticmethod
+    def _transitive_pairs(aig):
+        """按列分块计算 B^T W B，B为去重后的门支撑矩阵，W为重复次数"""
+        n = aig.I
+        if n == 0 or aig.A == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        support_index = aig.support_index()
+        rows, counts = np.unique(support_index.bits[aig.lhs >> 1], axis=0, return_counts=True)
+        weight = counts.astype(np.float64)
+
+        block = max(1, INTERACTION_BLOCK_ENTRIES // n)
+        chunk = max(1, INTERACTION_BLOCK_ENTRIES // n)
+        key_parts, value_parts = [], []
+        for col_start in range(0, n, block):
+            col_end = min(col_start + block, n)
+            acc = np.zeros((n, col_end - col_start))
+            for row_start in range(0, len(rows), chunk):
+                dense = support_index.to_bool(rows[row_start:row_start + chunk]).astype(np.float64)
+                acc += dense.T @ (dense[:, col_start:col_end] * weight[row_start:row_start + chunk, None])
+            var, col = np.nonzero(acc)
+            key_parts.append(var.astype(np.int64) * n + col + col_start)
+            value_parts.append(np.rint(acc[var, col]).astype(np.int64))
+
+        keys = np.concatenate(key_parts)
+        order = np.argsort(keys, kind='stable')
+        return keys[order], np.concatenate(value_parts)[order]
+
+    @property
+    def nnz(self):
+        return len(self.indices)
+
+    def neighbors(self, var):
+        """变量var的 (交互变量, 直接权重, 传递权重)"""
+        start, end = self.indptr[var], self.indptr[var + 1]
+        return self.indices[start:end], self.direct[start:end], self.transitive[start:end]
+
+    def lookup(self, rows, cols, weights=None):
+        """批量查询 (rows[k], cols[k]) 的权重 (默认直接交互)，无交互时为0"""
+        if weights is None:
+            weights = self.direct
+        query = np.asarray(rows, dtype=np.int64) * self.n_vars + np.asarray(cols, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self._keys, query), max(self.nnz - 1, 0))
+        if self.nnz == 0:
+            return np.zeros(query.shape, dtype=np.int64)
+        return np.where(self._keys[pos] == query, weights[pos], 0)
+
+    def submatrix(self, variables, weights=None):
+        """若干变量之间的稠密权重表 (len × len)"""
+        variables = np.asarray(variables, dtype=np.int64)
+        return self.lookup(variables[:, None], variables[None, :], weights)
+
+    def row_sums(self, weights=None):
+        """每个变量的交互权重和"""
+        if weights is None:
+            weights = self.direct
+        row_of_entry = np.repeat(np.arange(self.n_vars), np.diff(self.indptr))
+        return np.bincount(row_of_entry, weights=weights, minlength=self.n_vars).astype(np.int64)
+
+
+def csr_gather(indptr, rows):
+    """返回CSR结构中若干行的全部元素位置 (拼接后的下标数组)"""
+    starts = indptr[rows]
+    counts = indptr[np.asarray(rows) + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return offsets + np.arange(total)
+
+
+def parse_aag(path):
+    """解析ASCII AIGER文件为 AIG 对象"""
+    with open(path, 'r') as f:
+        lines = f.read().split('\n')
+    if lines and lines[-1] == '':
+        lines.pop()
+
+    if not lines or not lines[0].startswith('aag '):
+        raise ValueError("Not a valid AAG file (missing 'aag ' header).")
+
+    parts = lines[0].split()
+    if len(parts) < 6:
+        raise ValueError("Invalid AAG header.")
+    _, M, I, L, O, A = parts[:6]
+    M, I, L, O, A = map(int, (M, I, L, O, A))
+
+    idx = 1
+    inputs = _parse_int_lines(lines[idx: idx + I], 1, 'input')[:, 0]
+    idx += I
+
+    latch_lines = lines[idx: idx + L]
+    idx += L
+
+    outputs = _parse_int_lines(lines[idx: idx + O], 1, 'output')[:, 0]
+    idx += O
+
+    ands = _parse_int_lines(lines[idx: idx + A], 3, 'AND gate')
+    idx += A
+
+    input_names, symbol_lines, comment_lines = _parse_symbol_table(lines[idx:], I)
+
+    return AIG(M, inputs, latch_lines, outputs,
+               ands[:, 0], ands[:, 1], ands[:, 2],
+               input_names, symbol_lines, comment_lines)
+
+
+def _parse_symbol_table(lines, I):
+    """解析符号表与注释段，返回 (输入名列表, 其余符号行, 注释行)"""
+    input_names = [None] * I
+    symbol_lines = []
+    idx = 0
+    while idx < len(lines) and not lines[idx].startswith('c'):
+        sym = lines[idx]
+        idx += 1
+        if sym.startswith('i'):
+            parts = sym.split(None, 1)
+            if len(parts) == 2:
+                try:
+                    input_idx = int(parts[0][1:])
+                except ValueError:
+                    input_idx = -1
+                if 0 <= input_idx < I:
+                    input_names[input_idx] = parts[1]
+                    continue
+        symbol_lines.append(sym)
+
+    comment_lines = lines[idx:] if idx < len(lines) else []
+    return input_names, symbol_lines, comment_lines
+
+
+def parse_aig(path):
+    """解析二进制AIGER文件为 AIG 对象 (ASCII形式的锁存器行)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if not data.startswith(b'aig '):
+        raise ValueError("Not a valid AIG file (missing 'aig ' header).")
+
+    def read_line(pos):
+        end = data.find(b'\n', pos)
+        if end < 0:
+            raise ValueError("Unexpected end of file in binary AIG header section.")
+        return data[pos:end].decode(), end + 1
+
+    header, pos = read_line(0)
+    parts = header.split()
+    if len(parts) < 6:
+        raise ValueError("Invalid AIG header.")
+    try:
+        M, I, L, O, A = map(int, parts[1:6])
+    except ValueError:
+        raise ValueError("Invalid AIG header.")
+    if M != I + L + A:
+        raise ValueError("Invalid AIG header (M != I + L + A).")
+
+    # 输入隐式为 2..2I，锁存器为其后的 L 个变量
+    inputs = np.arange(1, I + 1, dtype=np.int32) * 2
+    latch_lines = []
+    for k in range(L):
+        line, pos = read_line(pos)
+        latch_lines.append(f"{2 * (I + k + 1)} {line.strip()}")
+
+    output_lines = []
+    for _ in range(O):
+        line, pos = read_line(pos)
+        output_lines.append(line)
+    outputs = _parse_int_lines(output_lines, 1, 'output')[:, 0]
+
+    deltas, pos = _decode_varints(data, pos, 2 * A)
+    lhs = np.arange(I + L + 1, M + 1, dtype=np.int64) * 2
+    rhs0 = lhs - deltas[0::2]
+    rhs1 = rhs0 - deltas[1::2]
+    if A and (not np.all(deltas[0::2] > 0) or int(rhs1.min()) < 0):
+        raise ValueError("Invalid delta in binary AND gate section.")
+
+    lines = data[pos:].decode(errors='replace').split('\n')
+    if lines and lines[-1] == '':
+        lines.pop()
+    input_names, symbol_lines, comment_lines = _parse_symbol_table(lines, I)
+
+    return AIG(M, inputs, latch_lines, outputs, lhs, rhs0, rhs1,
+               input_names, symbol_lines, comment_lines)
+
+
+def parse_aiger(path):
+    """按文件头自动识别ASCII (aag) 或二进制 (aig) AIGER文件并解析"""
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+    if magic == b'aig ':
+        return parse_aig(path)
+    return parse_aag(path)
+
+
+def write_order_file(path, orders):
+    """写出排列文件: orders 为 [(标签, order)]，order[new] = old
+
+    每个候选顺序占一行，前面是一行 "# 标签" 注释；第一行为首选顺序，
+    solution_gen 在原始AIG上应用这些顺序并保留BDD最小的一个。
+    """
+    with open(path, 'w') as f:
+        for label, order in orders:
+            f.write(f"# {label}\n")
+            f.write(' '.join(str(int(old)) for old in order) + "\n")
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+bdd_cache.py
+
+Content-addressed on-disk cache of compiled BDDs for run.sh.
+
+For a given constraint file the pipeline up to the BDD (json2verilog,
+split_verilog, yosys, the reorder stage and the BDD construction) does not
+depend on the random seed. A cold run saves every split's flat node table and
+input names (solution_gen --save-bdd) together with json2verilog.widths under
+a key that hashes the constraint file, the pipeline configuration and the
+tools that produced the entry. A warm run copies the entry into its run
+directory and only samples (solution_gen --load-bdd).
+
+Entries are directories, published by renaming a fully written temporary
+directory, so concurrent runs of the same constraint file (several seeds
+started at once) either see a complete entry or none; when several runs store
+the same key the first rename wins and the others drop their copy. Hits are
+copied out rather than read in place, so an entry evicted by another run
+mid-copy only turns into a miss, and run.sh discards an entry that
+solution_gen rejects and reruns the pipeline cold. The directory is kept under a size cap by
+evicting the least recently used entries (by mtime, refreshed on every hit).
+
+The cache is enabled by the BDD_CACHE_DIR environment variable;
+BDD_CACHE_MAX_MB sets the cap.
+
+Usage:
+    key=$(python3 bdd_cache.py key constraint.json --file _run/solution_gen --config SOLVER_REORDER=sift)
+    python3 bdd_cache.py fetch "$key" run_dir     # exit 0 on a hit, entry copied into run_dir
+    python3 bdd_cache.py store "$key" run_dir     # publish run_dir's compiled BDDs
+    python3 bdd_cache.py discard "$key"           # drop an entry solution_gen could not load
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+
+from cache_util import TMP_PREFIX, evict_lru, max_bytes_from_env
+
+# 条目格式或 solution_gen 的 .bdd 格式变化时递增，使旧缓存失效
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# 一个条目的内容: 变量位宽 + 每个拆分的已编译BDD
+ENTRY_FILES = ('json2verilog.widths',)
+ENTRY_DIRS = ('compiled_bdds',)
+
+
+def _hash_file(digest, path):
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+
+
+def cache_key(constraint_file, files=(), config=()):
+    """约束文件内容 + 生成流水线的文件 + 配置项 (KEY=VALUE) 的 sha256"""
+    digest = hashlib.sha256(f"bdd-cache-v{CACHE_VERSION}\n".encode())
+    _hash_file(digest, constraint_file)
+    for path in files:
+        digest.update(f"\nfile {os.path.basename(path)}\n".encode())
+        _hash_file(digest, path)
+    for item in sorted(config):
+        digest.update(f"\nconfig {item}".encode())
+    return digest.hexdigest()
+
+
+class BDDCache:
+    """按 key 存储已编译BDD目录的缓存"""
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"v{CACHE_VERSION}-{key}")
+
+    def fetch(self, key, run_dir):
+        """命中时把条目复制到 run_dir 并返回 True，否则返回 False"""
+        path = self._path(key)
+        if not os.path.isdir(path):
+            return False
+
+        copied = []
+        try:
+            for name in ENTRY_FILES:
+                shutil.copy(os.path.join(path, name), os.path.join(run_dir, name))
+                copied.append(os.path.join(run_dir, name))
+            for name in ENTRY_DIRS:
+                target = os.path.join(run_dir, name)
+                shutil.rmtree(target, ignore_errors=True)
+                shutil.copytree(os.path.join(path, name), target)
+                copied.append(target)
+        except OSError:
+            # 条目在复制过程中被其他进程淘汰: 按未命中处理
+            for target in copied:
+                if os.path.isdir(target):
+                    shutil.rmtree(target, ignore_errors=True)
+                else:
+                    try:
+                        os.unlink(target)
+                    except OSError:
+                        pass
+            return False
+
+        # 刷新mtime作为LRU访问时间
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return True
+
+    def store(self, key, run_dir):
+        """把 run_dir 中的条目内容写入临时目录后原子发布，然后淘汰最久未用的条目"""
+        path = self._path(key)
+        if os.path.isdir(path):
+            return True
+
+        tmp_path = tempfile.mkdtemp(dir=self.cache_dir, prefix=TMP_PREFIX)
+        try:
+            for name in ENTRY_FILES:
+                shutil.copy(os.path.join(run_dir, name), os.path.join(tmp_path, name))
+            for name in ENTRY_DIRS:
+                shutil.copytree(os.path.join(run_dir, name), os.path.join(tmp_path, name))
+            os.rename(tmp_path, path)
+        except OSError:
+            # 同一 key 已被其他进程先发布 (rename 到非空目录失败) 或写入失败
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return os.path.isdir(path)
+        self.evict()
+        return True
+
+    def discard(self, key):
+        """删除一个条目 (例如 solution_gen 拒绝了其中的 .bdd)"""
+        path = self._path(key)
+        # 先改名为临时目录再删除，其他进程不会看到删了一半的条目
+        tmp_path = os.path.join(self.cache_dir, f"{TMP_PREFIX}discard-{os.getpid()}-{key}")
+        try:
+            os.rename(path, tmp_path)
+        except OSError:
+            return
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def evict(self):
+        """总大小超过上限时，按mtime从旧到新删除条目"""
+        evict_lru(self.cache_dir, self.max_bytes, directories=True)
+
+
+def open_bdd_cache(cache_dir=None):
+    """按参数或环境变量打开缓存，未配置时返回 None"""
+    cache_dir = cache_dir or os.environ.get('BDD_CACHE_DIR')
+    if not cache_dir:
+        return None
+    max_bytes = max_bytes_from_env('BDD_CACHE_MAX_MB', DEFAULT_MAX_BYTES)
+    try:
+        return BDDCache(cache_dir, max_bytes)
+    except OSError as e:
+        print(f"警告: BDD缓存不可用 ({e})", file=sys.stderr)
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled BDD cache used by run.sh")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    key_parser = subparsers.add_parser('key', help="Print the cache key of a constraint file")
+    key_parser.add_argument('constraint_file')
+    key_parser.add_argument('--file', action='append', default=[],
+                            help="Tool or script whose content is part of the key (repeatable)")
+    key_parser.add_argument('--config', action='append', default=[],
+                            help="KEY=VALUE pipeline setting that is part of the key (repeatable)")
+
+    fetch_parser = subparsers.add_parser('fetch', help="Copy a cached entry into a run directory")
+    fetch_parser.add_argument('key')
+    fetch_parser.add_argument('run_dir')
+
+    store_parser = subparsers.add_parser('store', help="Publish the compiled BDDs of a run directory")
+    store_parser.add_argument('key')
+    store_parser.add_argument('run_dir')
+
+    discard_parser = subparsers.add_parser('discard', help="Remove an entry that failed to load")
+    discard_parser.add_argument('key')
+
+    args = parser.parse_args()
+
+    if args.command == 'key':
+        try:
+            print(cache_key(args.constraint_file, args.file, args.config))
+        except OSError as e:
+            print(f"错误: 无法计算缓存key ({e})", file=sys.stderr)
+            return 1
+        return 0
+
+    cache = open_bdd_cache()
+    if cache is None:
+        return 1
+    if args.command == 'fetch':
+        return 0 if cache.fetch(args.key, args.run_dir) else 1
+    if args.command == 'discard':
+        cache.discard(args.key)
+        return 0
+    return 0 if cache.store(args.key, args.run_dir) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+benchmark.py
+
+Ordering-quality benchmark across all variable-ordering heuristics.
+
+For every test case of the selected suites (basic/, opt1/ ... opt5/) the
+constraint file is taken through run.sh once to obtain split_aags/; then every
+ordering method reorders every split, and solution_gen builds the BDDs and
+samples from them. Per split we record:
+
+    reorder_time   parse + ordering + AAG write (seconds)
+    build_time     AAG -> BDD construction in solution_gen (seconds)
+    bdd_nodes      final BDD size (Cudd_DagSize of the output)
+    peak_nodes     peak live node count of the manager
+    sample_time    solution sampling time (seconds)
+
+Results are written as <output>.json (all rows plus per-suite summaries) and
+<output>.csv (one row per split).
+
+Usage:
+    python3 benchmark.py [--suites basic opt1 ...] [--methods std:mincut rcm ...]
+                         [--cases N] [--solutions 100] [--seed 42]
+                         [--timeout 300] [--work-dir _run/bench] [--output PREFIX]
+                         [--solver-reorder none|sift|group-sift|group-converge]
+"""
+
+import argparse
+import contextlib
+import csv
+import importlib
+import io
+import json
+import math
+import os
+import re
+import shutil
+import subprocess
+import time
+import traceback
+from collections import defaultdict
+
+SUITES = ['basic', 'opt1', 'opt2', 'opt3', 'opt4', 'opt5']
+
+# 方法名 -> (模块, --method 参数)；'none' 表示保持yosys输出的原始顺序
+METHODS = {
+    'none': (None, None),
+    'std:dfs': ('reorder_aag_std', 'dfs'),
+    'std:mincut': ('reorder_aag_std', 'mincut'),
+    'std:lifetime': ('reorder_aag_std', 'lifetime'),
+    'std:cofactor': ('reorder_aag_std', 'cofactor'),
+    'std:hybrid': ('reorder_aag_std', 'hybrid'),
+    'hybrid:sift': ('reorder_aag_hybrid', 'sift'),
+    'hybrid:window': ('reorder_aag_hybrid', 'window'),
+    'hybrid:interleave': ('reorder_aag_hybrid', 'interleave'),
+    'hybrid:quant': ('reorder_aag_hybrid', 'quant'),
+    'rcm': ('reorder_aag_rcm', None),
+}
+
+STATS_PATTERN = re.compile(r'^\[stats\] (.*)$')
+CSV_FIELDS = ['suite', 'case', 'method', 'split', 'status', 'inputs', 'ands',
+              'reorder_time', 'build_time', 'bdd_nodes', 'peak_nodes', 'live_nodes',
+              'reorderings', 'sample_time']
+
+
+def list_cases(suite_dir, limit=None):
+    """按编号返回套件中的约束文件"""
+    cases = []
+    for name in os.listdir(suite_dir):
+        stem, ext = os.path.splitext(name)
+        if ext == '.json' and stem.isdigit():
+            cases.append((int(stem), os.path.join(suite_dir, name)))
+    cases.sort()
+    return [path for _, path in cases[:limit]]
+
+
+def prepare_case(constraint_file, case_dir, seed, timeout):
+    """用 run.sh 生成 json2verilog.widths 和 split_aags/，返回拆分数 (失败返回 None)"""
+    os.makedirs(case_dir, exist_ok=True)
+    log_path = os.path.join(case_dir, 'run.log')
+    with open(log_path, 'w') as log:
+        try:
+            subprocess.run(['./run.sh', constraint_file, '1', case_dir, str(seed)],
+                           stdout=log, stderr=subprocess.STDOUT, timeout=timeout, check=True)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+            return None
+    split_dir = os.path.join(case_dir, 'split_aags')
+    if not os.path.isdir(split_dir):
+        return None
+    return len([name for name in os.listdir(split_dir) if re.match(r'^split_\d+\.aag$', name)])
+
+
+def reorder_splits(method, case_dir, method_dir, split_num):
+    """对每个拆分执行一种排序方法，返回每个拆分的 (耗时, 状态)"""
+    module_name, method_arg = METHODS[method]
+    reorder_file = importlib.import_module(module_name).reorder_file if module_name else None
+
+    output_dir = os.path.join(method_dir, 'reordered_aags')
+    os.makedirs(output_dir, exist_ok=True)
+    # 变量位宽: json2aig 前端只生成 json2verilog.widths，Verilog 前端两者都有
+    for name in ('json2verilog.widths', 'json2verilog.v'):
+        path = os.path.join(case_dir, name)
+        if os.path.exists(path):
+            shutil.copy(path, method_dir)
+
+    results = []
+    for q in range(split_num):
+        input_path = os.path.join(case_dir, 'split_aags', f'split_{q}.aag')
+        output_path = os.path.join(output_dir, f'reordered_{q}.aag')
+        status = 'ok'
+        start = time.perf_counter()
+        if reorder_file is None:
+            shutil.copy(input_path, output_path)
+        else:
+            kwargs = {'method': method_arg} if method_arg else {}
+            log = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(log):
+                    reorder_file(input_path, output_path, **kwargs)
+            except Exception:
+                traceback.print_exc(file=log)
+                status = 'reorder_failed'
+            if status != 'ok' or not os.path.isfile(output_path):
+                status = 'reorder_failed'
+                shutil.copy(input_path, output_path)
+            with open(os.path.join(method_dir, f'reorder_aag_{q}.log'), 'w') as f:
+                f.write(log.getvalue())
+        results.append((time.perf_counter() - start, status))
+    return results
+
+
+def run_solution_gen(method_dir, split_num, seed, solutions, timeout, solver_reorder=None):
+    """运行 solution_gen 并解析每个拆分的 [stats] 行"""
+    output_file = os.path.join(method_dir, 'result.json')
+    # 每个拆分独立的manager，peak_nodes 才能按拆分比较
+    command = ['_run/solution_gen', method_dir, str(seed), str(solutions), output_file, str(split_num),
+               '--manager', 'per-split']
+    if solver_reorder:
+        command += ['--reorder', solver_reorder]
+    try:
+        proc = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              universal_newlines=True, timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        output = e.stdout or ''
+        if isinstance(output, bytes):
+            output = output.decode(errors='replace')
+        return parse_stats(output), 'timeout'
+
+    with open(os.path.join(method_dir, 'solver.log'), 'w') as log:
+        log.write(proc.stdout)
+    return parse_stats(proc.stdout), 'ok' if proc.returncode == 0 else 'solver_failed'
+
+
+def parse_stats(output):
+    """[stats] key=value ... -> {split: {key: value}}"""
+    stats = {}
+    for line in output.splitlines():
+        match = STATS_PATTERN.match(line.strip())
+        if not match:
+            continue
+        fields = dict(item.split('=', 1) for item in match.group(1).split())
+        row = {key: float(value) if '.' in value or 'e' in value else int(value)
+               for key, value in fields.items()}
+        stats[row.pop('split')] = row
+    return stats
+
+
+def summarize(rows):
+    """按 (套件, 方法) 汇总；wins 为该方法峰值节点总数在用例中最小的次数"""
+    per_case = defaultdict(lambda: defaultdict(lambda: defaultdict(float)))
+    case_ok = defaultdict(lambda: defaultdict(dict))
+    for row in rows:
+        key = (row['suite'], row['case'])
+        totals = per_case[key][row['method']]
+        for field in ('reorder_time', 'build_time', 'sample_time', 'bdd_nodes', 'peak_nodes'):
+            if row.get(field) is not None:
+                totals[field] += row[field]
+        ok = case_ok[key][row['method']].get('ok', True)
+        case_ok[key][row['method']]['ok'] = ok and row['status'] == 'ok'
+
+    summary = defaultdict(lambda: defaultdict(lambda: defaultdict(float)))
+    log_ratio = defaultdict(lambda: defaultdict(list))
+    for (suite, case), methods in per_case.items():
+        completed = {m: t for m, t in methods.items() if case_ok[(suite, case)][m]['ok']}
+        best = min((t['peak_nodes'] for t in completed.values()), default=None)
+        baseline = completed.get('none', {}).get('peak_nodes')
+        for method, totals in methods.items():
+            entry = summary[suite][method]
+            entry['cases'] += 1
+            if method not in completed:
+                entry['failed'] += 1
+                continue
+            for field, value in totals.items():
+                entry[field] += value
+            if totals['peak_nodes'] == best:
+                entry['wins'] += 1
+            if baseline and totals['peak_nodes'] > 0:
+                log_ratio[suite][method].append(math.log(totals['peak_nodes'] / baseline))
+
+    result = {}
+    for suite, methods in summary.items():
+        result[suite] = {}
+        for method, entry in methods.items():
+            entry = dict(entry)
+            ratios = log_ratio[suite][method]
+            if ratios:
+                # 相对原始顺序的峰值节点几何平均比值 (<1 表示更好)
+                entry['peak_ratio_vs_none'] = math.exp(sum(ratios) / len(ratios))
+            for field in ('cases', 'failed', 'wins', 'bdd_nodes', 'peak_nodes'):
+                entry[field] = int(entry.get(field, 0))
+            result[suite][method] = entry
+    return result
+
+
+def write_results(rows, summary, output):
+    with open(output + '.json', 'w') as f:
+        json.dump({'rows': rows, 'summary': summary}, f, indent=2)
+    with open(output + '.csv', 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def print_summary(summary):
+    for suite in sorted(summary):
+        print(f"===== {suite} =====")
+        print(f"{'method':<20}{'cases':>6}{'fail':>6}{'wins':>6}{'peak':>12}{'ratio':>8}"
+              f"{'reorder':>10}{'build':>10}{'sample':>10}")
+        for method, entry in sorted(summary[suite].items(), key=lambda kv: kv[1].get('peak_nodes', 0)):
+            ratio = entry.get('peak_ratio_vs_none')
+            print(f"{method:<20}{entry['cases']:>6}{entry['failed']:>6}{entry['wins']:>6}"
+                  f"{entry['peak_nodes']:>12}{(f'{ratio:.3f}' if ratio else '-'):>8}"
+                  f"{entry.get('reorder_time', 0):>10.2f}{entry.get('build_time', 0):>10.2f}"
+                  f"{entry.get('sample_time', 0):>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='变量排序方法质量基准测试')
+    parser.add_argument('--suites', nargs='+', default=SUITES, help='测试套件目录 (默认: 全部)')
+    parser.add_argument('--methods', nargs='+', default=list(METHODS), choices=list(METHODS),
+                        help='排序方法 (默认: 全部)')
+    parser.add_argument('--cases', type=int, default=None, help='每个套件最多测试的用例数')
+    parser.add_argument('--solutions', type=int, default=100, help='每次采样的解数量 (默认: 100)')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子 (默认: 42)')
+    parser.add_argument('--timeout', type=float, default=300, help='每次 run.sh / solution_gen 的超时秒数')
+    parser.add_argument('--work-dir', default='_run/bench', help='中间文件目录 (默认: _run/bench)')
+    parser.add_argument('--output', help='结果文件前缀 (默认: <work-dir>/bench_results)')
+    parser.add_argument('--solver-reorder', choices=['none', 'sift', 'group-sift', 'group-converge'],
+                        help='solution_gen 的CUDD动态重排模式 (默认: solution_gen 的默认值)')
+    args = parser.parse_args()
+    if args.output is None:
+        args.output = os.path.join(args.work_dir, 'bench_results')
+
+    # 基准测试要测量真实的排序时间，不使用排序缓存
+    os.environ.pop('REORDER_CACHE_DIR', None)
+    # BDD缓存命中会跳过拆分与排序，既不生成 split_aags/，也会带回旧排序下的BDD
+    os.environ.pop('BDD_CACHE_DIR', None)
+    # 各方法的重排结果按 .aag 组织，固定 run.sh 输出ASCII格式
+    os.environ['AIGER_FORMAT'] = 'aag'
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    rows = []
+    for suite in args.suites:
+        for constraint_file in list_cases(suite, args.cases):
+            case = os.path.splitext(os.path.basename(constraint_file))[0]
+            case_dir = os.path.join(args.work_dir, suite, case)
+            print(f"处理 {suite}/{case}.json ...")
+            split_num = prepare_case(constraint_file, case_dir, args.seed, args.timeout)
+            if not split_num:
+                print(f"  错误: run.sh 处理失败，详情请查看: {os.path.join(case_dir, 'run.log')}")
+                continue
+
+            for method in args.methods:
+                method_dir = os.path.join(case_dir, method.replace(':', '_'))
+                reorder_results = reorder_splits(method, case_dir, method_dir, split_num)
+                stats, solver_status = run_solution_gen(method_dir, split_num, args.seed,
+                                                         args.solutions, args.timeout, args.solver_reorder)
+                for q, (reorder_time, status) in enumerate(reorder_results):
+                    row = {'suite': suite, 'case': case, 'method': method, 'split': q,
+                           'reorder_time': reorder_time}
+                    row.update(stats.get(q, {}))
+                    if status == 'ok' and q not in stats:
+                        status = solver_status if solver_status != 'ok' else 'missing_stats'
+                    row['status'] = status
+                    rows.append(row)
+                total_peak = sum(stats[q].get('peak_nodes', 0) for q in stats)
+                print(f"  {method:<20} peak_nodes={total_peak} ({solver_status})")
+
+    summary = summarize(rows)
+    write_results(rows, summary, args.output)
+    print_summary(summary)
+    print(f"结果已保存到: {args.output}.json, {args.output}.csv")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+cache_util.py
+
+Helpers shared by the on-disk caches of run.sh (order_cache.py, bdd_cache.py).
+
+Both caches publish entries by renaming a temporary '.tmp-' file or directory
+and keep their directory under a size cap by evicting the least recently used
+entries (by mtime, refreshed on every hit). Temporary entries older than
+STALE_TMP_SECONDS are left over by crashed runs and are removed during
+eviction.
+
+Usage:
+    from cache_util import TMP_PREFIX, evict_lru, max_bytes_from_env
+    max_bytes = max_bytes_from_env('REORDER_CACHE_MAX_MB', 64 * 1024 * 1024)
+    evict_lru(cache_dir, max_bytes, suffix='.order.npy')
+"""
+
+import os
+import shutil
+import time
+
+# 临时文件/目录的前缀，发布前写入其中
+TMP_PREFIX = '.tmp-'
+# 超过该时间 (秒) 的临时文件/目录视为崩溃进程遗留，淘汰时一并删除
+STALE_TMP_SECONDS = 3600
+
+
+def max_bytes_from_env(name, default):
+    """读取以MB为单位的容量上限环境变量，未设置时返回 default (字节)"""
+    max_mb = os.environ.get(name)
+    return int(float(max_mb) * 1024 * 1024) if max_mb else default
+
+
+def tree_size(path):
+    """目录下所有文件的总大小"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _remove(path, is_dir):
+    if is_dir:
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def evict_lru(cache_dir, max_bytes, suffix='', directories=False):
+    """总大小超过上限时，按mtime从旧到新删除条目
+
+    条目是 cache_dir 中以 suffix 结尾的文件 (directories=True 时为目录)，
+    同时删除过期的临时条目。
+    """
+    entries = []
+    total = 0
+    now = time.time()
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if not entry.name.endswith(suffix):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False) != directories:
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if entry.name.startswith(TMP_PREFIX):
+                if now - stat.st_mtime > STALE_TMP_SECONDS:
+                    _remove(entry.path, directories)
+                continue
+            size = tree_size(entry.path) if directories else stat.st_size
+            entries.append((stat.st_mtime, size, entry.path))
+            total += size
+
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        _remove(path, directories)
+        total -= size
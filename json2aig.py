@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+json2aig.py
+
+Direct constraint.json -> AIG frontend for run.sh (JSON_FRONTEND=aig).
+
+Instead of printing Verilog (json2verilog), re-parsing it (split_verilog) and
+starting yosys per split, the constraint_list expressions are bit-blasted
+straight into a structurally hashed AND-inverter graph. The result is the same
+set of files steps 1-3 leave behind:
+    split_aags/split_N.aag (or .aig)  - one AIG per independent component
+    json2verilog.widths               - variable widths read by solution_gen
+
+Width semantics follow evalcns, which checks the solutions:
+    annotate_width_1  bottom-up: ADD/SUB/MUL/DIV/BIT_* take max(lhs, rhs),
+                      comparisons, LOG_* and IMPLY are 1 bit, shifts take the
+                      lhs width, BIT_NEG/MINUS keep their operand width,
+                      VAR/CONST take their declared width
+    annotate_width_2  top-down: arithmetic and bitwise operands, the shifted
+                      operand and BIT_NEG/MINUS operands take the node width,
+                      comparison operands are extended to the wider side,
+                      LOG_* / IMPLY / LOG_NEG operands and shift amounts keep
+                      their own width
+    every node is evaluated modulo 2^width (unsigned) and a constraint holds
+    iff its value is nonzero.
+Every DIV adds the guard divisor != 0, with the divisor taken at the width it
+is divided at (evalcns would fail on a zero divisor).
+
+Components and their numbering match split_verilog: variables that share a
+constraint end up in the same split, splits are numbered by their smallest
+variable, constant constraints go to the split of var_0. Every split has all
+bits of its variables as inputs (var_x[y], variable order, LSB first) and the
+single output x.
+
+Exits with status 2 on an operator outside the generateExpression set, so
+run.sh can fall back to the Verilog frontend.
+
+Usage:
+    python3 json2aig.py constraint.json run_dir [--format aag|aig]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from aig import AIG
+
+CONST0 = 0
+CONST1 = 1
+
+ARITH_OPS = {'ADD', 'SUB', 'MUL', 'DIV', 'BIT_AND', 'BIT_OR', 'BIT_XOR'}
+COMPARE_OPS = {'EQ', 'NEQ', 'LT', 'LTE', 'LE', 'GT', 'GTE', 'GE'}
+LOGIC_OPS = {'LOG_AND', 'LOG_OR', 'IMPLY'}
+SHIFT_OPS = {'LSHIFT', 'RSHIFT'}
+UNARY_OPS = {'LOG_NEG', 'BIT_NEG', 'MINUS'}
+BINARY_OPS = ARITH_OPS | COMPARE_OPS | LOGIC_OPS | SHIFT_OPS
+
+
+class UnsupportedOperator(ValueError):
+    """约束中出现了本前端不支持的运算符"""
+
+
+class Expr:
+    """约束表达式树节点，位宽按 evalcns 的两遍规则标注"""
+
+    def __init__(self, op, lhs=None, rhs=None, var=None, value=0, width=0):
+        self.op = op
+        self.lhs = lhs
+        self.rhs = rhs
+        self.var = var
+        self.value = value
+        self.width = width
+
+    @classmethod
+    def create(cls, json_expr):
+        op = json_expr['op']
+        if op == 'VAR':
+            return cls(op, var=int(json_expr['id']))
+        if op == 'CONST':
+            width, value = json_expr['value'].split("'h", 1)
+            return cls(op, value=int(value, 16), width=int(width, 10))
+        if op in UNARY_OPS:
+            return cls(op, lhs=cls.create(json_expr['lhs_expression']))
+        if op in BINARY_OPS:
+            return cls(op, lhs=cls.create(json_expr['lhs_expression']),
+                       rhs=cls.create(json_expr['rhs_expression']))
+        raise UnsupportedOperator(f"unsupported operator '{op}'")
+
+    def variables(self, found):
+        """收集表达式中出现的变量编号"""
+        if self.op == 'VAR':
+            found.add(self.var)
+        if self.lhs is not None:
+            self.lhs.variables(found)
+        if self.rhs is not None:
+            self.rhs.variables(found)
+        return found
+
+    def annotate_width_1(self, widths):
+        """自底向上: 由操作数确定自身位宽"""
+        op = self.op
+        if op == 'VAR':
+            self.width = widths[self.var]
+        elif op == 'CONST':
+            pass
+        elif op in UNARY_OPS:
+            self.lhs.annotate_width_1(widths)
+            self.width = 1 if op == 'LOG_NEG' else self.lhs.width
+        else:
+            self.lhs.annotate_width_1(widths)
+            self.rhs.annotate_width_1(widths)
+            if op in ARITH_OPS:
+                self.width = max(self.lhs.width, self.rhs.width)
+            elif op in SHIFT_OPS:
+                self.width = self.lhs.width
+            else:
+                self.width = 1
+
+    def annotate_width_2(self):
+        """自顶向下: 把上下文位宽传给操作数"""
+        op = self.op
+        if op in ARITH_OPS:
+            self.lhs.width = self.width
+            self.rhs.width = self.width
+        elif op in COMPARE_OPS:
+            width = max(self.lhs.width, self.rhs.width)
+            self.lhs.width = width
+            self.rhs.width = width
+        elif op in SHIFT_OPS or op in ('BIT_NEG', 'MINUS'):
+            self.lhs.width = self.width
+        if self.lhs is not None:
+            self.lhs.annotate_width_2()
+        if self.rhs is not None:
+            self.rhs.annotate_width_2()
+
+
+class AigBuilder:
+    """带结构哈希的AIG构建器，字面量采用AIGER编码 (2*变量号 + 取反位)"""
+
+    def __init__(self):
+        self.num_vars = 0
+        self.inputs = []
+        self.input_names = []
+        self.ands = []          # (lhs, rhs0, rhs1)，按创建顺序即拓扑序
+        self.strash = {}
+
+    def add_input(self, name):
+        # 输入必须先于所有AND门编号
+        assert not self.ands
+        self.num_vars += 1
+        lit = 2 * self.num_vars
+        self.inputs.append(lit)
+        self.input_names.append(name)
+        return lit
+
+    def and_(self, a, b):
+        if a == CONST0 or b == CONST0 or a == b ^ 1:
+            return CONST0
+        if a == CONST1 or a == b:
+            return b
+        if b == CONST1:
+            return a
+        if a < b:
+            a, b = b, a
+        lit = self.strash.get((a, b))
+        if lit is None:
+            self.num_vars += 1
+            lit = 2 * self.num_vars
+            self.ands.append((lit, a, b))
+            self.strash[(a, b)] = lit
+        return lit
+
+    def or_(self, a, b):
+        return self.and_(a ^ 1, b ^ 1) ^ 1
+
+    def xor(self, a, b):
+        return self.or_(self.and_(a, b ^ 1), self.and_(a ^ 1, b))
+
+    def mux(self, sel, then_lit, else_lit):
+        if then_lit == else_lit:
+            return then_lit
+        return self.or_(self.and_(sel, then_lit), self.and_(sel ^ 1, else_lit))
+
+    def to_aig(self, output):
+        """只保留输出锥内的门，重新编号为 输入 1..I、门 I+1..，返回 aig.AIG"""
+        live = np.zeros(self.num_vars + 1, dtype=bool)
+        live[output >> 1] = True
+        for lhs, rhs0, rhs1 in reversed(self.ands):
+            if live[lhs >> 1]:
+                live[rhs0 >> 1] = True
+                live[rhs1 >> 1] = True
+
+        I = len(self.inputs)
+        new_var = np.zeros(self.num_vars + 1, dtype=np.int64)
+        new_var[np.array(self.inputs, dtype=np.int64) >> 1] = np.arange(1, I + 1)
+        gates = [gate for gate in self.ands if live[gate[0] >> 1]]
+        if gates:
+            gates = np.array(gates, dtype=np.int64)
+            new_var[gates[:, 0] >> 1] = np.arange(I + 1, I + len(gates) + 1)
+        else:
+            gates = np.zeros((0, 3), dtype=np.int64)
+
+        def remap(lits):
+            return (new_var[lits >> 1] << 1) | (lits & 1)
+
+        lhs = remap(gates[:, 0])
+        fanin0 = remap(gates[:, 1])
+        fanin1 = remap(gates[:, 2])
+        return AIG(I + len(gates), np.arange(1, I + 1) * 2, [], remap(np.array([output])),
+                   lhs, np.maximum(fanin0, fanin1), np.minimum(fanin0, fanin1),
+                   self.input_names, ['o0 x'])
+
+
+class BitBlaster:
+    """把标注好位宽的表达式展开为位向量 (低位在前的字面量列表)"""
+
+    def __init__(self, builder, var_bits):
+        self.b = builder
+        self.var_bits = var_bits
+        self.guards = []        # 除数非零条件
+
+    @staticmethod
+    def resize(bits, width):
+        return bits[:width] + [CONST0] * (width - len(bits))
+
+    def reduce_or(self, bits):
+        result = CONST0
+        for bit in bits:
+            result = self.b.or_(result, bit)
+        return result
+
+    def add(self, a, c, carry=CONST0):
+        """返回 (a + c + carry 的低 len(a) 位, 进位)"""
+        b = self.b
+        total = []
+        for x, y in zip(a, c):
+            t = b.xor(x, y)
+            total.append(b.xor(t, carry))
+            carry = b.or_(b.and_(x, y), b.and_(t, carry))
+        return total, carry
+
+    def sub(self, a, c):
+        """返回 (a - c, a >= c)"""
+        return self.add(a, [bit ^ 1 for bit in c], CONST1)
+
+    def less_than(self, a, c):
+        b = self.b
+        lt = CONST0
+        for x, y in zip(a, c):
+            lt = b.mux(b.xor(x, y), y, lt)
+        return lt
+
+    def equal(self, a, c):
+        b = self.b
+        eq = CONST1
+        for x, y in zip(a, c):
+            eq = b.and_(eq, b.xor(x, y) ^ 1)
+        return eq
+
+    def mul(self, a, c):
+        """截断到 len(a) 位的移位相加乘法"""
+        b = self.b
+        width = len(a)
+        acc = [b.and_(x, c[0]) for x in a]
+        for i in range(1, width):
+            row = [b.and_(x, c[i]) for x in a[:width - i]]
+            acc[i:], _ = self.add(acc[i:], row)
+        return acc
+
+    def div(self, a, c):
+        """恢复余数除法，返回商；除数为0时的结果由除数非零约束排除"""
+        b = self.b
+        width = len(a)
+        divisor = c + [CONST0]
+        rem = [CONST0] * width
+        quotient = [CONST0] * width
+        for i in reversed(range(width)):
+            shifted = [a[i]] + rem
+            diff, no_borrow = self.sub(shifted, divisor)
+            quotient[i] = no_borrow
+            rem = [b.mux(no_borrow, d, s) for d, s in zip(diff[:width], shifted[:width])]
+        return quotient
+
+    def shift(self, a, amount, left):
+        """按 amount 的各位逐级移位，移位量不小于位宽时结果为0"""
+        b = self.b
+        width = len(a)
+        overflow = CONST0
+        for k, bit in enumerate(amount):
+            step = 1 << k
+            if step >= width:
+                overflow = b.or_(overflow, bit)
+                continue
+            if left:
+                moved = [CONST0] * step + a[:width - step]
+            else:
+                moved = a[step:] + [CONST0] * step
+            a = [b.mux(bit, m, x) for m, x in zip(moved, a)]
+        return [b.and_(x, overflow ^ 1) for x in a]
+
+    def blast(self, e):
+        """返回 e.width 位的位向量"""
+        b = self.b
+        op = e.op
+        width = e.width
+        if op == 'VAR':
+            return self.resize(self.var_bits[e.var], width)
+        if op == 'CONST':
+            return [CONST1 if (e.value >> i) & 1 else CONST0 for i in range(width)]
+
+        lhs = self.blast(e.lhs)
+        if op == 'LOG_NEG':
+            return self.resize([self.reduce_or(lhs) ^ 1], width)
+        if op == 'BIT_NEG':
+            return [bit ^ 1 for bit in lhs]
+        if op == 'MINUS':
+            return self.add([bit ^ 1 for bit in lhs], [CONST0] * width, CONST1)[0]
+
+        rhs = self.blast(e.rhs)
+        if op == 'ADD':
+            return self.add(lhs, rhs)[0]
+        if op == 'SUB':
+            return self.sub(lhs, rhs)[0]
+        if op == 'MUL':
+            return self.mul(lhs, rhs)
+        if op == 'DIV':
+            self.guards.append(self.reduce_or(rhs))
+            return self.div(lhs, rhs)
+        if op == 'BIT_AND':
+            return [b.and_(x, y) for x, y in zip(lhs, rhs)]
+        if op == 'BIT_OR':
+            return [b.or_(x, y) for x, y in zip(lhs, rhs)]
+        if op == 'BIT_XOR':
+            return [b.xor(x, y) for x, y in zip(lhs, rhs)]
+        if op in SHIFT_OPS:
+            return self.shift(lhs, rhs, op == 'LSHIFT')
+
+        if op == 'EQ':
+            bit = self.equal(lhs, rhs)
+        elif op == 'NEQ':
+            bit = self.equal(lhs, rhs) ^ 1
+        elif op == 'LT':
+            bit = self.less_than(lhs, rhs)
+        elif op in ('LTE', 'LE'):
+            bit = self.less_than(rhs, lhs) ^ 1
+        elif op == 'GT':
+            bit = self.less_than(rhs, lhs)
+        elif op in ('GTE', 'GE'):
+            bit = self.less_than(lhs, rhs) ^ 1
+        elif op == 'LOG_AND':
+            bit = b.and_(self.reduce_or(lhs), self.reduce_or(rhs))
+        elif op == 'LOG_OR':
+            bit = b.or_(self.reduce_or(lhs), self.reduce_or(rhs))
+        else:  # IMPLY
+            bit = b.or_(self.reduce_or(lhs) ^ 1, self.reduce_or(rhs))
+        return self.resize([bit], width)
+
+    def constraint(self, e):
+        """约束成立 (值非零) 的字面量"""
+        return self.reduce_or(self.blast(e))
+
+
+def split_components(num_vars, constraints):
+    """与 split_verilog 相同的连通分量划分，返回 [(变量列表, 约束列表)]"""
+    parent = list(range(num_vars))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    owner = []
+    for expr in constraints:
+        found = sorted(expr.variables(set()))
+        for var in found[1:]:
+            ra, rb = find(found[0]), find(var)
+            if ra != rb:
+                parent[rb] = ra
+        owner.append(found[0] if found else 0)
+
+    component_of = {}
+    components = []
+    for var in range(num_vars):
+        root = find(var)
+        if root not in component_of:
+            component_of[root] = len(components)
+            components.append(([], []))
+        components[component_of[root]][0].append(var)
+    for expr, var in zip(constraints, owner):
+        components[component_of[find(var)]][1].append(expr)
+    return components
+
+
+def build_split_aig(variables, constraints, names, widths):
+    """把一个分量的所有约束 (及除数非零条件) 相与，构建单输出AIG"""
+    builder = AigBuilder()
+    var_bits = {}
+    for var in variables:
+        var_bits[var] = [builder.add_input(f"{names[var]}[{bit}]") for bit in range(widths[var])]
+
+    blaster = BitBlaster(builder, var_bits)
+    terms = [blaster.constraint(expr) for expr in constraints]
+    output = CONST1
+    for term in terms + blaster.guards:
+        output = builder.and_(output, term)
+    return builder.to_aig(output)
+
+
+def write_width_file(path, widths):
+    """与 json2verilog 相同格式的变量位宽文件"""
+    with open(path, 'w') as f:
+        f.write("# variable bit widths: <index> <bit_width>\n")
+        for index, width in enumerate(widths):
+            f.write(f"{index} {width}\n")
+
+
+def convert(constraint_file, run_dir, aiger_format='aag'):
+    """生成 run_dir/split_aags/split_N 与 json2verilog.widths，返回拆分数"""
+    with open(constraint_file) as f:
+        problem = json.load(f)
+
+    variable_list = problem['variable_list']
+    names = [var['name'].replace('"', '') for var in variable_list]
+    widths = [int(var['bit_width']) for var in variable_list]
+
+    constraints = []
+    for json_expr in problem['constraint_list']:
+        expr = Expr.create(json_expr)
+        expr.annotate_width_1(widths)
+        expr.annotate_width_2()
+        constraints.append(expr)
+
+    aag_dir = os.path.join(run_dir, 'split_aags')
+    os.makedirs(aag_dir, exist_ok=True)
+    write_width_file(os.path.join(run_dir, 'json2verilog.widths'), widths)
+
+    components = split_components(len(variable_list), constraints)
+    for index, (variables, exprs) in enumerate(components):
+        aig = build_split_aig(variables, exprs, names, widths)
+        aig.write_aiger(os.path.join(aag_dir, f"split_{index}.{aiger_format}"))
+    return len(components)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bit-blast constraint.json into per-split AIGER files")
+    parser.add_argument('constraint_file')
+    parser.add_argument('run_dir')
+    parser.add_argument('--format', choices=('aag', 'aig'), default='aag',
+                        help="AIGER format of split_aags/split_N (default: aag)")
+    args = parser.parse_args()
+
+    try:
+        num_splits = convert(args.constraint_file, args.run_dir, args.format)
+    except UnsupportedOperator as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 2
+    print(f"Constraints successfully bit-blasted into {num_splits} separate AIGs.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -36,6 +36,42 @@ bool createDirectory(const std::string& path) {
     return result == 0;
 }
 
+/**
+ * Write the variable width sidecar read by solution_gen
+ * One line per variable in variable_list order: <index> <bit_width>
+ * @param path Output file path
+ * @param variableList Variables of the constraint file
+ * @return True if the file was written, false otherwise
+ */
+bool writeWidthFile(const std::string& path, const json& variableList) {
+    std::ofstream widthFile(path);
+    if (!widthFile.is_open()) return false;
+
+    widthFile << "# variable bit widths: <index> <bit_width>" << std::endl;
+    for (size_t i = 0; i < variableList.size(); ++i) {
+        widthFile << i << " " << static_cast<int>(variableList[i]["bit_width"]) << std::endl;
+    }
+    return static_cast<bool>(widthFile);
+}
+
+/**
+ * Write the constraint cost sidecar read by split_verilog
+ * One line per original constraint wire: <constraint_index> <cost>
+ * @param path Output file path
+ * @param costs calculate_constraint_cost of each constraint, in constraint_list order
+ * @return True if the file was written, false otherwise
+ */
+bool writeCostFile(const std::string& path, const std::vector<double>& costs) {
+    std::ofstream costFile(path);
+    if (!costFile.is_open()) return false;
+
+    costFile << "# constraint costs: <constraint_index> <cost>" << std::endl;
+    for (size_t i = 0; i < costs.size(); ++i) {
+        costFile << i << " " << costs[i] << std::endl;
+    }
+    return static_cast<bool>(costFile);
+}
+
 //define operator weights
 std::map<std::string, int> operator_weights = {
     {"VAR", 0},
@@ -284,6 +320,13 @@ int main(int argc, char* argv[]) {
     // Generate output declaration
     outputFile << "    output wire x;" << std::endl;
 
+    // Variable widths for solution_gen, so it does not have to parse the Verilog
+    std::string widthFilePath = outputDir + "/json2verilog.widths";
+    if (!writeWidthFile(widthFilePath, variableList)) {
+        std::cerr << "Error: Unable to create output file: " << widthFilePath << std::endl;
+        return 1;
+    }
+
     // Data structures to hold information for Verilog generation
     std::vector<std::string> all_wires_to_declare;
     std::vector<std::pair<std::string, std::string>> assignments_to_print; // pair: {wire_name, rhs_expression_for_assign}
@@ -293,6 +336,7 @@ int main(int argc, char* argv[]) {
         double cost;
     };
     std::vector<ConstraintInfoForSorting> original_constraints_for_sorting;
+    std::vector<double> constraint_costs;
     std::vector<std::string> divisor_check_wires_for_final_AND;
     
     std::set<std::string> unique_divisor_expressions_set; // Use a set for automatic uniqueness of divisor expressions
@@ -309,6 +353,7 @@ int main(int argc, char* argv[]) {
 
         double cost = calculate_constraint_cost(constraintList[i], variableList);
         original_constraints_for_sorting.push_back({current_wire_name, cost});
+        constraint_costs.push_back(cost);
 
         for (const auto& div_expr : current_constraint_divisors) {
             unique_divisor_expressions_set.insert(div_expr);
@@ -323,6 +368,15 @@ int main(int argc, char* argv[]) {
         divisor_check_wires_for_final_AND.push_back(current_wire_name);
     }
     
+    // Constraint costs for split_verilog, which sums them per split so run.sh can pick a
+    // synthesis recipe. Divisor checks are not listed: the +50 division penalty already
+    // sits on the constraint that divides.
+    std::string costFilePath = outputDir + "/json2verilog.costs";
+    if (!writeCostFile(costFilePath, constraint_costs)) {
+        std::cerr << "Error: Unable to create output file: " << costFilePath << std::endl;
+        return 1;
+    }
+
     outputFile << std::endl; // Blank line before wire declarations
 
     // --- Phase 3: Print all wire declarations ---
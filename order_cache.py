@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+order_cache.py
+
+Content-addressed on-disk cache of computed variable orders.
+
+Orders are keyed by the structural hash of the parsed AIG plus the name of
+the reorder algorithm, so running the same constraint file with different
+seeds reuses the order computed by the first run. Entries are written
+atomically (temporary file + os.replace) so concurrent runs can share one
+cache directory, and the directory is kept under a size cap by evicting the
+least recently used entries (by mtime, refreshed on every hit).
+
+The cache is enabled by --cache-dir on the reorder scripts or the
+REORDER_CACHE_DIR environment variable; REORDER_CACHE_MAX_MB sets the cap.
+
+Usage:
+    from order_cache import open_order_cache
+    cache = open_order_cache(cache_dir)      # None when caching is disabled
+    order = cache.load(aig, "std:mincut")
+    cache.store(aig, "std:mincut", order)
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from cache_util import TMP_PREFIX, evict_lru, max_bytes_from_env
+
+# 算法实现变化导致顺序不同时递增，使旧缓存失效
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+CACHE_SUFFIX = '.order.npy'
+
+
+class OrderCache:
+    """按 (AIG结构哈希, 算法名) 存储输入排列的目录缓存"""
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, aig, method):
+        method_tag = ''.join(c if c.isalnum() else '-' for c in method)
+        name = f"v{CACHE_VERSION}-{method_tag}-{aig.structural_hash()}{CACHE_SUFFIX}"
+        return os.path.join(self.cache_dir, name)
+
+    def load(self, aig, method):
+        """命中时返回排列 (list)，否则返回 None"""
+        path = self._path(aig, method)
+        try:
+            order = np.load(path, allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+
+        # 损坏或不匹配的条目按未命中处理
+        if order.ndim != 1 or len(order) != aig.I or \
+                not np.array_equal(np.sort(order), np.arange(aig.I)):
+            return None
+
+        # 刷新mtime作为LRU访问时间
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return order.tolist()
+
+    def store(self, aig, method, order):
+        """原子写入排列，然后按容量上限淘汰最久未用的条目"""
+        path = self._path(aig, method)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=TMP_PREFIX, suffix=CACHE_SUFFIX)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, np.asarray(order, dtype=np.int32), allow_pickle=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def evict(self):
+        """总大小超过上限时，按mtime从旧到新删除条目"""
+        evict_lru(self.cache_dir, self.max_bytes, suffix=CACHE_SUFFIX)
+
+
+def open_order_cache(cache_dir=None):
+    """按参数或环境变量打开缓存，未配置时返回 None"""
+    cache_dir = cache_dir or os.environ.get('REORDER_CACHE_DIR')
+    if not cache_dir:
+        return None
+    max_bytes = max_bytes_from_env('REORDER_CACHE_MAX_MB', DEFAULT_MAX_BYTES)
+    try:
+        return OrderCache(cache_dir, max_bytes)
+    except OSError as e:
+        print(f"警告: 排序缓存不可用 ({e})")
+        return None
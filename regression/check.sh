@@ -0,0 +1,32 @@
+#!/bin/bash
+# Regression cases for corner cases of the pipeline, checked with evalcns under both
+# JSON frontends (json2aig and json2verilog + yosys).
+#   0.json: single-bit constraints, each split's output is a bare (negated) input literal
+#
+# Usage: ./regression/check.sh [num_samples]   (run from the repository root)
+
+solution_num="${1:-100}"
+failed=0
+
+for cnstr_file in regression/*.json; do
+    case_id=$(basename "$cnstr_file" .json)
+    for frontend in verilog aig; do
+        run_dir="_run/regression/$case_id/$frontend"
+        rm -rf "$run_dir"
+        mkdir -p "$run_dir"
+        if ! JSON_FRONTEND=$frontend ./run.sh "$cnstr_file" "$solution_num" "$run_dir" 1 > "$run_dir/run.log" 2>&1; then
+            echo "✘ $cnstr_file ($frontend): run.sh 失败，详情请查看: $run_dir/run.log"
+            failed=1
+            continue
+        fi
+        valid=($(./evalcns -p "$cnstr_file" -a "$run_dir/result.json" 2> /dev/null | awk -f parse_evalcns.awk))
+        if [ "${valid[0]}" != "$solution_num" ] || [ "${valid[1]:0:3}" != "100" ]; then
+            echo "✘ $cnstr_file ($frontend): 解不合法 (合法解 ${valid[0]}/$solution_num)"
+            failed=1
+        else
+            echo "✔ $cnstr_file ($frontend)"
+        fi
+    done
+done
+
+exit $failed
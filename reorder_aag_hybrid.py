@@ -10,131 +10,44 @@ Specialized BDD variable ordering algorithms proven effective in practice:
 
 Usage:
     python3 reorder_aag_bdd_specialized.py input.aag output_reordered.aag [--method sift|window|interleave|quant]
+    python3 reorder_aag_bdd_specialized.py --batch split_aags/ reordered_aags/ [--jobs N] [--log-dir DIR] [--method ...]
+    python3 reorder_aag_bdd_specialized.py input.aag reordered.order [--candidates interleave,window]
 """
 
 import sys
 import time
+import shutil
 import argparse
 from collections import defaultdict, deque
 import random
 
-def parse_aag(path):
-    with open(path, 'r') as f:
-        lines = [line.rstrip('\n') for line in f]
+import numpy as np
 
-    if not lines or not lines[0].startswith('aag '):
-        raise ValueError("Not a valid AAG file (missing 'aag ' header).")
+from aig import ORDER_SUFFIX, parse_aiger, csr_gather, write_order_file
+from order_cache import open_order_cache
+from reorder_batch import run_batch
 
-    parts = lines[0].split()
-    if len(parts) < 6:
-        raise ValueError("Invalid AAG header.")
-    _, M, I, L, O, A = parts[:6]
-    M, I, L, O, A = map(int, (M, I, L, O, A))
+METHODS = ['sift', 'window', 'interleave', 'quant']
 
-    idx = 1
-    in_lits = lines[idx: idx + I]
-    idx += I
-
-    latch_lines = lines[idx: idx + L]
-    idx += L
-
-    output_lines = lines[idx: idx + O]
-    idx += O
-
-    and_lines = lines[idx: idx + A]
-    idx += A
-
-    symbol_lines = []
-    while idx < len(lines) and not lines[idx].startswith('c'):
-        symbol_lines.append(lines[idx])
-        idx += 1
-
-    comment_lines = lines[idx:] if idx < len(lines) else []
-
-    return {
-        'M': M, 'I': I, 'L': L, 'O': O, 'A': A,
-        'in_lits': in_lits,
-        'latch_lines': latch_lines,
-        'output_lines': output_lines,
-        'and_lines': and_lines,
-        'symbol_lines': symbol_lines,
-        'comment_lines': comment_lines
-    }
+# SIFT代价模型最多保留的 (锥, 变量) 条目数
+SIFT_MAX_CONE_ENTRIES = 2_000_000
 
 class BDDSpecializedAnalyzer:
     """BDD专用分析器"""
     
-    def __init__(self, parsed_aag):
-        self.parsed_aag = parsed_aag
-        self.n_vars = parsed_aag['I']
-        self.lit_to_idx = self._build_literal_map()
+    def __init__(self, aig):
+        self.aig = aig
+        self.n_vars = aig.I
+        self.support_index = aig.support_index()
+        self.interaction = aig.interaction_matrix()
         self.support_matrix = self._build_support_matrix()
         self.var_info = self._extract_bdd_specific_info()
-        
-    def _build_literal_map(self):
-        """构建literal映射"""
-        lit_map = {}
-        for i, lit_str in enumerate(self.parsed_aag['in_lits']):
-            try:
-                val = int(lit_str)
-                if val % 2 != 0:
-                    val -= 1
-                lit_map[val] = i
-            except ValueError:
-                continue
-        return lit_map
     
     def _build_support_matrix(self):
         """构建支撑矩阵 - BDD宽度估算的关键"""
-        # support_matrix[i][j] = 函数i是否依赖变量j
-        num_outputs = len(self.parsed_aag['output_lines'])
-        support_matrix = [[False for _ in range(self.n_vars)] for _ in range(num_outputs)]
-        
-        # 为每个输出构建支撑集
-        for out_idx, out_line in enumerate(self.parsed_aag['output_lines']):
-            try:
-                out_lit = int(out_line)
-                if out_lit % 2 != 0:
-                    out_lit -= 1
-                support_vars = self._get_support_recursive(out_lit, set())
-                
-                for var_idx in support_vars:
-                    if 0 <= var_idx < self.n_vars:
-                        support_matrix[out_idx][var_idx] = True
-            except ValueError:
-                continue
-        
-        return support_matrix
-    
-    def _get_support_recursive(self, lit, visited):
-        """递归获取literal的支撑变量集"""
-        if lit in visited:
-            return set()
-        visited.add(lit)
-        
-        if lit % 2 != 0:
-            lit -= 1
-        
-        # 如果是输入变量
-        if lit in self.lit_to_idx:
-            return {self.lit_to_idx[lit]}
-        
-        # 如果是AND门输出
-        support = set()
-        for and_line in self.parsed_aag['and_lines']:
-            parts = and_line.split()
-            if len(parts) == 3:
-                try:
-                    out_lit = int(parts[0])
-                    if out_lit == lit:
-                        in1, in2 = int(parts[1]), int(parts[2])
-                        support.update(self._get_support_recursive(in1, visited))
-                        support.update(self._get_support_recursive(in2, visited))
-                        break
-                except ValueError:
-                    continue
-        
-        return support
+        # support_matrix[i][j] = 函数i是否依赖变量j，直接由支撑集索引得到
+        output_bits = self.support_index.of_literals(self.aig.outputs)
+        return self.support_index.to_bool(output_bits)
     
     def _extract_bdd_specific_info(self):
         """提取BDD专用信息"""
@@ -154,10 +67,9 @@ class BDDSpecializedAnalyzer:
             }
         
         # 计算支撑计数
+        support_count = self.support_matrix.sum(axis=0).tolist()
         for var_idx in range(self.n_vars):
-            for out_idx in range(len(self.support_matrix)):
-                if self.support_matrix[out_idx][var_idx]:
-                    var_info[var_idx]['support_count'] += 1
+            var_info[var_idx]['support_count'] = support_count[var_idx]
         
         # 计算变量交互
         self._calculate_variable_interactions(var_info)
@@ -172,62 +84,23 @@ class BDDSpecializedAnalyzer:
     
     def _calculate_variable_interactions(self, var_info):
         """计算变量间交互"""
-        interaction_matrix = [[0 for _ in range(self.n_vars)] for _ in range(self.n_vars)]
-        
-        # 在同一AND门中的变量有交互
-        for and_line in self.parsed_aag['and_lines']:
-            parts = and_line.split()
-            if len(parts) == 3:
-                try:
-                    in1, in2 = int(parts[1]), int(parts[2])
-                    
-                    var1 = var2 = None
-                    if in1 % 2 != 0: in1 -= 1
-                    if in2 % 2 != 0: in2 -= 1
-                    
-                    if in1 in self.lit_to_idx: var1 = self.lit_to_idx[in1]
-                    if in2 in self.lit_to_idx: var2 = self.lit_to_idx[in2]
-                    
-                    if var1 is not None and var2 is not None:
-                        interaction_matrix[var1][var2] += 1
-                        interaction_matrix[var2][var1] += 1
-                        
-                except ValueError:
-                    continue
+        # 在同一AND门中的变量有交互: 直接交互矩阵的行和
+        interaction_count = self.interaction.row_sums().tolist()
         
         # 更新交互计数
         for i in range(self.n_vars):
-            var_info[i]['interaction_count'] = sum(interaction_matrix[i])
+            var_info[i]['interaction_count'] = interaction_count[i]
     
     def _extract_datapath_structure(self, var_info):
         """提取数据路径结构"""
         var_groups = defaultdict(list)
         
-        for sym_line in self.parsed_aag['symbol_lines']:
-            if sym_line.startswith('i'):
-                parts = sym_line.split(None, 1)
-                if len(parts) == 2:
-                    try:
-                        input_idx = int(parts[0][1:])
-                        name_part = parts[1]
-                        
-                        if '[' in name_part and ']' in name_part:
-                            var_name = name_part[:name_part.find('[')]
-                            bit_str = name_part[name_part.find('[')+1:name_part.find(']')]
-                            try:
-                                bit_pos = int(bit_str)
-                            except ValueError:
-                                bit_pos = 0
-                        else:
-                            var_name = name_part
-                            bit_pos = 0
-                        
-                        if input_idx < self.n_vars:
-                            var_info[input_idx]['var_name'] = var_name
-                            var_info[input_idx]['bit_position'] = bit_pos
-                            var_groups[var_name].append((bit_pos, input_idx))
-                    except ValueError:
-                        continue
+        for input_idx, (var_name, bit_pos) in enumerate(self.aig.datapath_symbols()):
+            if var_name is None:
+                continue
+            var_info[input_idx]['var_name'] = var_name
+            var_info[input_idx]['bit_position'] = bit_pos
+            var_groups[var_name].append((bit_pos, input_idx))
         
         # 设置位宽和对称组
         for var_name, bit_list in var_groups.items():
@@ -250,6 +123,192 @@ class BDDSpecializedAnalyzer:
             # 综合得分
             var_info[i]['early_quant_priority'] = support_score * 0.6 + interaction_score * 0.4
 
+class SiftCostModel:
+    """SIFT增量代价模型
+
+    以AIG中所有门的不同支撑集("锥")近似BDD各层的活跃变量: 锥在其首个变量
+    与最后一个变量之间的每一层都处于活跃状态。代价为各层活跃锥的加权和，
+    即 sum(w_c * (max_pos_c - min_pos_c))。
+
+    维护每个锥的最小/最大位置 (即逐层活跃轮廓)，因此:
+        swap(level)      交换相邻两层，O(两个变量所在锥数) 更新代价
+        sift_costs(var)  把变量依次交换到每个位置的代价，整体一次算出
+        move(var, pos)   移动变量，O(锥数) 更新轮廓
+    """
+
+    def __init__(self, analyzer, order):
+        self.n_vars = analyzer.n_vars
+        self._build_cones(analyzer)
+
+        self.order = list(order)
+        self.pos = np.empty(self.n_vars, dtype=np.int64)
+        self.pos[self.order] = np.arange(self.n_vars)
+        self.cone_min, self.cone_max = self._cone_bounds(np.arange(len(self.weight)))
+        self._last_sift = None
+        self.cost = int((self.weight * (self.cone_max - self.cone_min)).sum())
+
+    def _build_cones(self, analyzer):
+        """从支撑集索引提取去重后的锥，并建立锥<->变量的CSR索引"""
+        aig = analyzer.aig
+        support_index = analyzer.support_index
+        rows, counts = np.unique(support_index.bits[aig.lhs >> 1], axis=0, return_counts=True)
+        sizes = support_index.support_sizes(rows)
+
+        # 单变量锥和包含全部变量的锥跨度与顺序无关，丢弃
+        keep = (sizes >= 2) & (sizes < self.n_vars)
+        rows, counts, sizes = rows[keep], counts[keep], sizes[keep]
+
+        # 小锥最能体现局部结构，超出预算时优先保留
+        by_size = np.argsort(sizes, kind='stable')
+        budget = np.cumsum(sizes[by_size]) <= SIFT_MAX_CONE_ENTRIES
+        selected = np.sort(by_size[budget])
+        rows, counts = rows[selected], counts[selected]
+
+        cone_of_entry, var_of_entry = np.nonzero(support_index.to_bool(rows))
+        self.weight = counts.astype(np.int64)
+        self.cone_ptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cone_of_entry, minlength=len(rows)), out=self.cone_ptr[1:])
+        self.cone_vars = var_of_entry
+
+        by_var = np.argsort(var_of_entry, kind='stable')
+        self.var_ptr = np.zeros(self.n_vars + 1, dtype=np.int64)
+        np.cumsum(np.bincount(var_of_entry, minlength=self.n_vars), out=self.var_ptr[1:])
+        self.var_cones = cone_of_entry[by_var]
+        self._cone_mark = np.zeros(len(rows), dtype=bool)
+
+    def cones_of(self, var):
+        return self.var_cones[self.var_ptr[var]:self.var_ptr[var + 1]]
+
+    def _cone_bounds(self, cones, exclude=None):
+        """重新计算若干锥的最小/最大位置，可排除一个变量"""
+        if len(cones) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        entries = csr_gather(self.cone_ptr, cones)
+        members = self.cone_vars[entries]
+        positions = self.pos[members]
+        lengths = self.cone_ptr[cones + 1] - self.cone_ptr[cones]
+        if exclude is not None:
+            keep = members != exclude
+            positions = positions[keep]
+            lengths = lengths - np.add.reduceat((~keep).astype(np.int64), np.cumsum(lengths) - lengths)
+        starts = np.cumsum(lengths) - lengths
+        return np.minimum.reduceat(positions, starts), np.maximum.reduceat(positions, starts)
+
+    def profile(self):
+        """每个层间边界上活跃锥的加权数 (长度 n-1)"""
+        n = self.n_vars
+        width = (np.bincount(self.cone_min, weights=self.weight, minlength=n) -
+                 np.bincount(self.cone_max, weights=self.weight, minlength=n))
+        return np.rint(np.cumsum(width)[:-1]).astype(np.int64)
+
+    def swap(self, level):
+        """交换 level 与 level+1 上的变量，返回代价变化"""
+        a, b = self.order[level], self.order[level + 1]
+        cones_a, cones_b = self.cones_of(a), self.cones_of(b)
+
+        # 同时包含a和b的锥跨度不变
+        self._cone_mark[cones_b] = True
+        only_a = cones_a[~self._cone_mark[cones_a]]
+        self._cone_mark[cones_b] = False
+        self._cone_mark[cones_a] = True
+        only_b = cones_b[~self._cone_mark[cones_b]]
+        self._cone_mark[cones_a] = False
+
+        # a下移一层: 以a结尾的锥变长，以a开头的锥变短
+        a_last = only_a[self.cone_max[only_a] == level]
+        a_first = only_a[self.cone_min[only_a] == level]
+        # b上移一层: 以b开头的锥变长，以b结尾的锥变短
+        b_first = only_b[self.cone_min[only_b] == level + 1]
+        b_last = only_b[self.cone_max[only_b] == level + 1]
+
+        self.cone_max[a_last] = level + 1
+        self.cone_min[a_first] = level + 1
+        self.cone_min[b_first] = level
+        self.cone_max[b_last] = level
+        delta = int(self.weight[a_last].sum() - self.weight[a_first].sum() +
+                    self.weight[b_first].sum() - self.weight[b_last].sum())
+
+        self.order[level], self.order[level + 1] = b, a
+        self.pos[a], self.pos[b] = level + 1, level
+        self.cost += delta
+        self._last_sift = None
+        return delta
+
+    def _other_bounds(self, var, own):
+        """var所在锥中除var外其余变量的边界 (去掉var后的压缩位置)"""
+        cur = self.pos[var]
+        lo = self.cone_min[own].copy()
+        hi = self.cone_max[own].copy()
+        # 只有var恰好位于锥端点时才需要重新扫描锥成员
+        extreme = (lo == cur) | (hi == cur)
+        if extreme.any():
+            lo[extreme], hi[extreme] = self._cone_bounds(own[extreme], exclude=var)
+        return lo - (lo > cur), hi - (hi > cur)
+
+    def sift_costs(self, var):
+        """变量var移动到每个位置 p (0..n-1) 后的总代价"""
+        n = self.n_vars
+        cur = self.pos[var]
+        own = self.cones_of(var)
+
+        # 去掉var后其余变量的压缩位置上的锥边界
+        lo = self.cone_min - (self.cone_min > cur)
+        hi = self.cone_max - (self.cone_max > cur)
+        w = self.weight.astype(np.float64)
+
+        # 不含var的锥: var插入到锥内部 (lo < p <= hi) 时跨度加1
+        other_w = w.copy()
+        other_w[own] = 0.0
+        base = float((other_w * (hi - lo)).sum())
+        inside = np.cumsum(np.bincount(lo + 1, weights=other_w, minlength=n + 1) -
+                           np.bincount(hi + 1, weights=other_w, minlength=n + 1))[:n]
+
+        # 含var的锥: 跨度关于p分段线性
+        #   p <= lo: hi + 1 - p;  lo < p <= hi: hi + 1 - lo;  p > hi: p - lo
+        const = np.zeros(n + 1)
+        slope = np.zeros(n + 1)
+        own_lo, own_hi = self._other_bounds(var, own)
+        self._last_sift = (var, own_lo, own_hi)
+        if len(own):
+            own_w = w[own]
+            np.add.at(const, 0, float((own_w * (own_hi + 1)).sum()))
+            np.add.at(const, own_lo + 1, -own_w * own_lo)
+            np.add.at(const, own_hi + 1, -own_w * (own_hi + 1))
+            np.add.at(slope, 0, -float(own_w.sum()))
+            np.add.at(slope, own_lo + 1, own_w)
+            np.add.at(slope, own_hi + 1, own_w)
+        const = np.cumsum(const)[:n]
+        slope = np.cumsum(slope)[:n]
+
+        costs = base + inside + const + slope * np.arange(n)
+        return np.rint(costs).astype(np.int64)
+
+    def move(self, var, target):
+        """把变量移动到目标位置，更新顺序与锥边界"""
+        cur = int(self.pos[var])
+        if target == cur:
+            return
+        own = self.cones_of(var)
+        if self._last_sift is not None and self._last_sift[0] == var:
+            own_lo, own_hi = self._last_sift[1:]
+        else:
+            own_lo, own_hi = self._other_bounds(var, own)
+        self._last_sift = None
+
+        self.order.pop(cur)
+        self.order.insert(target, var)
+        lo, hi = min(cur, target), max(cur, target)
+        self.pos[self.order[lo:hi + 1]] = np.arange(lo, hi + 1)
+
+        # 先去掉var压缩位置，再在target处插入
+        self.cone_min -= self.cone_min > cur
+        self.cone_max -= self.cone_max > cur
+        self.cone_min += self.cone_min >= target
+        self.cone_max += self.cone_max >= target
+        self.cone_min[own] = np.minimum(own_lo + (own_lo >= target), target)
+        self.cone_max[own] = np.maximum(own_hi + (own_hi >= target), target)
+        self.cost = int((self.weight * (self.cone_max - self.cone_min)).sum())
+
 class BDDSpecializedAlgorithms:
     """BDD专用算法实现"""
     
@@ -258,6 +317,7 @@ class BDDSpecializedAlgorithms:
         self.var_info = analyzer.var_info
         self.n_vars = analyzer.n_vars
         self.support_matrix = analyzer.support_matrix
+        self.interaction = analyzer.interaction
     
     def sift_based_order(self):
         """基于SIFT算法的启发式排序"""
@@ -274,7 +334,11 @@ class BDDSpecializedAlgorithms:
             x
         ))
         
-        # SIFT-style局部优化
+        # SIFT优化: 每个变量在整个范围内寻找代价最小的位置
+        model = SiftCostModel(self.analyzer, order)
+        sift_sequence = sorted(range(self.n_vars), key=lambda x: (-len(model.cones_of(x)), x))
+        initial_cost = model.cost
+        
         improved = True
         iterations = 0
         max_iterations = min(20, self.n_vars)
@@ -283,32 +347,22 @@ class BDDSpecializedAlgorithms:
             improved = False
             iterations += 1
             
-            # 对每个变量尝试"sift"到更好位置
-            for i in range(self.n_vars):
-                var = order[i]
-                best_pos = i
-                best_cost = self._estimate_bdd_width(order, i, i)
-                
-                # 尝试向前移动
-                for new_pos in range(max(0, i-3), i):
-                    cost = self._estimate_bdd_width(order, i, new_pos)
-                    if cost < best_cost:
-                        best_cost = cost
-                        best_pos = new_pos
-                
-                # 尝试向后移动
-                for new_pos in range(i+1, min(self.n_vars, i+4)):
-                    cost = self._estimate_bdd_width(order, i, new_pos)
-                    if cost < best_cost:
-                        best_cost = cost
-                        best_pos = new_pos
-                
-                # 如果找到更好位置，执行移动
-                if best_pos != i:
-                    var = order.pop(i)
-                    order.insert(best_pos, var)
+            for var in sift_sequence:
+                costs = model.sift_costs(var)
+                best_pos = int(np.argmin(costs))
+                if costs[best_pos] < costs[model.pos[var]]:
+                    model.move(var, best_pos)
+                    improved = True
+            
+            # 相邻交换收敛
+            for level in range(self.n_vars - 1):
+                if model.swap(level) >= 0:
+                    model.swap(level)
+                else:
                     improved = True
         
+        order = model.order
+        print(f"SIFT代价: {initial_cost} -> {model.cost}")
         print(f"SIFT优化完成，迭代次数: {iterations}")
         return order
     
@@ -359,23 +413,25 @@ class BDDSpecializedAlgorithms:
         for var_name in var_groups:
             var_groups[var_name].sort()
         
-        # 交错策略：按重要性排序变量组
+        # 交错策略：按重要性排序变量组，重要性相同时传递交互强的组优先
+        transitive_sums = self.interaction.row_sums(self.interaction.transitive)
         group_importance = []
         for var_name, bit_list in var_groups.items():
             total_support = sum(self.var_info[var_idx]['support_count'] for _, var_idx in bit_list)
             avg_bitwidth = sum(self.var_info[var_idx]['bitwidth'] for _, var_idx in bit_list) / len(bit_list)
             importance = total_support * avg_bitwidth
-            group_importance.append((importance, var_name, bit_list))
+            interaction = int(sum(transitive_sums[var_idx] for _, var_idx in bit_list))
+            group_importance.append((importance, interaction, var_name, bit_list))
         
         group_importance.sort(reverse=True)
         
         # 交错放置：重要变量的高位优先
         order = []
-        max_bits = max(len(bit_list) for _, _, bit_list in group_importance) if group_importance else 0
+        max_bits = max(len(bit_list) for _, _, _, bit_list in group_importance) if group_importance else 0
         
         # 从高位到低位交错放置
         for bit_level in range(max_bits-1, -1, -1):
-            for _, var_name, bit_list in group_importance:
+            for _, _, var_name, bit_list in group_importance:
                 if bit_level < len(bit_list):
                     _, var_idx = bit_list[bit_level]
                     order.append(var_idx)
@@ -400,34 +456,6 @@ class BDDSpecializedAlgorithms:
         
         return order
     
-    def _estimate_bdd_width(self, order, old_pos, new_pos):
-        """估算BDD宽度（简化版）"""
-        # 创建临时排序
-        temp_order = order.copy()
-        var = temp_order.pop(old_pos)
-        temp_order.insert(new_pos, var)
-        
-        # 估算宽度：计算在每个层级上活跃的变量数
-        total_width = 0
-        num_outputs = len(self.support_matrix)
-        
-        for level in range(len(temp_order)):
-            active_vars = set()
-            current_var = temp_order[level]
-            
-            # 对每个输出，检查当前变量是否在其支撑中
-            for out_idx in range(num_outputs):
-                if self.support_matrix[out_idx][current_var]:
-                    # 如果是，添加该输出支撑的所有后续变量
-                    for future_level in range(level, len(temp_order)):
-                        future_var = temp_order[future_level]
-                        if self.support_matrix[out_idx][future_var]:
-                            active_vars.add(future_var)
-            
-            total_width += len(active_vars)
-        
-        return total_width
-    
     def _find_best_window_permutation(self, window_vars):
         """找到窗口内的最佳排列"""
         if len(window_vars) <= 1:
@@ -435,19 +463,23 @@ class BDDSpecializedAlgorithms:
         
         import itertools
         
+        # 窗口内变量两两的交互强度一次查表得到
+        interaction = self.interaction.submatrix(window_vars).tolist()
+        local = {var: k for k, var in enumerate(window_vars)}
+        
         best_perm = window_vars
         best_cost = float('inf')
         
         # 尝试所有排列（只对小窗口）
         for perm in itertools.permutations(window_vars):
-            cost = self._evaluate_window_cost(list(perm))
+            cost = self._evaluate_window_cost(list(perm), interaction, local)
             if cost < best_cost:
                 best_cost = cost
                 best_perm = list(perm)
         
         return best_perm
     
-    def _evaluate_window_cost(self, window_order):
+    def _evaluate_window_cost(self, window_order, interaction, local):
         """评估窗口排序的成本"""
         cost = 0
         
@@ -460,43 +492,16 @@ class BDDSpecializedAlgorithms:
                 cost -= 2
             
             # 如果两个变量有交互，且位置接近，成本较低
-            interaction = self._get_variable_interaction(var1, var2)
-            cost += interaction * (abs(self.var_info[var1]['bit_position'] - 
-                                     self.var_info[var2]['bit_position']) + 1)
+            cost += interaction[local[var1]][local[var2]] * (abs(self.var_info[var1]['bit_position'] - 
+                                                                 self.var_info[var2]['bit_position']) + 1)
         
         return cost
-    
-    def _get_variable_interaction(self, var1, var2):
-        """获取两个变量的交互强度"""
-        interaction = 0
-        
-        # 检查是否在同一个AND门中出现
-        for and_line in self.analyzer.parsed_aag['and_lines']:
-            parts = and_line.split()
-            if len(parts) == 3:
-                try:
-                    in1, in2 = int(parts[1]), int(parts[2])
-                    
-                    v1 = v2 = None
-                    if in1 % 2 != 0: in1 -= 1
-                    if in2 % 2 != 0: in2 -= 1
-                    
-                    if in1 in self.analyzer.lit_to_idx: v1 = self.analyzer.lit_to_idx[in1]
-                    if in2 in self.analyzer.lit_to_idx: v2 = self.analyzer.lit_to_idx[in2]
-                    
-                    if (v1 == var1 and v2 == var2) or (v1 == var2 and v2 == var1):
-                        interaction += 1
-                        
-                except ValueError:
-                    continue
-        
-        return interaction
-
-def bdd_specialized_reorder(parsed_aag, method='sift'):
+
+def bdd_specialized_reorder(aig, method='sift'):
     """BDD专用重排序主函数"""
     start_time = time.time()
     
-    analyzer = BDDSpecializedAnalyzer(parsed_aag)
+    analyzer = BDDSpecializedAnalyzer(aig)
     algorithms = BDDSpecializedAlgorithms(analyzer)
     
     if method == 'sift':
@@ -516,92 +521,110 @@ def bdd_specialized_reorder(parsed_aag, method='sift'):
     
     return order
 
-def reorder_aag(parsed, order, output_path):
+def reorder_aag(aig, order, output_path):
     """重新排序AAG文件"""
-    M, I, L, O, A = parsed['M'], parsed['I'], parsed['L'], parsed['O'], parsed['A']
-    in_lits = parsed['in_lits']
-    latch_lines = parsed['latch_lines']
-    output_lines = parsed['output_lines']
-    and_lines = parsed['and_lines']
-    symbol_lines = parsed['symbol_lines']
-    comment_lines = parsed['comment_lines']
-
-    if not order or len(order) != I:
+    if not order or len(order) != aig.I:
         print("Warning: Invalid order, using default order.")
-        order = list(range(I))
-
-    old2new = {old: new for new, old in enumerate(order)}
-    new_in_lits = [in_lits[old] for old in order]
-
-    new_symbol_lines = []
-    for sym in symbol_lines:
-        if sym.startswith('i'):
-            parts = sym.split(None, 1)
-            if len(parts) == 2:
-                try:
-                    old_i = int(parts[0][1:])
-                    name = parts[1]
-                    new_i = old2new.get(old_i, None)
-                    if new_i is not None:
-                        new_symbol_lines.append(f"i{new_i} {name}")
-                    else:
-                        new_symbol_lines.append(sym)
-                except ValueError:
-                    new_symbol_lines.append(sym)
-            else:
-                new_symbol_lines.append(sym)
-        else:
-            new_symbol_lines.append(sym)
-
-    with open(output_path, 'w') as f:
-        f.write(f"aag {M} {I} {L} {O} {A}\n")
-        for lit in new_in_lits:
-            f.write(lit + "\n")
-        for line in latch_lines:
-            f.write(line + "\n")
-        for line in output_lines:
-            f.write(line + "\n")
-        for line in and_lines:
-            f.write(line + "\n")
-        for sym in new_symbol_lines:
-            f.write(sym + "\n")
-        for line in comment_lines:
-            f.write(line + "\n")
+        order = list(range(aig.I))
+
+    aig.write_aiger(output_path, order)
 
     print(f"BDD专用排序AAG文件已保存到: {output_path}")
 
+def compute_order(aig, method, cache=None):
+    """计算单个方法的排序，优先复用排序缓存"""
+    cache_key = f"hybrid:{method}"
+    order = cache.load(aig, cache_key) if cache else None
+    if order is not None:
+        print(f"命中排序缓存 ({cache_key})，跳过分析")
+        return order
+
+    order = bdd_specialized_reorder(aig, method)
+    if not order:
+        print("BDD专用排序失败，使用默认排序。")
+        return list(range(aig.I))
+    if cache:
+        cache.store(aig, cache_key, order)
+    return order
+
+def reorder_file(input_path, output_path, method='sift', aig=None, cache_dir=None, candidates=()):
+    """重排单个AAG文件 (批量模式的每个文件也走这里)
+
+    output_path 以 .order 结尾时只写出排列文件，并附带 candidates 中各方法的候选顺序
+    """
+    if aig is None:
+        aig = parse_aiger(input_path)
+    order_only = output_path.endswith(ORDER_SUFFIX)
+    
+    I = aig.I
+    if I == 0:
+        print("没有输入变量需要重排序，直接复制文件。")
+        if order_only:
+            write_order_file(output_path, [(f"hybrid:{method}", [])])
+        else:
+            shutil.copy(input_path, output_path)
+        return
+    
+    # 相同结构的AIG直接复用缓存的排序，跳过分析
+    cache = open_order_cache(cache_dir)
+    order = compute_order(aig, method, cache)
+    
+    if not order_only:
+        reorder_aag(aig, order, output_path)
+        return
+
+    orders = [(f"hybrid:{method}", order)]
+    for candidate in candidates:
+        if candidate != method:
+            orders.append((f"hybrid:{candidate}", compute_order(aig, candidate, cache)))
+    write_order_file(output_path, orders)
+    print(f"排列文件已保存到: {output_path} (候选顺序 {len(orders)} 个)")
+
 def main():
     parser = argparse.ArgumentParser(description='BDD专用变量排序算法')
-    parser.add_argument('input_file', help='输入AAG文件')
-    parser.add_argument('output_file', help='输出AAG文件')
+    parser.add_argument('input_file', help='输入AIGER文件 (aag或aig，按文件头识别)')
+    parser.add_argument('output_file', help='输出AIGER文件 (扩展名为 .aig 时写二进制格式)')
     parser.add_argument('--method', 
-                       choices=['sift', 'window', 'interleave', 'quant'],
+                       choices=METHODS,
                        default='sift',
                        help='BDD专用算法 (默认: sift)')
     
+    parser.add_argument('--batch', action='store_true',
+                       help='批量模式: input_file/output_file 分别为 split_aags/ 与 reordered_aags/ 目录')
+    parser.add_argument('--jobs', type=int, default=1,
+                       help='批量模式的进程数 (0 表示使用全部可用核，默认: 1)')
+    parser.add_argument('--log-dir', help='批量模式下每个文件的日志目录')
+    parser.add_argument('--cache-dir',
+                       help='排序缓存目录 (默认取环境变量 REORDER_CACHE_DIR，未设置则不缓存)')
+    parser.add_argument('--order-only', action='store_true',
+                       help='批量模式下只写出排列文件 reordered_N.order，不重写AIG')
+    parser.add_argument('--candidates', default='',
+                       help='写排列文件时附加的候选方法，逗号分隔 (如 interleave,window)')
+    
     args = parser.parse_args()
+    candidates = [m for m in args.candidates.split(',') if m]
+    for candidate in candidates:
+        if candidate not in METHODS:
+            parser.error(f"未知候选方法: {candidate}")
+    
+    if args.batch:
+        try:
+            run_batch(reorder_file, args.input_file, args.output_file,
+                      jobs=args.jobs, log_dir=args.log_dir, order_only=args.order_only,
+                      method=args.method, cache_dir=args.cache_dir, candidates=candidates)
+        except OSError as e:
+            print(f"批量重排错误: {e}")
+            sys.exit(1)
+        return
     
     try:
-        parsed = parse_aag(args.input_file)
+        aig = parse_aiger(args.input_file)
     except Exception as e:
         print(f"解析AAG文件错误: {e}")
         sys.exit(1)
     
-    I = parsed['I']
-    if I == 0:
-        print("没有输入变量需要重排序，直接复制文件。")
-        import shutil
-        shutil.copy(args.input_file, args.output_file)
-        sys.exit(0)
-    
-    # 使用BDD专用算法
-    order = bdd_specialized_reorder(parsed, args.method)
-    
-    if not order:
-        print("BDD专用排序失败，使用默认排序。")
-        order = list(range(I))
-    
-    reorder_aag(parsed, order, args.output_file)
+    reorder_file(args.input_file, args.output_file, args.method, aig=aig, cache_dir=args.cache_dir,
+                 candidates=candidates)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
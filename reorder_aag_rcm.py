@@ -7,140 +7,107 @@ a manual implementation of Reverse Cuthill-McKee (RCM) based on input correlatio
 
 Usage:
     python3 reorder_aag_rcm_manual.py input.aag output_reordered.aag
+    python3 reorder_aag_rcm_manual.py --batch split_aags/ reordered_aags/ [--jobs N] [--log-dir DIR]
+    python3 reorder_aag_rcm_manual.py input.aag reordered.order   (permutation only)
 
 Dependencies:
-    - networkx (for graph construction only, RCM is implemented manually)
+    - numpy (array-backed AIG and CSR input-cone graph, see aig.py)
 """
 
 import sys
-import networkx as nx
+import argparse
 from collections import deque
 
-def parse_aag(path):
-    with open(path, 'r') as f:
-        lines = [line.rstrip('\n') for line in f]
+import numpy as np
 
-    if not lines or not lines[0].startswith('aag '):
-        raise ValueError("Not a valid AAG file (missing 'aag ' header).")
+from aig import ORDER_SUFFIX, parse_aiger, write_order_file
+from order_cache import open_order_cache
+from reorder_batch import run_batch
 
-    parts = lines[0].split()
-    if len(parts) < 6:
-        raise ValueError("Invalid AAG header.")
-    _, M, I, L, O, A = parts[:6]
-    M, I, L, O, A = map(int, (M, I, L, O, A))
+# 展开锥支撑位图时每块处理的锥数
+CONE_CHUNK_ROWS = 4096
 
-    idx = 1
-    in_lits = lines[idx: idx + I]
-    idx += I
-
-    latch_lines = lines[idx: idx + L]
-    idx += L
-
-    output_lines = lines[idx: idx + O]
-    idx += O
-
-    and_lines = lines[idx: idx + A]
-    idx += A
-
-    symbol_lines = []
-    while idx < len(lines) and not lines[idx].startswith('c'):
-        symbol_lines.append(lines[idx])
-        idx += 1
+def constraint_cones(aig):
+    """
+    Deduplicated support bitsets of the constraint cones: the conjuncts found
+    by descending from every sink AND gate (a gate feeding no other gate)
+    through non-complemented AND gates. The top-level conjunction of a
+    single-output split thus contributes one cone per constraint instead of
+    one cone holding every input.
+    """
+    support_index = aig.support_index()
+    gate_var = aig.lhs >> 1
+    fanin0 = np.full(aig.M + 1, -1, dtype=np.int64)
+    fanin1 = np.full(aig.M + 1, -1, dtype=np.int64)
+    fanin0[gate_var] = aig.rhs0
+    fanin1[gate_var] = aig.rhs1
+
+    has_fanout = np.zeros(aig.M + 1, dtype=bool)
+    has_fanout[aig.rhs0 >> 1] = True
+    has_fanout[aig.rhs1 >> 1] = True
+    sinks = gate_var[~has_fanout[gate_var]]
+
+    # 沿正相AND门向下展开合取树，叶子 (输入、反相AND门) 为约束锥
+    visited = np.zeros(aig.M + 1, dtype=bool)
+    stack = [int(v) << 1 for v in sinks]
+    leaves = []
+    while stack:
+        lit = stack.pop()
+        var = lit >> 1
+        if var == 0 or visited[var]:
+            continue
+        visited[var] = True
+        if lit & 1 == 0 and fanin0[var] >= 0:
+            stack.append(int(fanin0[var]))
+            stack.append(int(fanin1[var]))
+        else:
+            leaves.append(var)
 
-    comment_lines = lines[idx:] if idx < len(lines) else []
+    if not leaves:
+        return np.zeros((0, support_index.words), dtype=np.uint64)
+    return np.unique(support_index.bits[np.asarray(leaves)], axis=0)
 
-    return {
-        'M': M, 'I': I, 'L': L, 'O': O, 'A': A,
-        'in_lits': in_lits,
-        'latch_lines': latch_lines,
-        'output_lines': output_lines,
-        'and_lines': and_lines,
-        'symbol_lines': symbol_lines,
-        'comment_lines': comment_lines
-    }
+def build_input_association_graph(aig):
+    """
+    Build the bipartite input-cone graph as a CSR adjacency (indptr, indices).
 
-def build_literal_to_input_map(in_lits):
-    lit_to_idx = {}
-    for k, lit in enumerate(in_lits):
-        try:
-            val = int(lit)
-        except:
-            continue
-        if val % 2 != 0:
-            val -= 1
-        lit_to_idx[val] = k
-    return lit_to_idx
-
-def build_and_dict(and_lines):
-    and_dict = {}
-    for line in and_lines:
-        parts = line.split()
-        if len(parts) != 3:
-            continue
-        out_lit = int(parts[0])
-        in1 = int(parts[1])
-        in2 = int(parts[2])
-        and_dict[out_lit] = (in1, in2)
-    return and_dict
-
-def find_input_sources(lit, lit_to_idx, and_dict, cache):
-    if lit % 2 != 0:
-        lit -= 1
-    if lit in cache:
-        return cache[lit]
-    if lit in lit_to_idx:
-        idx = lit_to_idx[lit]
-        cache[lit] = {idx}
-        return cache[lit]
-    if lit in and_dict:
-        in1, in2 = and_dict[lit]
-        sources1 = find_input_sources(in1, lit_to_idx, and_dict, cache)
-        sources2 = find_input_sources(in2, lit_to_idx, and_dict, cache)
-        combined = sources1.union(sources2)
-        cache[lit] = combined
-        return combined
-    cache[lit] = set()
-    return cache[lit]
-
-def build_input_association_graph(parsed):
-    I = parsed['I']
-    in_lits = parsed['in_lits']
-    and_lines = parsed['and_lines']
-
-    G = nx.Graph()
-    G.add_nodes_from(range(I))
-
-    lit_to_idx = build_literal_to_input_map(in_lits)
-    and_dict = build_and_dict(and_lines)
-    cache = {}
-
-    for line in and_lines:
-        parts = line.split()
-        if len(parts) != 3:
-            continue
-        out_lit = int(parts[0])
-        sources = find_input_sources(out_lit, lit_to_idx, and_dict, cache)
-        src_list = list(sources)
-        n = len(src_list)
-        for i in range(n):
-            for j in range(i + 1, n):
-                u = src_list[i]
-                v = src_list[j]
-                if u != v:
-                    G.add_edge(u, v)
-    return G
-
-def manual_rcm_order(G):
+    Vertices 0..I-1 are the inputs, I..I+C-1 the constraint cones; each input
+    is connected to the cones it belongs to. Two inputs of one constraint are
+    two steps apart, and no input x input co-occurrence graph is built.
+    """
+    I = aig.I
+    support_index = aig.support_index()
+    cones = constraint_cones(aig)
+    C = len(cones)
+
+    cone_ids, input_ids = [], []
+    for start in range(0, C, CONE_CHUNK_ROWS):
+        cone, var = np.nonzero(support_index.to_bool(cones[start:start + CONE_CHUNK_ROWS]))
+        cone_ids.append(cone + start + I)
+        input_ids.append(var)
+    cone_ids = np.concatenate(cone_ids) if cone_ids else np.zeros(0, dtype=np.int64)
+    input_ids = np.concatenate(input_ids) if input_ids else np.zeros(0, dtype=np.int64)
+
+    rows = np.concatenate([input_ids, cone_ids])
+    cols = np.concatenate([cone_ids, input_ids])
+    by_row = np.argsort(rows, kind='stable')
+    indices = cols[by_row]
+    indptr = np.zeros(I + C + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=I + C), out=indptr[1:])
+    return indptr, indices
+
+def manual_rcm_order(indptr, indices):
     """
-    Manual Reverse Cuthill-McKee implementation.
+    Manual Reverse Cuthill-McKee implementation on a CSR adjacency.
     """
-    N = G.number_of_nodes()
-    degrees = dict(G.degree())
+    N = len(indptr) - 1
+    degrees = np.diff(indptr).tolist()
+    neighbor_lists = np.split(indices, indptr[1:-1]) if N else []
     visited = [False] * N
     order = []
 
     # Process all connected components
-    for start in sorted(degrees, key=lambda x: degrees[x]):
+    for start in sorted(range(N), key=lambda x: degrees[x]):
         if visited[start]:
             continue
         # BFS queue ordered by degree
@@ -149,7 +116,7 @@ def manual_rcm_order(G):
         component_order = [start]
         while queue:
             u = queue.popleft()
-            neighbors = [v for v in G.neighbors(u) if not visited[v]]
+            neighbors = [v for v in neighbor_lists[u].tolist() if not visited[v]]
             neighbors.sort(key=lambda x: degrees[x])
             for v in neighbors:
                 visited[v] = True
@@ -159,75 +126,64 @@ def manual_rcm_order(G):
         order.extend(reversed(component_order))
     return order
 
-def reorder_aag(parsed, order, output_path):
-    M, I, L, O, A = parsed['M'], parsed['I'], parsed['L'], parsed['O'], parsed['A']
-    in_lits = parsed['in_lits']
-    latch_lines = parsed['latch_lines']
-    output_lines = parsed['output_lines']
-    and_lines = parsed['and_lines']
-    symbol_lines = parsed['symbol_lines']
-    comment_lines = parsed['comment_lines']
-
-    old2new = {old: new for new, old in enumerate(order)}
-    new_in_lits = [in_lits[old] for old in order]
-
-    new_symbol_lines = []
-    for sym in symbol_lines:
-        if sym.startswith('i'):
-            parts = sym.split(None, 1)
-            if len(parts) == 2:
-                try:
-                    old_i = int(parts[0][1:])
-                    name = parts[1]
-                    new_i = old2new.get(old_i, None)
-                    if new_i is not None:
-                        new_symbol_lines.append(f"i{new_i} {name}")
-                    else:
-                        new_symbol_lines.append(sym)
-                except:
-                    new_symbol_lines.append(sym)
-            else:
-                new_symbol_lines.append(sym)
-        else:
-            new_symbol_lines.append(sym)
-
-    with open(output_path, 'w') as f:
-        f.write(f"aag {M} {I} {L} {O} {A}\n")
-        for lit in new_in_lits:
-            f.write(lit + "\n")
-        for line in latch_lines:
-            f.write(line + "\n")
-        for line in output_lines:
-            f.write(line + "\n")
-        for line in and_lines:
-            f.write(line + "\n")
-        for sym in new_symbol_lines:
-            f.write(sym + "\n")
-        for line in comment_lines:
-            f.write(line + "\n")
+def reorder_aag(aig, order, output_path):
+    if output_path.endswith(ORDER_SUFFIX):
+        write_order_file(output_path, [("rcm", order)])
+        print(f"Order file saved to: {output_path}")
+        return
 
-    print(f"Reordered AAG saved to: {output_path}")
+    aig.write_aiger(output_path, order)
 
-def main():
-    if len(sys.argv) != 3:
-        print("Usage: python3 reorder_aag_rcm_manual.py input.aag output_reordered.aag")
-        sys.exit(1)
+    print(f"Reordered AAG saved to: {output_path}")
 
-    input_path = sys.argv[1]
-    output_path = sys.argv[2]
-    parsed = parse_aag(input_path)
-    I = parsed['I']
+def reorder_file(input_path, output_path, aig=None, cache_dir=None):
+    if aig is None:
+        aig = parse_aiger(input_path)
+    I = aig.I
+
+    # Structurally identical AIGs reuse the cached order and skip the analysis
+    cache = open_order_cache(cache_dir)
+    order = cache.load(aig, "rcm") if cache else None
+    if order is not None:
+        print("Order cache hit (rcm), skipping analysis")
+    else:
+        indptr, indices = build_input_association_graph(aig)
+        # the cone vertices only guide the traversal, keep the inputs in RCM order
+        order = [v for v in manual_rcm_order(indptr, indices) if v < I]
+        if len(order) != I:
+            print("Warning: RCM order size does not match number of inputs. Using default order.")
+            order = list(range(I))
+        elif cache:
+            cache.store(aig, "rcm", order)
+
+    reorder_aag(aig, order, output_path)
 
-    G = build_input_association_graph(parsed)
-    if G.number_of_nodes() != I:
-        print("Warning: Graph nodes count does not match number of inputs.")
-    order = manual_rcm_order(G)
-    if len(order) != I:
-        print("Warning: RCM order size does not match number of inputs. Using default order.")
-        order = list(range(I))
+def main():
+    parser = argparse.ArgumentParser(description='Reorder AAG inputs with Reverse Cuthill-McKee')
+    parser.add_argument('input_file', help='input AIGER file, aag or aig (or split_aags/ directory with --batch)')
+    parser.add_argument('output_file', help='output AIGER file, binary if it ends in .aig (or reordered_aags/ directory with --batch)')
+    parser.add_argument('--batch', action='store_true',
+                        help='reorder every split_N.aag/.aig of input_file into output_file/reordered_N of the same format')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='worker processes in batch mode (0 = all available cores, default: 1)')
+    parser.add_argument('--log-dir', help='per-file log directory in batch mode')
+    parser.add_argument('--cache-dir',
+                        help='order cache directory (default: $REORDER_CACHE_DIR, no caching if unset)')
+    parser.add_argument('--order-only', action='store_true',
+                        help='in batch mode write only the permutation file reordered_N.order, not the AIG')
+    args = parser.parse_args()
+
+    if args.batch:
+        try:
+            run_batch(reorder_file, args.input_file, args.output_file,
+                      jobs=args.jobs, log_dir=args.log_dir, order_only=args.order_only,
+                      cache_dir=args.cache_dir)
+        except OSError as e:
+            print(f"Batch reorder error: {e}")
+            sys.exit(1)
+        return
 
-    reorder_aag(parsed, order, output_path)
+    reorder_file(args.input_file, args.output_file, cache_dir=args.cache_dir)
 
 if __name__ == "__main__":
     main()
-
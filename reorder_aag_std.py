@@ -10,105 +10,32 @@ Specialized variable ordering algorithms for single-output BDD optimization:
 
 Usage:
     python3 reorder_aag_single_output_bdd.py input.aag output_reordered.aag [--method dfs|mincut|lifetime|cofactor]
+    python3 reorder_aag_single_output_bdd.py --batch split_aags/ reordered_aags/ [--jobs N] [--log-dir DIR] [--method ...]
+    python3 reorder_aag_single_output_bdd.py input.aag reordered.order [--candidates dfs,lifetime]
 """
 
 import sys
 import time
+import shutil
 import argparse
 from collections import defaultdict, deque
 import math
 
-def parse_aag(path):
-    with open(path, 'r') as f:
-        lines = [line.rstrip('\n') for line in f]
+import numpy as np
 
-    if not lines or not lines[0].startswith('aag '):
-        raise ValueError("Not a valid AAG file (missing 'aag ' header).")
+from aig import ORDER_SUFFIX, parse_aiger, write_order_file
+from order_cache import open_order_cache
+from reorder_batch import run_batch
 
-    parts = lines[0].split()
-    if len(parts) < 6:
-        raise ValueError("Invalid AAG header.")
-    _, M, I, L, O, A = parts[:6]
-    M, I, L, O, A = map(int, (M, I, L, O, A))
-
-    idx = 1
-    in_lits = lines[idx: idx + I]
-    idx += I
-
-    latch_lines = lines[idx: idx + L]
-    idx += L
-
-    output_lines = lines[idx: idx + O]
-    idx += O
-
-    and_lines = lines[idx: idx + A]
-    idx += A
-
-    symbol_lines = []
-    while idx < len(lines) and not lines[idx].startswith('c'):
-        symbol_lines.append(lines[idx])
-        idx += 1
-
-    comment_lines = lines[idx:] if idx < len(lines) else []
-
-    return {
-        'M': M, 'I': I, 'L': L, 'O': O, 'A': A,
-        'in_lits': in_lits,
-        'latch_lines': latch_lines,
-        'output_lines': output_lines,
-        'and_lines': and_lines,
-        'symbol_lines': symbol_lines,
-        'comment_lines': comment_lines
-    }
+METHODS = ['dfs', 'mincut', 'lifetime', 'cofactor', 'hybrid']
 
 class SingleOutputBDDAnalyzer:
     """单输出BDD专用分析器"""
     
-    def __init__(self, parsed_aag):
-        self.parsed_aag = parsed_aag
-        self.n_vars = parsed_aag['I']
-        self.lit_to_idx = self._build_literal_map()
-        self.circuit_graph = self._build_circuit_graph()
+    def __init__(self, aig):
+        self.aig = aig
+        self.n_vars = aig.I
         self.var_info = self._extract_single_output_info()
-        
-    def _build_literal_map(self):
-        """构建literal映射"""
-        lit_map = {}
-        for i, lit_str in enumerate(self.parsed_aag['in_lits']):
-            try:
-                val = int(lit_str)
-                if val % 2 != 0:
-                    val -= 1
-                lit_map[val] = i
-            except ValueError:
-                continue
-        return lit_map
-    
-    def _build_circuit_graph(self):
-        """构建电路图 - 专为单输出优化"""
-        graph = {
-            'forward': defaultdict(list),   # node -> [children]
-            'backward': defaultdict(list),  # node -> [parents]
-            'gate_info': {}                # gate -> (input1, input2)
-        }
-        
-        # 构建AND门图
-        for and_line in self.parsed_aag['and_lines']:
-            parts = and_line.split()
-            if len(parts) == 3:
-                try:
-                    out_lit = int(parts[0])
-                    in1, in2 = int(parts[1]), int(parts[2])
-                    
-                    graph['gate_info'][out_lit] = (in1, in2)
-                    graph['forward'][in1].append(out_lit)
-                    graph['forward'][in2].append(out_lit)
-                    graph['backward'][out_lit].extend([in1, in2])
-                    
-                except ValueError:
-                    continue
-        
-        return graph
     
     def _extract_single_output_info(self):
         """提取单输出BDD专用信息"""
@@ -149,173 +76,66 @@ class SingleOutputBDDAnalyzer:
     
     def _calculate_depths(self, var_info):
         """计算深度信息 - 关键用于DFS排序"""
-        # 计算从输入到输出的深度
-        depth_map = {}
-        
-        # 初始化输入深度
-        for i, lit_str in enumerate(self.parsed_aag['in_lits']):
-            try:
-                lit = int(lit_str)
-                if lit % 2 != 0:
-                    lit -= 1
-                depth_map[lit] = 0
-            except ValueError:
-                continue
+        # 单遍拓扑层级计算: 门层级 + 到输出的最长路径
+        level, depth_to_output = self.aig.levels()
         
-        # 拓扑排序计算深度
-        changed = True
-        max_iterations = len(self.parsed_aag['and_lines']) + 1
-        iteration = 0
+        # 直接读取输入的门的真实层级
+        input_idx = np.concatenate([self.aig.input_of_literal(self.aig.rhs0),
+                                    self.aig.input_of_literal(self.aig.rhs1)])
+        gate_level = np.tile(level[self.aig.lhs >> 1], 2)
+        used = input_idx >= 0
+        input_idx, gate_level = input_idx[used], gate_level[used]
+        
+        self.first_use_level = np.full(self.n_vars, np.iinfo(np.int32).max, dtype=np.int32)
+        self.last_use_level = np.full(self.n_vars, -1, dtype=np.int32)
+        np.minimum.at(self.first_use_level, input_idx, gate_level)
+        np.maximum.at(self.last_use_level, input_idx, gate_level)
+        
+        # 输入本身层级为0，用其进入电路的层级(最浅的读取门)作为深度
+        input_depth = np.where(self.last_use_level >= 0, self.first_use_level, 0).tolist()
+        output_depth = np.maximum(depth_to_output[self.aig.inputs >> 1], 0).tolist()
         
-        while changed and iteration < max_iterations:
-            changed = False
-            iteration += 1
-            
-            for and_line in self.parsed_aag['and_lines']:
-                parts = and_line.split()
-                if len(parts) == 3:
-                    try:
-                        out_lit = int(parts[0])
-                        in1, in2 = int(parts[1]), int(parts[2])
-                        
-                        # 计算输入深度
-                        if in1 % 2 != 0: in1 -= 1
-                        if in2 % 2 != 0: in2 -= 1
-                        
-                        depth1 = depth_map.get(in1, float('inf'))
-                        depth2 = depth_map.get(in2, float('inf'))
-                        
-                        if depth1 != float('inf') and depth2 != float('inf'):
-                            new_depth = max(depth1, depth2) + 1
-                            if out_lit not in depth_map or depth_map[out_lit] > new_depth:
-                                depth_map[out_lit] = new_depth
-                                changed = True
-                                
-                    except ValueError:
-                        continue
-        
-        # 更新变量深度信息
         for i in range(self.n_vars):
-            input_lit = int(self.parsed_aag['in_lits'][i])
-            if input_lit % 2 != 0:
-                input_lit -= 1
-            var_info[i]['depth_from_input'] = depth_map.get(input_lit, 0)
+            var_info[i]['depth_from_input'] = input_depth[i]
+            var_info[i]['depth_to_output'] = output_depth[i]
     
     def _calculate_variable_spans(self, var_info):
         """计算变量活跃跨度 - 关键用于lifetime排序"""
-        # 模拟电路层级结构
-        levels = defaultdict(set)  # level -> {variables_used_at_this_level}
-        
-        # 为每个AND门分配层级
-        gate_levels = {}
-        
-        for and_line in self.parsed_aag['and_lines']:
-            parts = and_line.split()
-            if len(parts) == 3:
-                try:
-                    out_lit = int(parts[0])
-                    in1, in2 = int(parts[1]), int(parts[2])
-                    
-                    # 计算门的层级（基于输入的最大深度）
-                    level1 = level2 = 0
-                    
-                    if in1 % 2 != 0: in1 -= 1
-                    if in2 % 2 != 0: in2 -= 1
-                    
-                    if in1 in self.lit_to_idx:
-                        var_idx1 = self.lit_to_idx[in1]
-                        level1 = var_info[var_idx1]['depth_from_input']
-                    if in2 in self.lit_to_idx:
-                        var_idx2 = self.lit_to_idx[in2]
-                        level2 = var_info[var_idx2]['depth_from_input']
-                    
-                    gate_level = max(level1, level2) + 1
-                    gate_levels[out_lit] = gate_level
-                    
-                    # 记录变量在这个层级的使用
-                    if in1 in self.lit_to_idx:
-                        var_idx = self.lit_to_idx[in1]
-                        levels[gate_level].add(var_idx)
-                        var_info[var_idx]['first_use_level'] = min(var_info[var_idx]['first_use_level'], gate_level)
-                        var_info[var_idx]['last_use_level'] = max(var_info[var_idx]['last_use_level'], gate_level)
-                    
-                    if in2 in self.lit_to_idx:
-                        var_idx = self.lit_to_idx[in2]
-                        levels[gate_level].add(var_idx)
-                        var_info[var_idx]['first_use_level'] = min(var_info[var_idx]['first_use_level'], gate_level)
-                        var_info[var_idx]['last_use_level'] = max(var_info[var_idx]['last_use_level'], gate_level)
-                        
-                except ValueError:
-                    continue
-        
-        # 计算变量跨度
+        first_use = self.first_use_level.tolist()
+        last_use = self.last_use_level.tolist()
+        
         for i in range(self.n_vars):
-            if var_info[i]['first_use_level'] != float('inf'):
-                var_info[i]['variable_span'] = var_info[i]['last_use_level'] - var_info[i]['first_use_level'] + 1
+            if last_use[i] >= 0:
+                var_info[i]['first_use_level'] = first_use[i]
+                var_info[i]['last_use_level'] = last_use[i]
+                var_info[i]['variable_span'] = last_use[i] - first_use[i] + 1
             else:
                 var_info[i]['variable_span'] = 0
     
     def _calculate_cofactor_weights(self, var_info):
         """计算余因子权重 - 用于cofactor平衡排序"""
-        for i in range(self.n_vars):
-            input_lit = int(self.parsed_aag['in_lits'][i])
-            
-            positive_uses = 0  # 正literal使用次数
-            negative_uses = 0  # 负literal使用次数
-            
-            for and_line in self.parsed_aag['and_lines']:
-                parts = and_line.split()
-                if len(parts) == 3:
-                    try:
-                        in1, in2 = int(parts[1]), int(parts[2])
-                        
-                        for inp in [in1, in2]:
-                            if inp == input_lit:
-                                positive_uses += 1
-                            elif inp == input_lit + 1:
-                                negative_uses += 1
-                                
-                    except ValueError:
-                        continue
-            
-            total_uses = positive_uses + negative_uses
-            if total_uses > 0:
-                # 余因子平衡度：越接近0.5越好
-                pos_ratio = positive_uses / total_uses
-                balance = 1.0 - abs(pos_ratio - 0.5) * 2
-                var_info[i]['cofactor_weight'] = balance * total_uses
-            else:
-                var_info[i]['cofactor_weight'] = 0.0
+        # 单遍literal直方图: 正/负literal使用次数
+        self.positive_uses, self.negative_uses = self.aig.literal_use_counts()
+        
+        total_uses = self.positive_uses + self.negative_uses
+        pos_ratio = self.positive_uses / np.maximum(total_uses, 1)
+        # 余因子平衡度：越接近0.5越好
+        balance = 1.0 - np.abs(pos_ratio - 0.5) * 2
+        self.cofactor_weight = np.where(total_uses > 0, balance * total_uses, 0.0)
+        
+        for i, weight in enumerate(self.cofactor_weight.tolist()):
+            var_info[i]['cofactor_weight'] = weight
     
     def _extract_datapath_structure(self, var_info):
         """提取数据路径结构"""
         var_groups = defaultdict(list)
         
-        for sym_line in self.parsed_aag['symbol_lines']:
-            if sym_line.startswith('i'):
-                parts = sym_line.split(None, 1)
-                if len(parts) == 2:
-                    try:
-                        input_idx = int(parts[0][1:])
-                        name_part = parts[1]
-                        
-                        if '[' in name_part and ']' in name_part:
-                            var_name = name_part[:name_part.find('[')]
-                            bit_str = name_part[name_part.find('[')+1:name_part.find(']')]
-                            try:
-                                bit_pos = int(bit_str)
-                            except ValueError:
-                                bit_pos = 0
-                        else:
-                            var_name = name_part
-                            bit_pos = 0
-                        
-                        if input_idx < self.n_vars:
-                            var_info[input_idx]['var_name'] = var_name
-                            var_info[input_idx]['bit_position'] = bit_pos
-                            var_groups[var_name].append((bit_pos, input_idx))
-                    except ValueError:
-                        continue
+        for input_idx, (var_name, bit_pos) in enumerate(self.aig.datapath_symbols()):
+            if var_name is None:
+                continue
+            var_info[input_idx]['var_name'] = var_name
+            var_info[input_idx]['bit_position'] = bit_pos
+            var_groups[var_name].append((bit_pos, input_idx))
         
         # 设置位宽
         for var_name, bit_list in var_groups.items():
@@ -325,17 +145,23 @@ class SingleOutputBDDAnalyzer:
     
     def _calculate_structural_importance(self, var_info):
         """计算结构重要性"""
-        for i in range(self.n_vars):
-            # 综合多个因素
-            depth_score = var_info[i]['depth_from_input'] / max(1, max(var_info[j]['depth_from_input'] for j in range(self.n_vars)))
-            span_score = 1.0 / max(1, var_info[i]['variable_span'])  # 跨度小的更重要
-            cofactor_score = var_info[i]['cofactor_weight'] / max(1, max(var_info[j]['cofactor_weight'] for j in range(self.n_vars)))
-            bitwidth_score = var_info[i]['bitwidth'] / max(1, max(var_info[j]['bitwidth'] for j in range(self.n_vars)))
-            
-            var_info[i]['structural_importance'] = (depth_score * 0.3 + 
-                                                  span_score * 0.3 + 
-                                                  cofactor_score * 0.2 + 
-                                                  bitwidth_score * 0.2)
+        depth = np.array([var_info[i]['depth_from_input'] for i in range(self.n_vars)], dtype=np.float64)
+        self.variable_span = np.array([var_info[i]['variable_span'] for i in range(self.n_vars)], dtype=np.float64)
+        bitwidth = np.array([var_info[i]['bitwidth'] for i in range(self.n_vars)], dtype=np.float64)
+        
+        # 综合多个因素 (各项最大值只计算一次)
+        depth_score = depth / max(1, depth.max(initial=0))
+        span_score = 1.0 / np.maximum(1, self.variable_span)  # 跨度小的更重要
+        cofactor_score = self.cofactor_weight / max(1, self.cofactor_weight.max(initial=0))
+        bitwidth_score = bitwidth / max(1, bitwidth.max(initial=0))
+        
+        self.structural_importance = (depth_score * 0.3 + 
+                                      span_score * 0.3 + 
+                                      cofactor_score * 0.2 + 
+                                      bitwidth_score * 0.2)
+        
+        for i, importance in enumerate(self.structural_importance.tolist()):
+            var_info[i]['structural_importance'] = importance
 
 class SingleOutputBDDAlgorithms:
     """单输出BDD专用算法"""
@@ -344,7 +170,6 @@ class SingleOutputBDDAlgorithms:
         self.analyzer = analyzer
         self.var_info = analyzer.var_info
         self.n_vars = analyzer.n_vars
-        self.circuit_graph = analyzer.circuit_graph
     
     def depth_first_order(self):
         """深度优先排序 - 按电路深度排序"""
@@ -356,6 +181,7 @@ class SingleOutputBDDAlgorithms:
         order = list(range(self.n_vars))
         order.sort(key=lambda x: (
             self.var_info[x]['depth_from_input'],     # 深度小的在前
+            -self.var_info[x]['depth_to_output'],     # 离输出远的在前
             -self.var_info[x]['bitwidth'],            # 位宽大的在前
             -self.var_info[x]['bit_position'],        # 高位在前
             x
@@ -371,27 +197,18 @@ class SingleOutputBDDAlgorithms:
         print("使用最小割排序算法...")
         
         # 计算每个变量对BDD宽度的贡献
-        cut_contributions = {}
-        
-        for i in range(self.n_vars):
-            # 估算移除该变量对cut的影响
-            contribution = 0
-            
-            # 计算该变量的"切割权重"
-            span = self.var_info[i]['variable_span']
-            cofactor_balance = self.var_info[i]['cofactor_weight']
-            depth = self.var_info[i]['depth_from_input']
-            
-            # 权重函数：跨度大、不平衡的变量贡献大
-            contribution = span * (1.0 + 1.0 / max(0.1, cofactor_balance))
-            cut_contributions[i] = contribution
+        # 权重函数：跨度大、不平衡的变量贡献大
+        cut_contributions = (self.analyzer.variable_span *
+                             (1.0 + 1.0 / np.maximum(0.1, self.analyzer.cofactor_weight))).tolist()
+        span = self.analyzer.variable_span.tolist()
+        importance = self.analyzer.structural_importance.tolist()
         
         # 按贡献排序：贡献小的在前（减少BDD宽度）
         order = list(range(self.n_vars))
         order.sort(key=lambda x: (
             cut_contributions[x],                     # 割贡献小的在前
-            self.var_info[x]['variable_span'],        # 跨度小的在前
-            -self.var_info[x]['structural_importance'], # 重要性高的在前
+            span[x],                                  # 跨度小的在前
+            -importance[x],                           # 重要性高的在前
             x
         ))
         
@@ -422,11 +239,15 @@ class SingleOutputBDDAlgorithms:
         
         print("使用余因子平衡排序算法...")
         
+        cofactor_weight = self.analyzer.cofactor_weight.tolist()
+        span = self.analyzer.variable_span.tolist()
+        importance = self.analyzer.structural_importance.tolist()
+        
         order = list(range(self.n_vars))
         order.sort(key=lambda x: (
-            -self.var_info[x]['cofactor_weight'],     # 平衡度高的在前
-            self.var_info[x]['variable_span'],        # 跨度小的在前
-            -self.var_info[x]['structural_importance'], # 重要性高的在前
+            -cofactor_weight[x],                      # 平衡度高的在前
+            span[x],                                  # 跨度小的在前
+            -importance[x],                           # 重要性高的在前
             x
         ))
         
@@ -492,11 +313,11 @@ class SingleOutputBDDAlgorithms:
         
         return final_order
 
-def single_output_bdd_reorder(parsed_aag, method='mincut'):
+def single_output_bdd_reorder(aig, method='mincut'):
     """单输出BDD重排序主函数"""
     start_time = time.time()
     
-    analyzer = SingleOutputBDDAnalyzer(parsed_aag)
+    analyzer = SingleOutputBDDAnalyzer(aig)
     algorithms = SingleOutputBDDAlgorithms(analyzer)
     
     if method == 'dfs':
@@ -518,92 +339,110 @@ def single_output_bdd_reorder(parsed_aag, method='mincut'):
     
     return order
 
-def reorder_aag(parsed, order, output_path):
+def reorder_aag(aig, order, output_path):
     """重新排序AAG文件"""
-    M, I, L, O, A = parsed['M'], parsed['I'], parsed['L'], parsed['O'], parsed['A']
-    in_lits = parsed['in_lits']
-    latch_lines = parsed['latch_lines']
-    output_lines = parsed['output_lines']
-    and_lines = parsed['and_lines']
-    symbol_lines = parsed['symbol_lines']
-    comment_lines = parsed['comment_lines']
-
-    if not order or len(order) != I:
+    if not order or len(order) != aig.I:
         print("Warning: Invalid order, using default order.")
-        order = list(range(I))
+        order = list(range(aig.I))
 
-    old2new = {old: new for new, old in enumerate(order)}
-    new_in_lits = [in_lits[old] for old in order]
+    aig.write_aiger(output_path, order)
 
-    new_symbol_lines = []
-    for sym in symbol_lines:
-        if sym.startswith('i'):
-            parts = sym.split(None, 1)
-            if len(parts) == 2:
-                try:
-                    old_i = int(parts[0][1:])
-                    name = parts[1]
-                    new_i = old2new.get(old_i, None)
-                    if new_i is not None:
-                        new_symbol_lines.append(f"i{new_i} {name}")
-                    else:
-                        new_symbol_lines.append(sym)
-                except ValueError:
-                    new_symbol_lines.append(sym)
-            else:
-                new_symbol_lines.append(sym)
-        else:
-            new_symbol_lines.append(sym)
+    print(f"单输出BDD优化AAG文件已保存到: {output_path}")
 
-    with open(output_path, 'w') as f:
-        f.write(f"aag {M} {I} {L} {O} {A}\n")
-        for lit in new_in_lits:
-            f.write(lit + "\n")
-        for line in latch_lines:
-            f.write(line + "\n")
-        for line in output_lines:
-            f.write(line + "\n")
-        for line in and_lines:
-            f.write(line + "\n")
-        for sym in new_symbol_lines:
-            f.write(sym + "\n")
-        for line in comment_lines:
-            f.write(line + "\n")
+def compute_order(aig, method, cache=None):
+    """计算单个方法的排序，优先复用排序缓存"""
+    cache_key = f"std:{method}"
+    order = cache.load(aig, cache_key) if cache else None
+    if order is not None:
+        print(f"命中排序缓存 ({cache_key})，跳过分析")
+        return order
 
-    print(f"单输出BDD优化AAG文件已保存到: {output_path}")
+    order = single_output_bdd_reorder(aig, method)
+    if not order:
+        print("单输出BDD排序失败，使用默认排序。")
+        return list(range(aig.I))
+    if cache:
+        cache.store(aig, cache_key, order)
+    return order
+
+def reorder_file(input_path, output_path, method='mincut', aig=None, cache_dir=None, candidates=()):
+    """重排单个AAG文件 (批量模式的每个文件也走这里)
+
+    output_path 以 .order 结尾时只写出排列文件，并附带 candidates 中各方法的候选顺序
+    """
+    if aig is None:
+        aig = parse_aiger(input_path)
+    order_only = output_path.endswith(ORDER_SUFFIX)
+    
+    I = aig.I
+    if I == 0:
+        print("没有输入变量需要重排序，直接复制文件。")
+        if order_only:
+            write_order_file(output_path, [(f"std:{method}", [])])
+        else:
+            shutil.copy(input_path, output_path)
+        return
+    
+    # 相同结构的AIG直接复用缓存的排序，跳过分析
+    cache = open_order_cache(cache_dir)
+    order = compute_order(aig, method, cache)
+    
+    if not order_only:
+        reorder_aag(aig, order, output_path)
+        return
+
+    orders = [(f"std:{method}", order)]
+    for candidate in candidates:
+        if candidate != method:
+            orders.append((f"std:{candidate}", compute_order(aig, candidate, cache)))
+    write_order_file(output_path, orders)
+    print(f"排列文件已保存到: {output_path} (候选顺序 {len(orders)} 个)")
 
 def main():
     parser = argparse.ArgumentParser(description='单输出BDD专用变量排序算法')
-    parser.add_argument('input_file', help='输入AAG文件')
-    parser.add_argument('output_file', help='输出AAG文件')
+    parser.add_argument('input_file', help='输入AIGER文件 (aag或aig，按文件头识别)')
+    parser.add_argument('output_file', help='输出AIGER文件 (扩展名为 .aig 时写二进制格式)')
     parser.add_argument('--method', 
-                       choices=['dfs', 'mincut', 'lifetime', 'cofactor', 'hybrid'],
+                       choices=METHODS,
                        default='mincut',
                        help='单输出BDD算法 (默认: mincut)')
     
+    parser.add_argument('--batch', action='store_true',
+                       help='批量模式: input_file/output_file 分别为 split_aags/ 与 reordered_aags/ 目录')
+    parser.add_argument('--jobs', type=int, default=1,
+                       help='批量模式的进程数 (0 表示使用全部可用核，默认: 1)')
+    parser.add_argument('--log-dir', help='批量模式下每个文件的日志目录')
+    parser.add_argument('--cache-dir',
+                       help='排序缓存目录 (默认取环境变量 REORDER_CACHE_DIR，未设置则不缓存)')
+    parser.add_argument('--order-only', action='store_true',
+                       help='批量模式下只写出排列文件 reordered_N.order，不重写AIG')
+    parser.add_argument('--candidates', default='',
+                       help='写排列文件时附加的候选方法，逗号分隔 (如 dfs,lifetime)')
+    
     args = parser.parse_args()
+    candidates = [m for m in args.candidates.split(',') if m]
+    for candidate in candidates:
+        if candidate not in METHODS:
+            parser.error(f"未知候选方法: {candidate}")
+    
+    if args.batch:
+        try:
+            run_batch(reorder_file, args.input_file, args.output_file,
+                      jobs=args.jobs, log_dir=args.log_dir, order_only=args.order_only,
+                      method=args.method, cache_dir=args.cache_dir, candidates=candidates)
+        except OSError as e:
+            print(f"批量重排错误: {e}")
+            sys.exit(1)
+        return
     
     try:
-        parsed = parse_aag(args.input_file)
+        aig = parse_aiger(args.input_file)
     except Exception as e:
         print(f"解析AAG文件错误: {e}")
         sys.exit(1)
     
-    I = parsed['I']
-    if I == 0:
-        print("没有输入变量需要重排序，直接复制文件。")
-        import shutil
-        shutil.copy(args.input_file, args.output_file)
-        sys.exit(0)
-    
-    # 使用单输出BDD专用算法
-    order = single_output_bdd_reorder(parsed, args.method)
-    
-    if not order:
-        print("单输出BDD排序失败，使用默认排序。")
-        order = list(range(I))
-    
-    reorder_aag(parsed, order, args.output_file)
+    reorder_file(args.input_file, args.output_file, args.method, aig=aig, cache_dir=args.cache_dir,
+                 candidates=candidates)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+reorder_batch.py
+
+Batch driver shared by the reorder_aag_* scripts.
+
+Reorders every split_N.aag (or binary split_N.aig) of a directory into
+reordered_N of the same format within one Python process (optionally spread
+over a process pool), so the interpreter start-up and imports are paid once
+per run instead of once per split. Each file keeps the per-file behaviour of
+run.sh: its output goes to its own log, and if reordering fails the original
+file is copied instead.
+
+With order_only the netlists are not rewritten at all: each split gets a
+small reordered_N.order permutation file (see aig.write_order_file) that
+solution_gen applies to the original split_N file.
+
+Usage (through one of the reorder scripts):
+    python3 reorder_aag_std.py --batch split_aags/ reordered_aags/ [--jobs N] [--log-dir DIR] [--order-only]
+"""
+
+import contextlib
+import os
+import re
+import shutil
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from aig import ORDER_SUFFIX
+
+SPLIT_PATTERN = re.compile(r'^split_(\d+)\.(aag|aig)$')
+
+
+def list_split_files(input_dir):
+    """按编号返回目录中的 [(编号, split_N.aag/.aig路径)]"""
+    found = []
+    for name in os.listdir(input_dir):
+        match = SPLIT_PATTERN.match(name)
+        if match:
+            found.append((int(match.group(1)), os.path.join(input_dir, name), match.group(2)))
+    found.sort()
+    return found
+
+
+def resolve_jobs(jobs):
+    """jobs <= 0 表示使用全部可用核"""
+    if jobs > 0:
+        return jobs
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+def _reorder_one(task):
+    """重排单个文件，失败时回退为把原文件复制到 fallback_path；返回 (编号, 是否重排成功)"""
+    reorder_file, index, input_path, output_path, fallback_path, log_path, options = task
+    ok = False
+    log = open(log_path, 'w') if log_path else open(os.devnull, 'w')
+    with log, contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            reorder_file(input_path, output_path, **options)
+            ok = os.path.isfile(output_path)
+            if not ok:
+                print(f"错误: 重排结果 {output_path} 未生成。")
+        except Exception:
+            traceback.print_exc()
+    if not ok:
+        if output_path != fallback_path and os.path.exists(output_path):
+            os.remove(output_path)
+        shutil.copy(input_path, fallback_path)
+    return index, ok
+
+
+def run_batch(reorder_file, input_dir, output_dir, jobs=1, log_dir=None, order_only=False, **options):
+    """
+    对 input_dir 中所有 split_N.aag/.aig 调用 reorder_file(input, output, **options)，
+    结果按原格式写入 output_dir/reordered_N.aag/.aig (order_only 时写 reordered_N.order)。
+    返回回退为复制的文件数。
+    """
+    files = list_split_files(input_dir)
+    if not files:
+        raise FileNotFoundError(f"目录 {input_dir} 中没有 split_N.aag/.aig 文件")
+
+    os.makedirs(output_dir, exist_ok=True)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+
+    tasks = []
+    for index, input_path, ext in files:
+        fallback_path = os.path.join(output_dir, f"reordered_{index}.{ext}")
+        output_path = os.path.join(output_dir, f"reordered_{index}{ORDER_SUFFIX}") if order_only else fallback_path
+        log_path = os.path.join(log_dir, f"reorder_aag_{index}.log") if log_dir else None
+        tasks.append((reorder_file, index, input_path, output_path, fallback_path, log_path, options))
+
+    jobs = min(resolve_jobs(jobs), len(tasks))
+    print(f"批量重排 {len(tasks)} 个 AIGER 文件 (进程数: {jobs})")
+    sys.stdout.flush()
+
+    if jobs == 1:
+        results = map(_reorder_one, tasks)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        results = pool.map(_reorder_one, tasks)
+
+    failed = 0
+    try:
+        for task, (index, ok) in zip(tasks, results):
+            input_path, output_path, fallback_path = task[2], task[3], task[4]
+            if ok:
+                print(f"✔ 重排完成: {output_path}")
+            else:
+                failed += 1
+                detail = f"，详情请查看: {os.path.join(log_dir, f'reorder_aag_{index}.log')}" if log_dir else ""
+                print(f"错误: {os.path.basename(input_path)} 重排失败，已回退为直接复制到 {fallback_path}{detail}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return failed
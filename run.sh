@@ -5,7 +5,7 @@ set -e
 
 # examine the number of arguments
 if [ "$#" -lt 3 ]; then
-    echo "用法: $0 <约束文件.json> <解的数量> <输出目录> [<随机种子>]"
+    echo "用法: $0 <约束文件.json> <解的数量> <输出目录> [<随机种子>[,<随机种子>...]]"
     exit 1
 fi
 
@@ -14,6 +14,21 @@ constraint_file="$1"
 solution_num="$2"
 run_dir="$3"
 seed="${4:-42}"  # the default seed is 42 if not provided
+# several comma separated seeds (e.g. 0,1,2) share one pipeline and one BDD build,
+# solution_gen writes result_<seed>.json for each of them
+IFS=',' read -r -a seed_list <<< "$seed"
+
+# AIGER format between yosys, the reorder stage and solution_gen:
+# aag (ASCII, default) or aig (binary, smaller and faster to write/parse)
+aiger_format="${AIGER_FORMAT:-aag}"
+case "$aiger_format" in
+    aag) write_aiger_flags="-symbols -ascii" ;;
+    aig) write_aiger_flags="-symbols" ;;
+    *)
+        echo "错误: 不支持的 AIGER_FORMAT=$aiger_format (可选 aag 或 aig)"
+        exit 1
+        ;;
+esac
 
 # get dataset name and data id from the constraint file path
 dataset_name=$(dirname "$constraint_file")
@@ -45,68 +60,317 @@ else
     build_runtime=0
 fi
 
-echo "===== Step 1: JSON → Verilog ====="
-# Record JSON to Verilog conversion start time
-json2v_start_time=$(date +%s)
-
-# Execute conversion
-"_run/json2verilog" "$constraint_file" "$run_dir"
-
-# ensure json2verilog.v is generated in the correct directory
-INITIAL_VERILOG_FILE="$run_dir/json2verilog.v"
-if [ ! -f "$INITIAL_VERILOG_FILE" ]; then
-    echo "错误: 初始 Verilog 文件 ($INITIAL_VERILOG_FILE) 未生成"
+# the Python stages (json2aig.py, reorder_*.py) need numpy; without it every split would
+# silently fall back to yosys and an unordered copy, so stop here instead
+if ! python3 -c 'import numpy' 2>/dev/null; then
+    echo "错误: 缺少 Python 依赖 numpy，请先运行 pip install numpy"
     exit 1
 fi
 
-# Record JSON to Verilog conversion end time
-json2v_end_time=$(date +%s)
-json2v_runtime=$((json2v_end_time - json2v_start_time))
-echo "✔ Verilog 文件已生成: $run_dir/json2verilog.v"
+# BDD_CACHE_DIR enables the compiled BDD cache (bdd_cache.py, size cap BDD_CACHE_MAX_MB): the key
+# covers the constraint file, the tools and every setting that changes the BDDs, not the seed.
+# run.sh itself is hashed too, since the yosys flow, the default heavy abc script and the recipe
+# thresholds are defined here. A hit copies the compiled splits into the run directory and skips
+# steps 1-4 and the BDD build.
+COMPILED_BDD_DIR="$run_dir/compiled_bdds"
+bdd_cache_key=""
+bdd_cache_hit=0
+if [ -n "${BDD_CACHE_DIR:-}" ]; then
+    bdd_cache_files=()
+    # the Verilog frontend tools only count when that frontend is selected: under the
+    # json2aig frontend a yosys rebuild leaves the cache valid (a run that falls back to the
+    # Verilog frontend does not store its BDDs, see step 1-3)
+    if [ "${JSON_FRONTEND:-verilog}" = "verilog" ]; then
+        bdd_cache_files+=(--file _run/json2verilog --file _run/split_verilog --file ./yosys/yosys)
+    fi
+    if [ -n "${SYNTH_HEAVY_ABC_SCRIPT:-}" ]; then
+        bdd_cache_files+=(--file "$SYNTH_HEAVY_ABC_SCRIPT")
+    fi
+    bdd_cache_key=$(python3 ./bdd_cache.py key "$constraint_file" \
+        --file ./run.sh --file _run/solution_gen --file ./reorder_aag_std.py --file ./reorder_batch.py --file ./aig.py \
+        --file ./order_cache.py --file ./cache_util.py \
+        --file ./json2aig.py "${bdd_cache_files[@]}" \
+        --config "AIGER_FORMAT=$aiger_format" \
+        --config "YOSYS_MODE=${YOSYS_MODE:-}" \
+        --config "JSON_FRONTEND=${JSON_FRONTEND:-verilog}" \
+        --config "SYNTH_RECIPE=${SYNTH_RECIPE:-auto}" \
+        --config "SYNTH_TRIVIAL_COST=${SYNTH_TRIVIAL_COST:-}" \
+        --config "SYNTH_HEAVY_COST=${SYNTH_HEAVY_COST:-}" \
+        --config "SYNTH_HEAVY_ABC_SCRIPT=${SYNTH_HEAVY_ABC_SCRIPT:-}" \
+        --config "REORDER_ORDER_ONLY=${REORDER_ORDER_ONLY:-0}" \
+        --config "REORDER_CANDIDATES=${REORDER_CANDIDATES:-}" \
+        --config "SOLVER_REORDER=${SOLVER_REORDER:-}" \
+        --config "SOLVER_REORDER_NODES=${SOLVER_REORDER_NODES:-}" \
+        --config "SOLVER_MAX_MEMORY_MB=${SOLVER_MAX_MEMORY_MB:-}" \
+        --config "SOLVER_MANAGER=${SOLVER_MANAGER:-}") || bdd_cache_key=""
+    # BDD_CACHE_RETRY=1 marks the cold rerun after a rejected entry: never fetch again
+    if [ -n "$bdd_cache_key" ] && [ "${BDD_CACHE_RETRY:-0}" != "1" ] && \
+            python3 ./bdd_cache.py fetch "$bdd_cache_key" "$run_dir"; then
+        bdd_cache_hit=1
+    fi
+fi
 
-echo "===== Step 2: 拆分 Verilog 文件 ====="
-# Record Verilog splitting start time
-splitv_start_time=$(date +%s)
+if [ "$bdd_cache_hit" = "1" ]; then
+    echo "===== Step 1-4: 命中BDD缓存，跳过 ====="
+    num_split_files=$(ls -1 "$COMPILED_BDD_DIR"/split_*.bdd 2>/dev/null | wc -l)
+    echo "✔ 已编译的BDD: $COMPILED_BDD_DIR (共 $num_split_files 个拆分, key: $bdd_cache_key)"
+    json2v_runtime=0
+    splitv_runtime=0
+    v2aag_runtime=0
+    reorder_aag_runtime=0
+else
+    # JSON_FRONTEND=verilog (default) runs json2verilog, split_verilog and yosys (steps 1-3);
+    # JSON_FRONTEND=aig bit-blasts constraint.json straight into split_aags with json2aig.py
+    # (no Verilog, no yosys). The Verilog frontend is also the fallback when json2aig fails,
+    # e.g. on an operator it does not support.
+    json_frontend="${JSON_FRONTEND:-verilog}"
+    AAG_OUTPUT_DIR="$run_dir/split_aags"
+    frontend_done=0
+    if [ "$json_frontend" = "aig" ]; then
+        echo "===== Step 1-3: JSON → AAG (json2aig) ====="
+        v2aag_start_time=$(date +%s)
+        rm -f "$AAG_OUTPUT_DIR"/split_*.aag "$AAG_OUTPUT_DIR"/split_*.aig
+        if python3 ./json2aig.py "$constraint_file" "$run_dir" --format "$aiger_format"; then
+            num_split_files=$(ls -1 "$AAG_OUTPUT_DIR"/split_*.$aiger_format 2>/dev/null | wc -l)
+            v2aag_end_time=$(date +%s)
+            json2v_runtime=0
+            splitv_runtime=0
+            v2aag_runtime=$((v2aag_end_time - v2aag_start_time))
+            recipe_names=(json2aig)
+            split_recipes=()
+            split_costs=()
+            for i in $(seq 0 $(($num_split_files - 1))); do
+                split_recipes[$i]=json2aig
+                split_costs[$i]="-"
+            done
+            frontend_done=1
+            echo "✔ 约束已直接转换为 AAG 文件 (共 $num_split_files 个, 格式: $aiger_format)"
+            echo "   AAG文件位于: $AAG_OUTPUT_DIR"
+        else
+            echo "警告: json2aig 转换失败，回退到 Verilog 前端"
+            # the key does not cover the Verilog tools under JSON_FRONTEND=aig: keep this
+            # run's BDDs out of the cache
+            bdd_cache_key=""
+        fi
+    elif [ "$json_frontend" != "verilog" ]; then
+        echo "错误: 不支持的 JSON_FRONTEND=$json_frontend (可选 aig 或 verilog)"
+        exit 1
+    fi
 
-SPLIT_VERILOG_INPUT_FILE="$INITIAL_VERILOG_FILE"
-SPLIT_VERILOG_TARGET_DIR="$run_dir" 
+    if [ "$frontend_done" = "0" ]; then
+        echo "===== Step 1: JSON → Verilog ====="
+        # Record JSON to Verilog conversion start time
+        json2v_start_time=$(date +%s)
 
-echo "拆分 Verilog 文件: $SPLIT_VERILOG_INPUT_FILE -> $SPLIT_VERILOG_TARGET_DIR "
-"_run/split_verilog" "$SPLIT_VERILOG_INPUT_FILE" "$SPLIT_VERILOG_TARGET_DIR"
+        # Execute conversion
+        "_run/json2verilog" "$constraint_file" "$run_dir"
 
-num_split_files=$(ls -1 "$SPLIT_VERILOG_TARGET_DIR"/split_*.v 2>/dev/null | wc -l)
+        # ensure json2verilog.v is generated in the correct directory
+        INITIAL_VERILOG_FILE="$run_dir/json2verilog.v"
+        if [ ! -f "$INITIAL_VERILOG_FILE" ]; then
+            echo "错误: 初始 Verilog 文件 ($INITIAL_VERILOG_FILE) 未生成"
+            exit 1
+        fi
 
-if [ "$num_split_files" -eq 0 ]; then
-    echo "错误: Verilog 文件拆分失败，未在 $SPLIT_VERILOG_TARGET_DIR 中找到 split_N.v 文件。"
-    exit 1
-fi
-echo "✔ Verilog 文件已拆分为 $num_split_files 份 "
+        # Record JSON to Verilog conversion end time
+        json2v_end_time=$(date +%s)
+        json2v_runtime=$((json2v_end_time - json2v_start_time))
+        echo "✔ Verilog 文件已生成: $run_dir/json2verilog.v"
 
-splitv_end_time=$(date +%s)
-splitv_runtime=$((splitv_end_time - splitv_start_time))
+        echo "===== Step 2: 拆分 Verilog 文件 ====="
+        # Record Verilog splitting start time
+        splitv_start_time=$(date +%s)
 
-echo "===== Step 3: Verilog → AAG ====="
-v2aag_start_time=$(date +%s)
+        SPLIT_VERILOG_INPUT_FILE="$INITIAL_VERILOG_FILE"
+        SPLIT_VERILOG_TARGET_DIR="$run_dir" 
 
-# Create dedicated directory for split AAG files
-AAG_OUTPUT_DIR="$run_dir/split_aags"
-mkdir -p "$AAG_OUTPUT_DIR"
+        echo "拆分 Verilog 文件: $SPLIT_VERILOG_INPUT_FILE -> $SPLIT_VERILOG_TARGET_DIR "
+        # split.costs is only written for a valid cost file, never reuse one from an earlier run
+        rm -f "$run_dir/split.costs"
+        "_run/split_verilog" "$SPLIT_VERILOG_INPUT_FILE" "$SPLIT_VERILOG_TARGET_DIR" "$run_dir/json2verilog.costs"
 
-# Create dedicated directory for yosys log files
-YOSYS_LOG_DIR="$run_dir/yosys_logs"
-mkdir -p "$YOSYS_LOG_DIR"
+        num_split_files=$(ls -1 "$SPLIT_VERILOG_TARGET_DIR"/split_*.v 2>/dev/null | wc -l)
 
-for i in $(seq 0 $(($num_split_files - 1))); do
-    split_v_file="$SPLIT_VERILOG_TARGET_DIR/split_${i}.v"
-    original_aag_file="$AAG_OUTPUT_DIR/split_${i}.aag" 
-    
-    if [ ! -f "$split_v_file" ]; then
-        echo "错误: 未找到拆分的 Verilog 文件 $split_v_file"
-        exit 1
-    fi
+        if [ "$num_split_files" -eq 0 ]; then
+            echo "错误: Verilog 文件拆分失败，未在 $SPLIT_VERILOG_TARGET_DIR 中找到 split_N.v 文件。"
+            exit 1
+        fi
+        echo "✔ Verilog 文件已拆分为 $num_split_files 份 "
+
+        splitv_end_time=$(date +%s)
+        splitv_runtime=$((splitv_end_time - splitv_start_time))
+
+        echo "===== Step 3: Verilog → AAG ====="
+        v2aag_start_time=$(date +%s)
+
+        # Create dedicated directory for split AAG files
+        AAG_OUTPUT_DIR="$run_dir/split_aags"
+        mkdir -p "$AAG_OUTPUT_DIR"
+
+        # Create dedicated directory for yosys log files
+        YOSYS_LOG_DIR="$run_dir/yosys_logs"
+        mkdir -p "$YOSYS_LOG_DIR"
+
+        # SYNTH_RECIPE=auto (default) picks the yosys recipe of each split from its estimated cost
+        # in split.costs (the json2verilog constraint costs summed by split_verilog):
+        #   trivial  cost <= SYNTH_TRIVIAL_COST (default 10): aigmap output as is, no abc
+        #   default  abc -g AND
+        #   heavy    cost >= SYNTH_HEAVY_COST (default 200): abc -g AND with the AIG-minimizing script
+        #            SYNTH_HEAVY_ABC_SCRIPT (default: fraig + resyn2 + dch, written to yosys_logs)
+        # SYNTH_RECIPE=trivial|default|heavy uses one recipe for every split.
+        synth_recipe="${SYNTH_RECIPE:-auto}"
+        recipe_names=(trivial default heavy)
+        SPLIT_COST_FILE="$run_dir/split.costs"
+        split_recipes=()
+        split_costs=()
+        for i in $(seq 0 $(($num_split_files - 1))); do
+            split_recipes[$i]=default
+            split_costs[$i]="-"
+        done
+        case "$synth_recipe" in
+            auto)
+                if [ -f "$SPLIT_COST_FILE" ]; then
+                    while read -r i cost recipe; do
+                        if [ "$i" -lt "$num_split_files" ]; then
+                            split_costs[$i]="$cost"
+                            split_recipes[$i]="$recipe"
+                        fi
+                    done < <(awk -v trivial="${SYNTH_TRIVIAL_COST:-10}" -v heavy="${SYNTH_HEAVY_COST:-200}" \
+                        '!/^#/ && NF >= 2 { r = "default"; if ($2 <= trivial) r = "trivial"; else if ($2 >= heavy) r = "heavy"; print $1, $2, r }' \
+                        "$SPLIT_COST_FILE")
+                else
+                    echo "警告: 未找到拆分代价文件 $SPLIT_COST_FILE，所有拆分使用默认综合方案"
+                fi
+                ;;
+            trivial|default|heavy)
+                for i in $(seq 0 $(($num_split_files - 1))); do
+                    split_recipes[$i]="$synth_recipe"
+                done
+                ;;
+            *)
+                echo "错误: 不支持的 SYNTH_RECIPE=$synth_recipe (可选 auto, trivial, default 或 heavy)"
+                exit 1
+                ;;
+        esac
+
+        heavy_abc_script="${SYNTH_HEAVY_ABC_SCRIPT:-$YOSYS_LOG_DIR/heavy.abc}"
+        if [ -z "${SYNTH_HEAVY_ABC_SCRIPT:-}" ]; then
+            # abc only sees the combinational logic here, and unlike its built-in scripts yosys does
+            # not strip sequential commands from a sourced file: dret aborts abc on a netlist
+            # without latches, so the script stays purely combinational.
+            cat > "$heavy_abc_script" << 'EOF_ABC'
+strash
+&get -n
+&fraig -x
+&put
+dc2
+strash
+balance
+rewrite
+refactor
+balance
+rewrite
+rewrite -z
+balance
+refactor -z
+rewrite -z
+balance
+&get -n
+&dch -f
+&nf
+&put
+EOF_ABC
+        fi
+
+        # abc command of a recipe (none for trivial)
+        synth_recipe_abc() {
+            case "$1" in
+                default) echo "abc -g AND" ;;
+                heavy) echo "abc -g AND -script $heavy_abc_script" ;;
+            esac
+        }
+
+        # YOSYS_MODE=session (default): one yosys session reads every split_N module, runs the flow
+        # once on the whole design and writes each module with select + write_aiger, instead of one
+        # yosys start per split. YOSYS_JOBS=N shards the splits over N sessions running in parallel
+        # (default 1, the evaluation allows a single thread; 0 uses all cores).
+        # The session writes the same AIGs as per-split runs, byte for byte for the trivial and
+        # default recipes; the heavy abc script may pick a different but equivalent structure, as
+        # yosys numbers its internal net names across the whole session.
+        # YOSYS_MODE=per-split keeps one yosys run per split; splits that a session did not write
+        # are converted that way as well.
+        yosys_mode="${YOSYS_MODE:-session}"
+        rm -f "$AAG_OUTPUT_DIR"/split_*.aag "$AAG_OUTPUT_DIR"/split_*.aig
+        if [ "$yosys_mode" = "session" ]; then
+            yosys_jobs="${YOSYS_JOBS:-1}"
+            if [ "$yosys_jobs" -le 0 ]; then
+                yosys_jobs=$(nproc)
+            fi
+            if [ "$yosys_jobs" -gt "$num_split_files" ]; then
+                yosys_jobs=$num_split_files
+            fi
+            echo "单个 yosys 会话综合所有拆分 (会话数: $yosys_jobs)"
+
+            yosys_pids=()
+            for shard in $(seq 0 $(($yosys_jobs - 1))); do
+                session_script="$YOSYS_LOG_DIR/yosys_session_${shard}.ys"
+                {
+                    for i in $(seq $shard $yosys_jobs $(($num_split_files - 1))); do
+                        echo "read_verilog $SPLIT_VERILOG_TARGET_DIR/split_${i}.v"
+                    done
+                    printf '%s\n' "hierarchy -check" opt proc techmap opt aigmap opt
+                    for recipe in default heavy; do
+                        recipe_modules=""
+                        for i in $(seq $shard $yosys_jobs $(($num_split_files - 1))); do
+                            if [ "${split_recipes[$i]}" = "$recipe" ]; then
+                                recipe_modules="$recipe_modules split_${i}"
+                            fi
+                        done
+                        if [ -n "$recipe_modules" ]; then
+                            echo "select$recipe_modules"
+                            synth_recipe_abc "$recipe"
+                        fi
+                    done
+                    for i in $(seq $shard $yosys_jobs $(($num_split_files - 1))); do
+                        echo "select split_${i}"
+                        echo "write_aiger $write_aiger_flags $AAG_OUTPUT_DIR/split_${i}.$aiger_format"
+                    done
+                    echo "select -clear"
+                } > "$session_script"
+                ./yosys/yosys -q -s "$session_script" > "$YOSYS_LOG_DIR/yosys_session_${shard}.log" 2>&1 &
+                yosys_pids+=($!)
+            done
+
+            for shard in "${!yosys_pids[@]}"; do
+                if ! wait "${yosys_pids[$shard]}"; then
+                    # the file being written when the session stopped may be truncated: redo the shard
+                    echo "警告: yosys 会话 $shard 失败，其拆分改为单独转换 (日志: $YOSYS_LOG_DIR/yosys_session_${shard}.log)"
+                    for i in $(seq $shard $yosys_jobs $(($num_split_files - 1))); do
+                        rm -f "$AAG_OUTPUT_DIR/split_${i}.$aiger_format"
+                    done
+                fi
+            done
+        elif [ "$yosys_mode" != "per-split" ]; then
+            echo "错误: 不支持的 YOSYS_MODE=$yosys_mode (可选 session 或 per-split)"
+            exit 1
+        fi
 
-    echo "转换 $split_v_file → $original_aag_file"
-    YOSYS_SCRIPT_PART="read_verilog $split_v_file
+        for i in $(seq 0 $(($num_split_files - 1))); do
+            split_v_file="$SPLIT_VERILOG_TARGET_DIR/split_${i}.v"
+            original_aag_file="$AAG_OUTPUT_DIR/split_${i}.$aiger_format"
+        
+            if [ ! -f "$split_v_file" ]; then
+                echo "错误: 未找到拆分的 Verilog 文件 $split_v_file"
+                exit 1
+            fi
+
+            # already written by a yosys session
+            if [ -f "$original_aag_file" ]; then
+                continue
+            fi
+
+            echo "转换 $split_v_file → $original_aag_file"
+            YOSYS_SCRIPT_PART="read_verilog $split_v_file
 hierarchy -check
 opt
 proc
@@ -114,114 +378,176 @@ techmap
 opt
 aigmap
 opt
-abc -g AND
-write_aiger -symbols -ascii $original_aag_file
+$(synth_recipe_abc "${split_recipes[$i]}")
+write_aiger $write_aiger_flags $original_aag_file
 exit"
-    # Output yosys logs to dedicated log directory
-    echo "$YOSYS_SCRIPT_PART" | ./yosys/yosys -q > "$YOSYS_LOG_DIR/yosys_split_${i}.log" 2>&1
-
-    if [ ! -f "$original_aag_file" ]; then
-        echo "错误: AAG 文件 $original_aag_file 未生成"
-        echo "详情请查看: $YOSYS_LOG_DIR/yosys_split_${i}.log"
-        exit 1
+            # Output yosys logs to dedicated log directory
+            echo "$YOSYS_SCRIPT_PART" | ./yosys/yosys -q > "$YOSYS_LOG_DIR/yosys_split_${i}.log" 2>&1
+
+            if [ ! -f "$original_aag_file" ]; then
+                echo "错误: AAG 文件 $original_aag_file 未生成"
+                echo "详情请查看: $YOSYS_LOG_DIR/yosys_split_${i}.log"
+                exit 1
+            fi
+        done
+
+        v2aag_end_time=$(date +%s)
+        v2aag_runtime=$((v2aag_end_time - v2aag_start_time))
+        echo "✔ 所有拆分的 Verilog 文件已转换为原始 AAG 文件 (共 $num_split_files 个, 格式: $aiger_format)"
+        echo "   AAG文件位于: $AAG_OUTPUT_DIR"
+        echo "   Yosys日志位于: $YOSYS_LOG_DIR"
     fi
-done
-
-v2aag_end_time=$(date +%s)
-v2aag_runtime=$((v2aag_end_time - v2aag_start_time))
-echo "✔ 所有拆分的 Verilog 文件已转换为原始 AAG 文件 (共 $num_split_files 个)"
-echo "   AAG文件位于: $AAG_OUTPUT_DIR"
-echo "   Yosys日志位于: $YOSYS_LOG_DIR"
-
 
-echo "===== Step 4: 重排 AAG 文件顺序 ====="
-# Record AAG reordering start time
-reorder_aag_start_time=$(date +%s)
-
-# Create subdirectory for reordered AAG files
-REORDERED_AAG_DIR="$run_dir/reordered_aags/"
-mkdir -p "$REORDERED_AAG_DIR"
-
-# Create subdirectory for AAG reordering log files
-REORDER_AAG_LOG_DIR="$run_dir/reorder_aag_logs"
-mkdir -p "$REORDER_AAG_LOG_DIR"
-
-# Determine whether to apply reordering based on input path
-if [ "$num_split_files" -gt 20 ]; then
-    echo "拆分文件数量 ($num_split_files) 大于 20，跳过重排序优化，直接复制原始文件"
-    apply_reordering=false
-else
-    echo "对所有数据集应用变量重排序优化 (拆分文件数: $num_split_files)"
-    apply_reordering=true
-fi
+    # recipe, cost and AND count (header field A, same line in aag and aig) of every split,
+    # summed per recipe for the time log
+    SYNTH_RECIPE_LOG="$run_dir/synth_recipes.txt"
+    declare -A recipe_splits=()
+    declare -A recipe_ands=()
+    for recipe in "${recipe_names[@]}"; do
+        recipe_splits[$recipe]=0
+        recipe_ands[$recipe]=0
+    done
+    echo "# <split> <recipe> <cost> <and_count>" > "$SYNTH_RECIPE_LOG"
+    for i in $(seq 0 $(($num_split_files - 1))); do
+        read -r _ _ _ _ _ and_count _ < <(head -n 1 "$AAG_OUTPUT_DIR/split_${i}.$aiger_format")
+        recipe="${split_recipes[$i]}"
+        recipe_splits[$recipe]=$((${recipe_splits[$recipe]} + 1))
+        recipe_ands[$recipe]=$((${recipe_ands[$recipe]} + and_count))
+        echo "split_${i} $recipe ${split_costs[$i]} $and_count" >> "$SYNTH_RECIPE_LOG"
+    done
+    recipe_summary=""
+    for recipe in "${recipe_names[@]}"; do
+        recipe_summary="$recipe_summary $recipe ${recipe_splits[$recipe]} 个,"
+    done
+    echo "   综合方案:${recipe_summary%,} (详情: $SYNTH_RECIPE_LOG)"
+
+
+    echo "===== Step 4: 重排 AAG 文件顺序 ====="
+    # Record AAG reordering start time
+    reorder_aag_start_time=$(date +%s)
+
+    # Create subdirectory for reordered AAG files
+    REORDERED_AAG_DIR="$run_dir/reordered_aags/"
+    mkdir -p "$REORDERED_AAG_DIR"
+
+    # Create subdirectory for AAG reordering log files
+    REORDER_AAG_LOG_DIR="$run_dir/reorder_aag_logs"
+    mkdir -p "$REORDER_AAG_LOG_DIR"
+
+    # Reorder all split AAG files in one Python process. The evaluation allows a single thread,
+    # so the process pool stays off unless REORDER_JOBS is set (0 uses all available cores);
+    # REORDER_CACHE_DIR enables the on-disk order cache.
+    # REORDER_ORDER_ONLY=1 writes only a reordered_N.order permutation per split instead of
+    # rewriting the netlist; solution_gen applies it to split_N and also tries the extra
+    # methods listed in REORDER_CANDIDATES (comma separated, e.g. dfs,lifetime)
+    reorder_jobs="${REORDER_JOBS:-1}"
+    reorder_options=()
+    if [ "${REORDER_ORDER_ONLY:-0}" = "1" ]; then
+        reorder_options+=(--order-only)
+        if [ -n "${REORDER_CANDIDATES:-}" ]; then
+            reorder_options+=(--candidates "$REORDER_CANDIDATES")
+        fi
+    fi
+    rm -f "$REORDERED_AAG_DIR"/reordered_*.aag "$REORDERED_AAG_DIR"/reordered_*.aig "$REORDERED_AAG_DIR"/reordered_*.order
+    echo "对所有数据集应用变量重排序优化 (拆分文件数: $num_split_files, 进程数: $reorder_jobs)"
+    if ! python3 ./reorder_aag_std.py --batch "$AAG_OUTPUT_DIR" "$REORDERED_AAG_DIR" \
+            --jobs "$reorder_jobs" --log-dir "$REORDER_AAG_LOG_DIR" "${reorder_options[@]}"; then
+        echo "错误: 批量重排失败，未完成的文件回退到直接复制模式..."
+    fi
 
-for i in $(seq 0 $(($num_split_files - 1))); do
-    original_aag_file="$AAG_OUTPUT_DIR/split_${i}.aag"
-    reordered_aag_file="$REORDERED_AAG_DIR/reordered_${i}.aag" 
+    for i in $(seq 0 $(($num_split_files - 1))); do
+        original_aag_file="$AAG_OUTPUT_DIR/split_${i}.$aiger_format"
+        reordered_aag_file="$REORDERED_AAG_DIR/reordered_${i}.$aiger_format"
+        reordered_order_file="$REORDERED_AAG_DIR/reordered_${i}.order"
 
-    if [ ! -f "$original_aag_file" ]; then
-        echo "错误: 未找到用于重排的原始 AAG 文件 $original_aag_file"
-        exit 1
-    fi
+        if [ ! -f "$original_aag_file" ]; then
+            echo "错误: 未找到用于重排的原始 AAG 文件 $original_aag_file"
+            exit 1
+        fi
 
-    if [ "$apply_reordering" = true ]; then
-        # Apply reordering
-        echo "重排 AAG 文件: $original_aag_file → $reordered_aag_file"
-        python3 ./reorder_aag_std.py "$original_aag_file" "$reordered_aag_file"  > "$REORDER_AAG_LOG_DIR/reorder_aag_${i}.log" 2>&1
-        
-        if [ $? -ne 0 ]; then
-            echo "错误: AAG 文件 $original_aag_file 重排失败。"
-            echo "详情请查看: $REORDER_AAG_LOG_DIR/reorder_aag_${i}.log"
-            echo "回退到直接复制模式..."
-            # Fallback to copying when reordering fails
-            cp "$original_aag_file" "$reordered_aag_file"
-            echo "已将原始文件复制到: $reordered_aag_file"
-        elif [ ! -f "$reordered_aag_file" ]; then
+        if [ ! -f "$reordered_aag_file" ] && [ ! -f "$reordered_order_file" ]; then
             echo "错误: 重排后的 AAG 文件 $reordered_aag_file 未生成。"
-            echo "详情请查看: $REORDER_AAG_LOG_DIR/reorder_aag_${i}.log"
             echo "回退到直接复制模式..."
             # Fallback to copying when reordered file is not generated
             cp "$original_aag_file" "$reordered_aag_file"
             echo "已将原始文件复制到: $reordered_aag_file"
-        else
-            echo "✔ 重排完成: $reordered_aag_file"
         fi
-    else
-        # Direct copy without reordering
-        echo "复制 AAG 文件: $original_aag_file → $reordered_aag_file"
-        cp "$original_aag_file" "$reordered_aag_file"
-        echo "✔ 复制完成: $reordered_aag_file"
-    fi
-done
+    done
 
-# Record AAG reordering end time
-reorder_aag_end_time=$(date +%s)
-reorder_aag_runtime=$((reorder_aag_end_time - reorder_aag_start_time))
+    # Record AAG reordering end time
+    reorder_aag_end_time=$(date +%s)
+    reorder_aag_runtime=$((reorder_aag_end_time - reorder_aag_start_time))
 
-if [ "$apply_reordering" = true ]; then
     echo "✔ 所有 AAG 文件已完成重排序处理 (共 $num_split_files 个)，输出到 $REORDERED_AAG_DIR"
     echo "   重排序方法: mincut (单输出BDD优化)"
-else
-    echo "✔ 所有 AAG 文件已复制 (共 $num_split_files 个)，输出到 $REORDERED_AAG_DIR"
-    echo "   处理方式: 直接复制 (跳过重排序)"
+    echo "   处理时间: $reorder_aag_runtime 秒"
 fi
-echo "   处理时间: $reorder_aag_runtime 秒"
 
 echo "===== Step 5: 运行 BDD 求解器 ====="
 # Parameter preparation
 SOLUTION_GEN_INPUT_DIR="$run_dir"
  OUTPUT_JSON_FILE="$run_dir/result.json"
 SOLUTION_GEN_SPLIT_COUNT="$num_split_files" 
+if [ "${#seed_list[@]}" -gt 1 ]; then
+    OUTPUT_JSON_FILE="$run_dir/result_${seed_list[0]}.json"
+fi
+output_json_files=("$OUTPUT_JSON_FILE")
+
+# CUDD dynamic reordering: SOLVER_REORDER=none|sift|group-sift|group-converge selects the mode
+# (default sift), SOLVER_REORDER_NODES=N first reorders at N live nodes instead of the >30 inputs rule
+solver_options=()
+if [ -n "${SOLVER_REORDER:-}" ]; then
+    solver_options+=(--reorder "$SOLVER_REORDER")
+fi
+if [ -n "${SOLVER_REORDER_NODES:-}" ]; then
+    solver_options+=(--reorder-nodes "$SOLVER_REORDER_NODES")
+fi
+# SOLVER_MAX_MEMORY_MB caps the CUDD memory of each split (forced reordering near the cap,
+# clean error beyond it)
+if [ -n "${SOLVER_MAX_MEMORY_MB:-}" ]; then
+    solver_options+=(--max-memory "$SOLVER_MAX_MEMORY_MB")
+fi
+# SOLVER_COUNT_MODE=double|quad|verify selects the path count precision (default double)
+if [ -n "${SOLVER_COUNT_MODE:-}" ]; then
+    solver_options+=(--count-mode "$SOLVER_COUNT_MODE")
+fi
+# SOLVER_MANAGER=per-split gives every split its own CUDD manager (default shared: splits
+# built without reordering and without SOLVER_MAX_MEMORY_MB share one manager)
+if [ -n "${SOLVER_MANAGER:-}" ]; then
+    solver_options+=(--manager "$SOLVER_MANAGER")
+fi
+
+# warm runs only sample; cold runs with the cache enabled save their BDDs for the next seed
+if [ "$bdd_cache_hit" = "1" ]; then
+    solver_options+=(--load-bdd "$COMPILED_BDD_DIR")
+elif [ -n "$bdd_cache_key" ]; then
+    rm -rf "$COMPILED_BDD_DIR"
+    mkdir -p "$COMPILED_BDD_DIR"
+    solver_options+=(--save-bdd "$COMPILED_BDD_DIR")
+fi
+
+# the first seed is the positional job, the others are sampled from the same tables
+for extra_seed in "${seed_list[@]:1}"; do
+    extra_output="$run_dir/result_${extra_seed}.json"
+    solver_options+=(--job "$extra_seed:$solution_num:$extra_output")
+    output_json_files+=("$extra_output")
+done
 
 echo "运行 solution_gen 生成解..."
-echo "命令: _run/solution_gen \"$SOLUTION_GEN_INPUT_DIR\" \"$seed\" \"$solution_num\" \"$OUTPUT_JSON_FILE\" \"$SOLUTION_GEN_SPLIT_COUNT\""
+echo "命令: _run/solution_gen \"$SOLUTION_GEN_INPUT_DIR\" \"${seed_list[0]}\" \"$solution_num\" \"$OUTPUT_JSON_FILE\" \"$SOLUTION_GEN_SPLIT_COUNT\" \"$aiger_format\" ${solver_options[*]}"
 
 bdd_start_time=$(date +%s)
 
 # Ensure the first parameter of solution_gen is the correct AAG file directory
-"_run/solution_gen" "$SOLUTION_GEN_INPUT_DIR" "$seed" "$solution_num" "$OUTPUT_JSON_FILE" "$SOLUTION_GEN_SPLIT_COUNT" > "$run_dir/solver.log" 2>&1
-
-if [ $? -ne 0 ]; then
+if ! "_run/solution_gen" "$SOLUTION_GEN_INPUT_DIR" "${seed_list[0]}" "$solution_num" "$OUTPUT_JSON_FILE" "$SOLUTION_GEN_SPLIT_COUNT" "$aiger_format" "${solver_options[@]}" > "$run_dir/solver.log" 2>&1; then
+    if [ "$bdd_cache_hit" = "1" ]; then
+        # a truncated, stale or foreign .bdd must not fail a run that would succeed cold:
+        # drop the entry and start over without fetching (the cold run stores a fresh one)
+        echo "警告: 缓存的BDD无法加载 (日志: $run_dir/solver.log)，丢弃缓存条目并重新运行"
+        python3 ./bdd_cache.py discard "$bdd_cache_key" || true
+        rm -rf "$COMPILED_BDD_DIR"
+        BDD_CACHE_RETRY=1 exec "$0" "$@"
+    fi
     echo "解生成失败，请查看日志: $run_dir/solver.log"
     exit 1
 fi
@@ -229,6 +555,12 @@ fi
 bdd_end_time=$(date +%s)
 bdd_runtime=$((bdd_end_time - bdd_start_time))
 
+if [ "$bdd_cache_hit" = "0" ] && [ -n "$bdd_cache_key" ]; then
+    if ! python3 ./bdd_cache.py store "$bdd_cache_key" "$run_dir"; then
+        echo "警告: 已编译的BDD未写入缓存"
+    fi
+fi
+
 total_end_time=$(date +%s)
 total_runtime=$((total_end_time - total_start_time))
 
@@ -240,15 +572,24 @@ total_runtime=$((total_end_time - total_start_time))
     echo "Verilog到AAG转换时间: $v2aag_runtime 秒"
     echo "AAG文件重排时间: $reorder_aag_runtime 秒"
     echo "BDD求解时间: $bdd_runtime 秒"
+    if [ "$bdd_cache_hit" = "0" ]; then
+        for recipe in "${recipe_names[@]}"; do
+            echo "综合方案 $recipe: ${recipe_splits[$recipe]} 个拆分, AND门 ${recipe_ands[$recipe]} 个"
+        done
+    fi
+    if [ -n "$bdd_cache_key" ]; then
+        echo "BDD缓存命中: $bdd_cache_hit"
+    fi
     echo "总运行时间: $total_runtime 秒"
 } > "$run_dir/time_log.txt"
 
-if [ ! -f "$OUTPUT_JSON_FILE" ]; then
-    echo "错误: 结果文件未生成: $OUTPUT_JSON_FILE"
-    exit 1
-fi
-
-echo "✔ 解已生成: $OUTPUT_JSON_FILE"
+for output_json_file in "${output_json_files[@]}"; do
+    if [ ! -f "$output_json_file" ]; then
+        echo "错误: 结果文件未生成: $output_json_file"
+        exit 1
+    fi
+    echo "✔ 解已生成: $output_json_file"
+done
 echo "处理完成: $dataset_name/$data_id.json (种子: $seed)"
 
 exit 0
\ No newline at end of file
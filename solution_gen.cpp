@@ -1,553 +1,1614 @@
-#include <cstdio>
-#include <cstddef>
-#include <iostream>
-#include <fstream>
-#include <string>
-#include <vector>
-#include <sstream>
-#include <map>
-#include <cassert>
-#include <random>
-#include <iomanip>
-#include <regex>
-#include <algorithm>
-#include <set>
-#include <quadmath.h>
-
-#include "nlohmann/json.hpp"
-#include "cudd.h"
-#include "cuddInt.h"
-using json = nlohmann::json;
-using namespace std;
-
-// procedure:
-// 1. convert the AAG to BDD
-//     (1) read the AAG file
-//     (2) inputs: use Cudd_bddIthVar to create BDD variables
-//     (3) ands: use Cudd_bddAnd to create BDD nodes
-//     (4) outputs: there is only one output, no need to deal with it
-//     (5) names: create a map to from BDD variable index to its name
-
-// 2. generate random solutions
-//    (1) calculate complement arc number of all nodes by dynamic programming
-//    (2) generate random solutions using dfs:
-//        entering the child node according to probability by the number of complement arcs
-//        to make sure finally generate a route with odd complement arcs
-//    (3) for don't care variables, randomly assign them
-
-// 3. output the solutions: using nlohmann/json to output the solutions in certain format:
-//        {
-//        "assignment_list": [
-//            // 第一组解
-//            [
-//            { "value": "2fd3d29"}, // id=0的变量赋值
-//            { "value": "a0a1"}, // id=1的变量赋值
-//            ...
-//            ],
-//            // 第二组解
-//            [
-//            ...
-//            ]
-//        ]
-//        }
-
-// 4. clean up
-
-class BDD_Solver {
-    public:
-        string input_file;
-        string output_file;
-        int random_seed;
-        int solution_num;
-
-        DdManager *manager;
-        DdNode *out_node;
-        vector<DdNode*> nodes; // map from AAG index to BDD node
-
-        // map from BDD index to its name
-        // name format: var_x[y] -> so record int x and y is ok
-        vector<pair<int, int>> idx_to_name;
-
-        // aag config
-        int max_idx, input_num, latch_num, output_num, and_num, ori_var_num;
-        vector<int> idx_to_len;// the length of each original input variable
-
-        // record path number from current node to 1-th node with odd or even complement arcs
-        // 0: odd_cnt, 1: even_cnt
-        map<DdNode*, pair<__float128, __float128>> dp;
-
-        // random number generator
-        std::mt19937 rng;
-
-        // solution list
-        vector<vector<bool>> solutions;
-        vector<vector<vector<bool>>> reshaped_solutions;
-
-        bool no_constraint;
-
-        BDD_Solver(const string& input, const string& output, int seed, int num_solutions, int var_num , vector<int> idx_to_len) 
-            : input_file(input), output_file(output), random_seed(seed), solution_num(num_solutions), ori_var_num(var_num), idx_to_len(idx_to_len) {
-            
-            rng = std::mt19937(random_seed);
-            
-            manager = Cudd_Init(0, 0, CUDD_UNIQUE_SLOTS, CUDD_CACHE_SLOTS, 0);
-            if (!manager) {
-                cerr << "Error: Failed to initialize CUDD manager" << endl;
-                throw runtime_error("CUDD initialization failed");
-            }
-
-            
-            max_idx = 0;
-            input_num = 0;
-            latch_num = 0;
-            output_num = 0;
-            and_num = 0;
-            no_constraint = false;
-        }
-        
-        ~BDD_Solver() {
-            for (auto node : nodes) {
-                if (node != nullptr) {
-                    Cudd_RecursiveDeref(manager, node);
-                }
-            }
-            nodes.clear();
-            if (manager != nullptr) {
-                Cudd_Quit(manager);
-                manager = nullptr;
-            }
-        }
-
-        int aag_to_BDD(){
-            ifstream aag_file(input_file);
-            if (!aag_file.is_open()) {
-                cerr << "Error: Failed to open AAG file" << endl;
-                return -1;
-            }
-
-            string line;
-            aag_file >> line;
-            if (line != "aag") {
-                cerr << "Error: Invalid AAG file format" << endl;
-                return -1;
-            }
-
-            aag_file >> max_idx >> input_num >> latch_num >> output_num >> and_num;
-            if(and_num == 0){
-                no_constraint = true; // if no ands, then no constraint
-            }
-
-            
-            if(input_num > 30) Cudd_AutodynEnable(manager, CUDD_REORDER_SIFT);
-            
-            // initialize 
-            nodes.resize(max_idx);
-            idx_to_name.resize(input_num);
-
-            // inputs
-            for(int i = 0 ; i < input_num ; i++){
-                int idx;
-                aag_file >> idx;
-                DdNode* node = Cudd_bddIthVar(manager, i);
-                Cudd_Ref(node);
-                nodes[idx / 2 - 1] = node;// aag input first index is 2
-
-                // store dp
-                dp[node] = {(__float128)0.0, (__float128)1.0}; // 0: odd_cnt, 1: even_cnt
-                dp[Cudd_Not(node)] = {(__float128)1.0, (__float128)0.0}; 
-            }
-            // for constant node
-            dp[Cudd_ReadOne(manager)] = {(__float128)0.0, (__float128)1.0};
-            dp[Cudd_ReadLogicZero(manager)] = {(__float128)0.0, (__float128)0.0};
-
-
-            // outputs(only 1 output)
-            int output_idx;
-            aag_file >> output_idx;
-
-
-            // ands
-            for(int i = 0 ; i < and_num ; i++){
-                int out, in1, in2;
-                aag_file >> out >> in1 >> in2;
-                DdNode *In1, *In2, *Out;
-
-                if(in1 / 2 == 0){// constant
-                     In1 = (in1 % 2 == 0) ? Cudd_ReadOne(manager) : Cudd_ReadLogicZero(manager);
-                } else{
-                    In1 = (in1 % 2 == 0) ? nodes[in1 / 2 - 1] : Cudd_Not(nodes[in1 / 2 - 1]);
-                }
-
-                if(in2 / 2 == 0){// constant
-                     In2 = (in2 % 2 == 0) ? Cudd_ReadOne(manager) : Cudd_ReadLogicZero(manager);
-                } else{
-                    In2 = (in2 % 2 == 0) ? nodes[in2 / 2 - 1] : Cudd_Not(nodes[in2 / 2 - 1]);
-                }
-
-                Out = Cudd_bddAnd(manager, In1, In2);
-                Cudd_Ref(Out);
-                nodes[out / 2 - 1] = Out;
-            }
-
-
-            // if output is a odd, then an additional inverter is needed
-            if(!no_constraint){
-                out_node = output_idx % 2 == 0 ? nodes[output_idx / 2 - 1] : Cudd_Not(nodes[output_idx / 2 - 1]);
-                Cudd_Ref(out_node);
-            }
-            else{
-                out_node = Cudd_ReadOne(manager); // if no constraint, output is always true
-            }
-
-
-            // names
-            for(int i = 0 ; i < input_num ; i++){
-                string head, name;
-                aag_file >> head >> name;
-
-                regex p1("^i(\\d+)$");
-                regex p2("^var_(\\d+)\\[(\\d+)\\]$");
-
-                int idx = 0, x = 0, y = 0;
-                smatch match;
-
-                // i_idx
-                if (regex_match(head, match, p1)) {
-                   idx = stoi(match[1]);
-                }
-                
-                // var_x[y]
-                if (regex_match(name, match, p2)) {
-                    x = stoi(match[1]);
-                    y = stoi(match[2]);
-                }
-
-                idx_to_name[idx] = {x, y};
-            }
-
-
-            // output names is not needed
-            // done
-            aag_file.close();   
-
-            return 0;
-        }
-
-        pair<__float128, __float128> cal_dp(DdNode* node) {
-
-            auto it = dp.find(node);
-            if (it != dp.end()) {
-                return it->second;
-            }
-            
-
-            DdNode* regular_node = Cudd_Regular(node);
-            DdNode* T = Cudd_T(regular_node);
-            DdNode* E = Cudd_E(regular_node);
-
-            bool node_complemented = Cudd_IsComplement(node);
-            
-            pair<__float128, __float128> t_paths, e_paths;
-            
-            if (node_complemented) {
-                T = Cudd_Not(T);
-                E = Cudd_Not(E);
-            }
-            
-            t_paths = cal_dp(T);
-            e_paths = cal_dp(E);
-            
-            pair<__float128, __float128> result;
-            
-            result.first = t_paths.first + e_paths.first;   // odd
-            result.second = t_paths.second + e_paths.second; // even
-            
-            // if complemented, swap the results
-            if (node_complemented) {
-                swap(result.first, result.second);
-            }
-            
-            //char odd_buf[128], even_buf[128];
-            //quadmath_snprintf(odd_buf, sizeof(odd_buf), "%.6Qg", result.first);
-            //quadmath_snprintf(even_buf, sizeof(even_buf), "%.6Qg", result.second);
-            //cout << "Calculating DP for node: " << idx;
-            //cout << " Odd paths: " << odd_buf << ", Even paths: " << even_buf << endl;
-            
-            dp[node] = result;
-            return result;
-        }
-
-        bool dfs_generate_solution(DdNode* node, bool odd, vector<bool>& solution) {
-            if (Cudd_IsConstant(node)) {
-                if ((odd && node == Cudd_ReadOne(manager)) || 
-                    (!odd && node != Cudd_ReadOne(manager))) {
-                    return true; 
-                }
-                return false; 
-            }
-
-            int var_index = Cudd_NodeReadIndex(node);
-            DdNode* regular_node = Cudd_Regular(node);
-            bool is_complemented = Cudd_IsComplement(node);
-
-            DdNode* T = Cudd_T(regular_node);
-            DdNode* E = Cudd_E(regular_node);
-
-            if (is_complemented) {
-                T = Cudd_Not(T);
-                E = Cudd_Not(E);
-                odd = !odd;
-            }
-
-            auto t_result = dp[T];
-            auto e_result = dp[E];
-
-            __float128 cnt_T = odd ? t_result.first : t_result.second;
-            __float128 cnt_E = odd ? e_result.first : e_result.second;
-            __float128 total_cnt = cnt_T + cnt_E;
-
-            double prob = (total_cnt > 0) ? static_cast<double>(cnt_T) / static_cast<double>(total_cnt) : 0.5;
-            double rand_val = std::uniform_real_distribution<double>(0.0, 1.0)(rng);
-
-            bool success = false;
-            if (rand_val < prob) {
-                solution[var_index] = true;
-                success = dfs_generate_solution(T, odd, solution);
-            } else {
-                solution[var_index] = false;
-                success = dfs_generate_solution(E, odd, solution);
-            }
-
-            return success;
-        }
-
-        int generate_solutions(int num_solutions) {
-            solutions.clear();
-            solutions.resize(num_solutions);
-            
-            for(auto &solution : solutions){
-                solution.resize(input_num, false);
-            }
-
-            if(no_constraint){
-                // if no constraint, then all solutions are false
-                for(int i = 0 ; i < num_solutions ; i++){
-                    for(int j = 0 ; j < input_num ; j++){
-                        solutions[i][j] = false;
-                    }
-                }
-                return 0;
-            }
-
-            cal_dp(out_node);
-
-            
-            const int MAX_ATTEMPTS = 10;
-            
-            for(int i = 0; i < num_solutions; i++) {
-                int attempts = 0;
-                bool success = false;
-                
-                bool seek_odd = (dp[out_node].first > 0);
-                while (attempts < MAX_ATTEMPTS && !success) {
-                    attempts++;
-                    success = dfs_generate_solution(out_node, seek_odd, solutions[i]);
-                }
-            }
-            
-            return 0;
-        }
-
-        int reshape_solutions() {
-            // in solutions, each solution is a vector of bool
-            // which represents the value of each input variable like var_0[1],var_2[1]...
-            // so we need to reshape it to a reshaped_solutions
-            // which is a vector of solutions,
-            // each solution is a vector of vector of bool
-            // each vector of bool represents the value of an original input variable
-            // such as [12:0]var_0, [7:0]var_1, ...
-
-            reshaped_solutions.clear();
-            reshaped_solutions.resize(solution_num);
-            for(int i = 0 ; i < solution_num; i++){
-                reshaped_solutions[i].resize(ori_var_num);
-                for(int j = 0 ; j < ori_var_num; j++){
-                    reshaped_solutions[i][j].resize(idx_to_len[j], false);
-                }
-            }
-
-            for(int i = 0 ; i< solution_num ; i++){
-                for(int j = 0 ; j < input_num ; j++){
-                    int x = idx_to_name[j].first;
-                    int y = idx_to_name[j].second;
-                    reshaped_solutions[i][x][idx_to_len[x] - 1 - y] = solutions[i][j];
-                }
-            }
-            return 0;
-        }
-
-        vector<vector<vector<bool>>> get_solutions(){
-            return reshaped_solutions;
-        }
-};
-
-string binary_to_hex(const vector<bool>& binary) {
-    if(binary.empty()) {
-        return "0";
-    }
-
-    stringstream ss;
-    // padding 0s to make the length a multiple of 4
-    int len = binary.size();
-    int fill = (4 - len % 4) % 4;
-
-    vector<bool> new_binary = vector<bool>(fill, false);
-    new_binary.insert(new_binary.end(), binary.begin(), binary.end());
-    len += fill;
-
-    // process 4 bits at a time
-    for(int i = 0; i < len; i += 4) {
-        int value = 0;
-        for(int j = 0; j < 4 && i+j < len; j++) {
-            value = (value << 1) | (new_binary[i+j] ? 1 : 0);
-        }
-        ss << std::hex << value;
-    }
-                
-        string result = ss.str();
-
-    // remove leading zeros but keep at least one zero
-    size_t start = result.find_first_not_of('0');
-    if (start == string::npos) {
-        return "0"; 
-    }
-    return result.substr(start);
-}
-
-int output_solutions(vector<vector<vector<bool>>>& reshaped_solutions, 
-                     const string& output_file, int ori_var_num) {
-            
-    json j;
-    j["assignment_list"] = json::array();
-
-    for (const auto& solution : reshaped_solutions) {
-        json j_solution = json::array();
-                
-        // sort by the original input variable order
-        for (int var_id = 0; var_id < ori_var_num; var_id++) {
-            string hex_value = binary_to_hex(solution[var_id]);
-            j_solution.push_back({{"value", hex_value}});
-        }
-                
-        j["assignment_list"].push_back(j_solution);
-    }
-
-    ofstream out_file(output_file);
-    if (!out_file.is_open()) {
-        cerr << "Error: Failed to open output file: " << output_file << endl;
-        return -1;
-    }
-            
-    out_file << j.dump(4);
-    out_file.close();
-            
-    return 0;
-}
-
-int main(int argc, char** argv) {
-    if (argc != 6) {
-        cerr << "Usage: " << argv[0] << "<input_dir> <random_seed> <solution_num> <output_file> <split_num>" << endl;
-        return 1;
-    }
-    
-    string input_dir = argv[1];
-    int random_seed = stoi(argv[2]);
-    int solution_num = stoi(argv[3]);
-    string output_file = argv[4];
-    int split_num = stoi(argv[5]);
-
-    // process the input file to get some information
-    vector<vector<vector<bool>>> final_solutions;
-    int Input_num, Variable_num;
-    random_seed = random_seed + 114514;
-    string line;
-    vector<int> Variable_len;
-    ifstream infile(input_dir + "/json2verilog.v");
-
-    if (!infile.is_open()) {
-        cerr << "Error opening input file: " << input_dir  << "json2verilog.v"  << endl;
-        return 1;
-    }
-
-    if(getline(infile, line)){
-        int idx1 = line.rfind('_');
-        int idx2 = line.rfind(',');
-        Variable_num = stoi(line.substr(idx1 + 1, idx2 - idx1 - 1)) + 1;
-    }
-    Variable_len.resize(Variable_num, 0);
-
-    for(int i = 0; i < Variable_num; i++) {
-        if(getline(infile, line)) {
-            int idx1 = line.find('[');
-            int idx2 = line.find(':');
-            Variable_len[i] = stoi(line.substr(idx1 + 1, idx2 - idx1 - 1)) + 1;
-            Input_num += Variable_len[i];
-        }
-    }
-    infile.close();
-
-    final_solutions.resize(solution_num);
-    for(int i = 0 ; i < solution_num ; i++){
-        final_solutions[i].resize(Variable_num);
-        for(int j = 0 ; j < Variable_num ; j++){
-            final_solutions[i][j].resize(Variable_len[j], false);
-        }
-    }
-
-    cout << "split_num: " << split_num << endl;
-    // solve each split
-    for(int q = 0 ; q < split_num ; q++){
-        cout << "Processing split " << q << "..." << endl;
-        BDD_Solver solver(input_dir + "/reordered_aags/reordered_" + to_string(q) + ".aag", 
-                        input_dir + "/solution_" + to_string(q) + ".json", 
-                        random_seed, solution_num, Variable_num, Variable_len);
-
-
-        if (solver.aag_to_BDD() != 0) {
-            cerr << "Error building BDD from AAG file" << endl;
-            return 1;
-        }
-
-        
-        if (solver.generate_solutions(solution_num) != 0) {
-            cerr << "Error generating solutions" << endl;
-            return 1;
-        }
-
-
-        if (solver.reshape_solutions() != 0) {
-            cerr << "Error reshaping solutions" << endl;
-            return 1;
-        }
-
-        auto solutions = solver.get_solutions();
-        for(int i = 0 ; i < solution_num ; i++){
-            for(int j = 0 ; j < Variable_num ; j++){
-                for(int k = 0 ; k < Variable_len[j] ; k++){
-                    final_solutions[i][j][k] = solutions[i][j][k] || final_solutions[i][j][k];
-                }
-            }
-        }
-
-        cout << "Split " << q << " processed successfully." << endl;
-    }
-    cout << "All splits processed successfully." << endl;
-    // output the final solutions
-    if (output_solutions(final_solutions, output_file, Variable_num) != 0) {
-        cerr << "Error outputting solutions" << endl;
-        return 1;
-    }
-
-    cout << "Solutions generated and saved to " << output_file << endl;
-    return 0;
+#include <cstdio>
+#include <cstddef>
+#include <iostream>
+#include <fstream>
+#include <string>
+#include <vector>
+#include <sstream>
+#include <unordered_map>
+#include <cassert>
+#include <random>
+#include <iomanip>
+#include <cstring>
+#include <climits>
+#include <algorithm>
+#include <set>
+#include <chrono>
+#include <cmath>
+#include <cfloat>
+#include <quadmath.h>
+
+#include "cudd.h"
+#include "cuddInt.h"
+#include "mtr.h"
+using namespace std;
+
+// procedure:
+// 1. convert the AAG to BDD
+//     (splits built without reordering share one CUDD manager, see SharedManager)
+//     (1) read the AAG (or binary AIG) file into memory and parse it (AigerFile)
+//     (2) inputs: use Cudd_bddIthVar to create BDD variables
+//         (with a reordered_N.order file the inputs of split_N are placed by its first order)
+//     (3) ands: use Cudd_bddAnd to create BDD nodes
+//     (4) output: only 1 output, its literal is the constraint (1: unconstrained, 0: unsatisfiable)
+//     (5) names: create a map to from BDD variable index to its name
+//     (6) other candidate orders of the order file: Cudd_ShuffleHeap, keep the smallest BDD
+
+//     with --save-bdd DIR the node table of step 2 (0) and the input names are also written
+//     to DIR/split_N.bdd; --load-bdd DIR reads them back and skips this step entirely
+
+// 2. generate random solutions
+//    (0) flatten the BDD into a node table (FlatBDD) with dense, children-first node ids
+//    (1) calculate complement arc number of all nodes by dynamic programming
+//        (doubles with a per-node exponent by default, exact __float128 with --count-mode quad)
+//    (2) turn the counts into 64-bit branch thresholds per node (SampleNode table)
+//    (3) generate random solutions by walking the table:
+//        entering the child node according to probability by the number of complement arcs
+//        to make sure finally generate a route with odd complement arcs
+//        (one 64-bit random draw and one comparison per level)
+//    (4) for don't care variables, randomly assign them
+//    each sample is a packed uint64 bit array over the split's inputs
+//    (0)-(2) run once per split; (3)-(4) run once per job (the positional seed / number /
+//    output plus every --job SEED:NUM:OUTPUT), with the generator reseeded by the job's seed
+
+// 3. scatter every split's samples into packed rows (one set per job) over all variables (var_x bit y at
+//    bit offset[x] + y), through a per-split bit map, so a split only touches its own bits
+
+// 4. output the solutions: hex digits are streamed from the packed rows into a buffered
+//    writer in the layout of nlohmann::json::dump(4), without building a json tree:
+//        {
+//        "assignment_list": [
+//            // 第一组解
+//            [
+//            { "value": "2fd3d29"}, // id=0的变量赋值
+//            { "value": "a0a1"}, // id=1的变量赋值
+//            ...
+//            ],
+//            // 第二组解
+//            [
+//            ...
+//            ]
+//        ]
+//        }
+
+// 5. clean up
+
+// In-memory AIGER file: ascii (aag) or binary (aig) format, combinational part only.
+struct AigerFile {
+    unsigned max_idx = 0, input_num = 0, latch_num = 0, output_num = 0, and_num = 0;
+    vector<unsigned> inputs;                // input literals
+    vector<unsigned> outputs;               // output literals
+    vector<unsigned> and_lhs, and_rhs0, and_rhs1;
+    vector<pair<int, int>> input_names;     // var_x[y] of each input -> {x, y}
+};
+
+// hand-written scanner over the whole file kept in memory
+class AigerScanner {
+    public:
+        explicit AigerScanner(string data) : buf(std::move(data)), pos(0) {}
+
+        bool eof() const { return pos >= buf.size(); }
+        char peek() const { return eof() ? '\0' : buf[pos]; }
+
+        void skip_blanks() {
+            while (pos < buf.size() && (buf[pos] == ' ' || buf[pos] == '\t' || buf[pos] == '\r')) pos++;
+        }
+
+        void skip_whitespace() {
+            while (pos < buf.size() && isspace((unsigned char)buf[pos])) pos++;
+        }
+
+        bool read_word(const char* word) {
+            size_t len = strlen(word);
+            if (buf.compare(pos, len, word) != 0) return false;
+            pos += len;
+            return true;
+        }
+
+        // unsigned decimal integer, skipping leading whitespace (newlines included)
+        bool read_uint(unsigned& value) {
+            skip_whitespace();
+            if (eof() || !isdigit((unsigned char)buf[pos])) return false;
+            unsigned long long v = 0;
+            while (pos < buf.size() && isdigit((unsigned char)buf[pos])) {
+                v = v * 10 + (buf[pos++] - '0');
+                if (v > UINT_MAX) return false;
+            }
+            value = (unsigned)v;
+            return true;
+        }
+
+        // binary AIGER delta: 7 bits per byte, high bit set on all but the last byte
+        bool read_delta(unsigned& value) {
+            unsigned long long v = 0;
+            unsigned shift = 0;
+            unsigned char ch;
+            do {
+                if (eof() || shift > 28) return false;
+                ch = (unsigned char)buf[pos++];
+                v |= (unsigned long long)(ch & 0x7f) << shift;
+                shift += 7;
+            } while (ch & 0x80);
+            if (v > UINT_MAX) return false;
+            value = (unsigned)v;
+            return true;
+        }
+
+        // the rest of the current line (without '\r\n'), moving to the next line
+        void read_line(const char*& begin, const char*& end) {
+            size_t stop = buf.find('\n', pos);
+            if (stop == string::npos) stop = buf.size();
+            begin = buf.data() + pos;
+            end = buf.data() + stop;
+            while (end > begin && end[-1] == '\r') end--;
+            pos = stop < buf.size() ? stop + 1 : stop;
+        }
+
+        void skip_line() {
+            const char *begin, *end;
+            read_line(begin, end);
+        }
+
+    private:
+        string buf;
+        size_t pos;
+};
+
+// parse "var_x[y]" without regex
+bool parse_var_symbol(const char* p, const char* end, int& x, int& y) {
+    auto read_int = [&p, end](int& v) {
+        if (p >= end || !isdigit((unsigned char)*p)) return false;
+        v = 0;
+        while (p < end && isdigit((unsigned char)*p)) v = v * 10 + (*p++ - '0');
+        return true;
+    };
+    if (end - p < 4 || memcmp(p, "var_", 4) != 0) return false;
+    p += 4;
+    if (!read_int(x) || p >= end || *p++ != '[') return false;
+    if (!read_int(y) || p >= end || *p++ != ']') return false;
+    return p == end;
+}
+
+// read an aag/aig file into memory; the format is taken from the header
+bool load_aiger(const string& path, AigerFile& aig, string& error) {
+    ifstream file(path, ios::binary);
+    if (!file.is_open()) {
+        error = "Failed to open AAG file: " + path;
+        return false;
+    }
+    stringstream content;
+    content << file.rdbuf();
+    AigerScanner in(content.str());
+
+    bool binary;
+    if (in.read_word("aag ")) {
+        binary = false;
+    } else if (in.read_word("aig ")) {
+        binary = true;
+    } else {
+        error = "Invalid AAG file format: " + path;
+        return false;
+    }
+    if (!in.read_uint(aig.max_idx) || !in.read_uint(aig.input_num) || !in.read_uint(aig.latch_num) ||
+        !in.read_uint(aig.output_num) || !in.read_uint(aig.and_num)) {
+        error = "Invalid AIGER header: " + path;
+        return false;
+    }
+    in.skip_line();
+
+    // inputs: explicit literals in aag, implicit 2, 4, ... in aig
+    aig.inputs.resize(aig.input_num);
+    for (unsigned i = 0; i < aig.input_num; i++) {
+        if (binary) {
+            aig.inputs[i] = 2 * (i + 1);
+        } else if (!in.read_uint(aig.inputs[i])) {
+            error = "Invalid input line";
+            return false;
+        }
+    }
+    if (!binary && aig.input_num > 0) in.skip_line();
+
+    // latches are not used by the solver, skip their lines
+    for (unsigned i = 0; i < aig.latch_num; i++) {
+        in.skip_line();
+    }
+
+    aig.outputs.resize(aig.output_num);
+    for (unsigned i = 0; i < aig.output_num; i++) {
+        if (!in.read_uint(aig.outputs[i])) {
+            error = "Invalid output line";
+            return false;
+        }
+    }
+    if (aig.output_num > 0) in.skip_line();
+
+    aig.and_lhs.resize(aig.and_num);
+    aig.and_rhs0.resize(aig.and_num);
+    aig.and_rhs1.resize(aig.and_num);
+    for (unsigned i = 0; i < aig.and_num; i++) {
+        if (binary) {
+            // lhs is implicit; rhs0 = lhs - delta0, rhs1 = rhs0 - delta1
+            unsigned lhs = 2 * (aig.input_num + aig.latch_num + i + 1);
+            unsigned delta0, delta1;
+            if (!in.read_delta(delta0) || !in.read_delta(delta1) || delta0 > lhs || delta1 > lhs - delta0) {
+                error = "Invalid binary AND gate";
+                return false;
+            }
+            aig.and_lhs[i] = lhs;
+            aig.and_rhs0[i] = lhs - delta0;
+            aig.and_rhs1[i] = lhs - delta0 - delta1;
+        } else if (!in.read_uint(aig.and_lhs[i]) || !in.read_uint(aig.and_rhs0[i]) ||
+                   !in.read_uint(aig.and_rhs1[i])) {
+            error = "Invalid AND line";
+            return false;
+        }
+    }
+    if (!binary && aig.and_num > 0) in.skip_line();
+
+    // symbol table until the comment section: only "i<idx> var_x[y]" is needed
+    aig.input_names.assign(aig.input_num, {0, 0});
+    while (!in.eof()) {
+        char kind = in.peek();
+        const char *begin, *end;
+        if (kind == 'c') break;
+        in.read_line(begin, end);
+        if (kind != 'i') continue;
+
+        const char* p = begin + 1;
+        unsigned idx = 0;
+        bool has_idx = p < end && isdigit((unsigned char)*p);
+        while (p < end && isdigit((unsigned char)*p)) idx = idx * 10 + (*p++ - '0');
+        if (!has_idx || p >= end || *p != ' ' || idx >= aig.input_num) continue;
+
+        int x = 0, y = 0;
+        parse_var_symbol(p + 1, end, x, y);
+        aig.input_names[idx] = {x, y};
+    }
+
+    return true;
+}
+
+// read the candidate input orders written by the reorder scripts (reordered_N.order):
+// one order per line, order[new] = old, "#" lines are labels.
+// lines that are not a permutation of 0..input_num-1 are skipped with a warning
+bool load_order_candidates(const string& path, unsigned input_num, vector<vector<int>>& orders, string& error) {
+    ifstream file(path);
+    if (!file.is_open()) {
+        error = "Failed to open order file: " + path;
+        return false;
+    }
+
+    orders.clear();
+    string line;
+    int line_no = 0;
+    while (getline(file, line)) {
+        line_no++;
+        if (line.empty() || line[0] == '#') continue;
+
+        vector<int> order;
+        vector<bool> seen(input_num, false);
+        istringstream values(line);
+        long long old;
+        bool valid = true;
+        while (values >> old) {
+            if (old < 0 || old >= (long long)input_num || seen[old]) {
+                valid = false;
+                break;
+            }
+            seen[old] = true;
+            order.push_back((int)old);
+        }
+        if (!valid || !values.eof() || order.size() != input_num) {
+            cerr << "Warning: skipping invalid order on line " << line_no << " of " << path << endl;
+            continue;
+        }
+        orders.push_back(move(order));
+    }
+
+    if (orders.empty()) {
+        error = "No valid order in " + path;
+        return false;
+    }
+    return true;
+}
+
+// Variable widths written by json2verilog next to json2verilog.v:
+// one "<index> <bit_width>" line per variable, '#' lines are comments.
+const char* WIDTH_FILE = "json2verilog.widths";
+
+// fallback for run directories without the sidecar: the port list and the
+// "input [w-1:0] var_i;" declarations at the top of json2verilog.v
+bool parse_verilog_widths(const string& path, vector<int>& widths, string& error) {
+    ifstream infile(path);
+    if (!infile.is_open()) {
+        error = "Cannot open " + path;
+        return false;
+    }
+
+    string line;
+    int variable_num = 0;
+    if (getline(infile, line)) {
+        size_t idx1 = line.rfind('_');
+        size_t idx2 = line.rfind(',');
+        if (idx1 != string::npos && idx2 != string::npos && idx2 > idx1) {
+            variable_num = stoi(line.substr(idx1 + 1, idx2 - idx1 - 1)) + 1;
+        }
+    }
+    widths.assign(variable_num, 0);
+    for (int i = 0; i < variable_num && getline(infile, line); i++) {
+        size_t idx1 = line.find('[');
+        size_t idx2 = line.find(':');
+        if (idx1 == string::npos || idx2 == string::npos) {
+            error = "Malformed input declaration in " + path + ": " + line;
+            return false;
+        }
+        widths[i] = stoi(line.substr(idx1 + 1, idx2 - idx1 - 1)) + 1;
+    }
+    return true;
+}
+
+bool load_variable_widths(const string& input_dir, vector<int>& widths, string& error) {
+    ifstream in(input_dir + "/" + WIDTH_FILE);
+    if (!in.is_open()) {
+        return parse_verilog_widths(input_dir + "/json2verilog.v", widths, error);
+    }
+
+    widths.clear();
+    string line;
+    while (getline(in, line)) {
+        if (line.empty() || line[0] == '#') continue;
+        istringstream fields(line);
+        int index, width;
+        if (!(fields >> index >> width) || index != (int)widths.size() || width <= 0) {
+            error = "Malformed line in " + input_dir + "/" + WIDTH_FILE + ": " + line;
+            return false;
+        }
+        widths.push_back(width);
+    }
+    return true;
+}
+
+// Flat, pointer-free copy of a BDD.
+// Node 0 is the constant-one terminal; every other node id is larger than the ids of
+// its children, so a single forward sweep over the table is a post-order traversal.
+// Edges are refs: (node id << 1) | complement bit, as in CUDD the then-edge is regular.
+struct FlatBDD {
+    vector<int> var;            // variable index of each node (-1 for the terminal)
+    vector<unsigned> then_ref;
+    vector<unsigned> else_ref;
+    unsigned root = 0;
+
+    size_t size() const { return var.size(); }
+    static bool is_complement(unsigned ref) { return ref & 1u; }
+    static unsigned node_of(unsigned ref) { return ref >> 1; }
+    static bool is_one(unsigned ref) { return ref == 0u; }
+};
+
+// Compiled split, written by --save-bdd and read back by --load-bdd (the BDD cache of run.sh):
+//   8-byte magic, int32 input_num, and_num, no_constraint, uint32 node_count, root,
+//   input_num x (int32 x, int32 y) input names, then the var, then_ref and else_ref arrays.
+// Native byte order, the cache is local to the machine that wrote it.
+const char COMPILED_MAGIC[8] = {'F', 'L', 'A', 'T', 'B', 'D', 'D', '1'};
+
+// build the node table of the BDD rooted at root with an explicit stack (no recursion)
+// variable indices are stored relative to var_base, the first variable of the split
+FlatBDD flatten_bdd(DdManager* manager, DdNode* root, int var_base) {
+    FlatBDD flat;
+    unordered_map<DdNode*, unsigned> node_id;
+
+    DdNode* one = Cudd_Regular(Cudd_ReadOne(manager));
+    node_id[one] = 0;
+    flat.var.push_back(-1);
+    flat.then_ref.push_back(0);
+    flat.else_ref.push_back(0);
+
+    auto ref_of = [&node_id](DdNode* node) {
+        return (node_id.at(Cudd_Regular(node)) << 1) | (Cudd_IsComplement(node) ? 1u : 0u);
+    };
+
+    vector<DdNode*> stack;
+    stack.push_back(Cudd_Regular(root));
+    while (!stack.empty()) {
+        DdNode* node = stack.back();
+        if (node_id.count(node)) {
+            stack.pop_back();
+            continue;
+        }
+        DdNode* T = Cudd_Regular(Cudd_T(node));
+        DdNode* E = Cudd_Regular(Cudd_E(node));
+        bool children_done = true;
+        if (!node_id.count(T)) { stack.push_back(T); children_done = false; }
+        if (!node_id.count(E)) { stack.push_back(E); children_done = false; }
+        if (!children_done) continue;
+
+        stack.pop_back();
+        node_id[node] = flat.var.size();
+        flat.var.push_back((int)Cudd_NodeReadIndex(node) - var_base);
+        flat.then_ref.push_back(ref_of(Cudd_T(node)));
+        flat.else_ref.push_back(ref_of(Cudd_E(node)));
+    }
+
+    flat.root = ref_of(root);
+    return flat;
+}
+
+// Sampling table entry: then-branch probability of a node as a threshold on a 63-bit draw.
+// The branch probability depends on how the node is entered (regular or complemented
+// edge) and on the parity of complement arcs still required, so a node has 4 thresholds
+// indexed by (complement << 1) | parity. A threshold of 2^63 means "always then".
+struct SampleNode {
+    unsigned then_ref;
+    unsigned else_ref;
+    int var;
+    uint64_t threshold[4];
+};
+
+const uint64_t THRESHOLD_ONE = 1ULL << 63;
+
+// Path count precision (--count-mode).
+// double: every node keeps its 4 counts as doubles scaled by one shared power of two,
+//         native FP adds, the branch ratios are exact to double rounding;
+// quad:   exact __float128 counts (libquadmath), also used when the scaled doubles underflow;
+// verify: both, reports the largest threshold difference and samples with quad.
+enum CountMode { COUNT_DOUBLE, COUNT_QUAD, COUNT_VERIFY };
+
+bool parse_count_mode(const string& mode, CountMode& count_mode) {
+    if (mode == "double") {
+        count_mode = COUNT_DOUBLE;
+    } else if (mode == "quad") {
+        count_mode = COUNT_QUAD;
+    } else if (mode == "verify") {
+        count_mode = COUNT_VERIFY;
+    } else {
+        return false;
+    }
+    return true;
+}
+
+// a node's scaled counts are renormalized once the largest leaves [2^-bits, 2^bits],
+// so the exponent only changes every few hundred levels
+const int COUNT_RESCALE_BITS = 512;
+
+// Dynamic reordering settings (--reorder / --reorder-nodes).
+// min_nodes == 0 keeps the original rule: sifting only for more than 30 inputs, CUDD's
+// default first threshold; otherwise reordering is always enabled and first runs once
+// the manager holds min_nodes live nodes.
+struct ReorderPolicy {
+    bool enabled = true;
+    Cudd_ReorderingType method = CUDD_REORDER_SIFT;
+    bool groups = false;        // register var_x bit groups with Cudd_MakeTreeNode
+    unsigned min_nodes = 0;
+
+    // whether a split with this many inputs is built with dynamic reordering
+    bool active(int input_num) const {
+        return enabled && !(min_nodes == 0 && input_num <= 30);
+    }
+};
+
+// One manager for all splits that are built without reordering (--manager shared):
+// each such split adds its own range of BDD variables and releases its nodes when done,
+// so hundreds of small splits do not pay a Cudd_Init / Cudd_Quit each. Splits that
+// reorder get a manager of their own, sifting never sees the other splits' variables.
+// With --max-memory every split gets its own manager too: the budget check forces
+// Cudd_ReduceHeap, which on the shared manager would sift all earlier splits' ranges.
+struct SharedManager {
+    DdManager* manager = nullptr;
+
+    ~SharedManager() {
+        if (manager != nullptr) {
+            Cudd_Quit(manager);
+        }
+    }
+};
+
+// the --reorder modes: none | sift | group-sift | group-converge
+bool parse_reorder_mode(const string& mode, ReorderPolicy& policy) {
+    if (mode == "none") {
+        policy.enabled = false;
+    } else if (mode == "sift") {
+        policy.enabled = true;
+        policy.method = CUDD_REORDER_SIFT;
+        policy.groups = false;
+    } else if (mode == "group-sift") {
+        policy.enabled = true;
+        policy.method = CUDD_REORDER_GROUP_SIFT;
+        policy.groups = true;
+    } else if (mode == "group-converge") {
+        policy.enabled = true;
+        policy.method = CUDD_REORDER_GROUP_SIFT_CONV;
+        policy.groups = true;
+    } else {
+        return false;
+    }
+    return true;
+}
+
+// level ranges whose words overlap are merged into one interleaved group,
+// unless the merged range mixes more words than this
+const int GROUP_MAX_WORDS = 4;
+
+// initial CUDD table sizes are derived from the AIG size (see size_cudd_tables)
+const unsigned MIN_UNIQUE_SLOTS = 64;               // per variable subtable
+const unsigned MAX_UNIQUE_SLOTS = CUDD_UNIQUE_SLOTS * 16;
+const unsigned MIN_CACHE_SLOTS = 1u << 12;
+const unsigned MAX_CACHE_SLOTS = 1u << 22;
+const unsigned CACHE_SLOTS_PER_NODE = 8;            // computed table slots per AIG node
+// with --max-memory: force a reordering pass once this fraction of the budget is in use,
+// checked every MEMORY_CHECK_INTERVAL AND gates
+const double MEMORY_REORDER_FRACTION = 0.8;
+const int MEMORY_CHECK_INTERVAL = 256;
+// unique table grows fast up to budget / (sizeof(DdNode) * LOOSE_UP_TO_FRACTION) slots
+const size_t LOOSE_UP_TO_FRACTION = 5;
+
+unsigned round_up_pow2(unsigned long long x, unsigned low, unsigned high) {
+    unsigned long long v = low;
+    while (v < x && v < high) v <<= 1;
+    return (unsigned)min<unsigned long long>(v, high);
+}
+
+// unique subtable and computed table sizes for an AIG with the given inputs and AND gates;
+// tiny splits no longer allocate CUDD's default 256K-entry cache, big ones start with a larger one
+void size_cudd_tables(unsigned input_num, unsigned and_num, size_t max_memory,
+                      unsigned& unique_slots, unsigned& cache_slots) {
+    unsigned long long nodes_per_var = 2ULL * and_num / max(input_num, 1u);
+    unique_slots = round_up_pow2(nodes_per_var, MIN_UNIQUE_SLOTS, MAX_UNIQUE_SLOTS);
+    cache_slots = round_up_pow2((unsigned long long)CACHE_SLOTS_PER_NODE * (and_num + input_num),
+                                MIN_CACHE_SLOTS, MAX_CACHE_SLOTS);
+    // leave most of a memory budget to the nodes
+    while (max_memory > 0 && cache_slots > MIN_CACHE_SLOTS &&
+           (size_t)cache_slots * sizeof(DdCache) > max_memory / 4) {
+        cache_slots >>= 1;
+    }
+}
+
+class BDD_Solver {
+    public:
+        string input_file;
+        string output_file;
+        int random_seed;
+        int solution_num;
+
+        DdManager *manager;
+        DdNode *out_node;
+
+        // with a shared manager the split's inputs are BDD variables var_base .. var_base + input_num - 1,
+        // everything below (idx_to_name, FlatBDD, samples) is indexed relative to var_base
+        SharedManager* shared;
+        bool owns_manager;
+        int var_base;
+        unsigned reorderings_before;    // manager reordering count when the split started
+        vector<DdNode*> nodes; // map from AAG index to BDD node
+
+        // map from BDD index to its name
+        // name format: var_x[y] -> so record int x and y is ok
+        vector<pair<int, int>> idx_to_name;
+
+        // optional permutation file (reordered_N.order) applied to the inputs of input_file,
+        // its first order decides the BDD variable indices, the others are tried with Cudd_ShuffleHeap
+        string order_file;
+        vector<vector<int>> candidate_orders;
+        int chosen_order;
+
+        ReorderPolicy reorder;
+        int group_num;
+
+        // memory budget in bytes (0: no limit, CUDD's own default), see --max-memory
+        size_t max_memory;
+        size_t next_memory_check;   // memory in use that triggers the next forced reordering
+        int forced_reorderings;
+        unsigned unique_slots, cache_slots;
+
+        // aag config
+        int max_idx, input_num, latch_num, output_num, and_num, ori_var_num;
+        vector<int> idx_to_len;// the length of each original input variable
+
+        // flat copy of the output BDD used by the DP and the sampler
+        FlatBDD flat;
+
+        // record path number from current node to 1-th node with odd or even complement arcs
+        // 0: odd_cnt, 1: even_cnt
+        // dp_pos[n]: node n entered through a regular edge, dp_neg[n]: through a complemented edge
+        vector<pair<__float128, __float128>> dp_pos, dp_neg;
+
+        // double mode: node n has count dp_scaled[4 * n + k] * 2^dp_exp[n],
+        // k = (complement << 1) | odd, indexed like SampleNode::threshold
+        CountMode count_mode;
+        vector<double> dp_scaled;
+        vector<int> dp_exp;
+
+        // branch thresholds built from the DP, indexed like flat
+        vector<SampleNode> sampler;
+
+        // random number generator
+        std::mt19937_64 rng;
+
+        // samples: solution i is sample_words[i * sample_word_num ...], bit j = BDD variable j
+        vector<uint64_t> sample_words;
+        int sample_word_num;
+
+        bool no_constraint;
+        bool seek_odd;      // parity of complement arcs on the paths to the one terminal
+
+        // the node table was read with load_compiled, there is no manager and no AIG
+        bool compiled;
+
+        BDD_Solver(const string& input, const string& output, int seed, int num_solutions, int var_num , vector<int> idx_to_len) 
+            : input_file(input), output_file(output), random_seed(seed), solution_num(num_solutions), ori_var_num(var_num), idx_to_len(idx_to_len) {
+            
+            rng = std::mt19937_64(random_seed);
+
+            // created in aag_to_BDD once the AIG size is known
+            manager = nullptr;
+            out_node = nullptr;
+            shared = nullptr;
+            owns_manager = false;
+            var_base = 0;
+            reorderings_before = 0;
+            max_memory = 0;
+            next_memory_check = 0;
+            forced_reorderings = 0;
+            unique_slots = 0;
+            cache_slots = 0;
+            sample_word_num = 0;
+            count_mode = COUNT_DOUBLE;
+            
+            max_idx = 0;
+            input_num = 0;
+            latch_num = 0;
+            output_num = 0;
+            and_num = 0;
+            no_constraint = false;
+            seek_odd = false;
+            compiled = false;
+            chosen_order = 0;
+            group_num = 0;
+        }
+        
+        ~BDD_Solver() {
+            for (auto node : nodes) {
+                if (node != nullptr) {
+                    Cudd_RecursiveDeref(manager, node);
+                }
+            }
+            nodes.clear();
+            if (out_node != nullptr && !no_constraint) {
+                Cudd_RecursiveDeref(manager, out_node);
+                out_node = nullptr;
+            }
+            if (manager != nullptr && owns_manager) {
+                Cudd_Quit(manager);
+            }
+            manager = nullptr;
+        }
+
+        int aag_to_BDD(){
+            AigerFile aig;
+            string error;
+            if (!load_aiger(input_file, aig, error)) {
+                cerr << "Error: " << error << endl;
+                return -1;
+            }
+
+            max_idx = aig.max_idx;
+            input_num = aig.input_num;
+            latch_num = aig.latch_num;
+            output_num = aig.output_num;
+            and_num = aig.and_num;
+
+            // the output literal decides, not the AND count: a split can reduce to a bare
+            // (possibly negated) input, e.g. a single-bit constraint. Literal 1 (or no output)
+            // leaves the inputs unconstrained, literal 0 can never be satisfied.
+            int output_idx = output_num > 0 ? aig.outputs[0] : 1;
+            if(output_idx == 0){
+                cerr << "Error: " << input_file << " is unsatisfiable (constant false output)" << endl;
+                return -1;
+            }
+            no_constraint = (output_idx == 1);
+
+            if (shared != nullptr && max_memory == 0 && !reorder.active(input_num)) {
+                // the first such split sizes the shared tables, CUDD grows them for later splits
+                if (shared->manager == nullptr) {
+                    shared->manager = init_manager(0);
+                    if (shared->manager == nullptr) return -1;
+                }
+                manager = shared->manager;
+                var_base = Cudd_ReadSize(manager);
+            } else {
+                manager = init_manager(input_num);
+                if (manager == nullptr) return -1;
+                owns_manager = true;
+            }
+            reorderings_before = Cudd_ReadReorderings(manager);
+            if (max_memory > 0) {
+                next_memory_check = (size_t)(max_memory * MEMORY_REORDER_FRACTION);
+            }
+
+
+            // initialize 
+            nodes.resize(max_idx);
+
+            // input i of the file becomes BDD variable var_of_input[i] (identity without an order file)
+            vector<int> var_of_input(input_num);
+            for(int i = 0 ; i < input_num ; i++){
+                var_of_input[i] = i;
+            }
+            if(!order_file.empty() && input_num > 0){
+                if (!load_order_candidates(order_file, input_num, candidate_orders, error)) {
+                    cerr << "Error: " << error << endl;
+                    return -1;
+                }
+                const vector<int>& order = candidate_orders[0];
+                for(int pos = 0 ; pos < input_num ; pos++){
+                    var_of_input[order[pos]] = pos;
+                }
+            }
+            idx_to_name.assign(input_num, {0, 0});
+            for(int i = 0 ; i < input_num ; i++){
+                idx_to_name[var_of_input[i]] = aig.input_names[i];
+            }
+
+            // inputs
+            for(int i = 0 ; i < input_num ; i++){
+                int idx = aig.inputs[i];
+                DdNode* node = Cudd_bddIthVar(manager, var_base + var_of_input[i]);
+                Cudd_Ref(node);
+                nodes[idx / 2 - 1] = node;// aag input first index is 2
+            }
+
+            // groups and dynamic reordering must be set up before the ANDs are built
+            apply_reorder_policy();
+
+
+            // ands
+            for(int i = 0 ; i < and_num ; i++){
+                int out = aig.and_lhs[i], in1 = aig.and_rhs0[i], in2 = aig.and_rhs1[i];
+                DdNode *In1, *In2, *Out;
+
+                if(in1 / 2 == 0){// constant
+                     In1 = (in1 % 2 == 0) ? Cudd_ReadOne(manager) : Cudd_ReadLogicZero(manager);
+                } else{
+                    In1 = (in1 % 2 == 0) ? nodes[in1 / 2 - 1] : Cudd_Not(nodes[in1 / 2 - 1]);
+                }
+
+                if(in2 / 2 == 0){// constant
+                     In2 = (in2 % 2 == 0) ? Cudd_ReadOne(manager) : Cudd_ReadLogicZero(manager);
+                } else{
+                    In2 = (in2 % 2 == 0) ? nodes[in2 / 2 - 1] : Cudd_Not(nodes[in2 / 2 - 1]);
+                }
+
+                Out = Cudd_bddAnd(manager, In1, In2);
+                if (Out == nullptr) {
+                    report_cudd_failure();
+                    return -1;
+                }
+                Cudd_Ref(Out);
+                nodes[out / 2 - 1] = Out;
+
+                if (max_memory > 0 && i % MEMORY_CHECK_INTERVAL == 0) {
+                    check_memory_budget();
+                }
+            }
+
+
+            // if output is a odd, then an additional inverter is needed
+            if(!no_constraint){
+                out_node = output_idx % 2 == 0 ? nodes[output_idx / 2 - 1] : Cudd_Not(nodes[output_idx / 2 - 1]);
+                Cudd_Ref(out_node);
+            }
+            else{
+                out_node = Cudd_ReadOne(manager); // if no constraint, output is always true
+            }
+
+            if(!no_constraint && candidate_orders.size() > 1){
+                choose_order(var_of_input);
+            }
+
+            return 0;
+        }
+
+        // a manager with tables sized for this split (see size_cudd_tables) and the memory budget
+        DdManager* init_manager(int var_num) {
+            size_cudd_tables(input_num, and_num, max_memory, unique_slots, cache_slots);
+            DdManager* dd = Cudd_Init(var_num, 0, unique_slots, cache_slots, max_memory);
+            if (!dd) {
+                cerr << "Error: Failed to initialize CUDD manager" << endl;
+                return nullptr;
+            }
+            cout << "cudd tables: unique_slots=" << unique_slots << " cache_slots=" << cache_slots
+                 << (var_num == 0 ? " (shared)" : "") << endl;
+            if (max_memory > 0) {
+                Cudd_SetMaxMemory(dd, max_memory);
+                Cudd_SetLooseUpTo(dd, (unsigned)min<size_t>(max_memory / sizeof(DdNode) / LOOSE_UP_TO_FRACTION, UINT_MAX));
+            }
+            return dd;
+        }
+
+        void report_cudd_failure() {
+            Cudd_ErrorType code = Cudd_ReadErrorCode(manager);
+            if (code == CUDD_MAX_MEM_EXCEEDED) {
+                cerr << "Error: BDD construction exceeded the memory budget of "
+                     << max_memory / (1024 * 1024) << " MB (--max-memory)" << endl;
+            } else if (code == CUDD_MEMORY_OUT) {
+                cerr << "Error: CUDD ran out of memory during BDD construction" << endl;
+            } else {
+                cerr << "Error: CUDD failed during BDD construction (error code " << (int)code << ")" << endl;
+            }
+        }
+
+        // near the budget, shrink the BDDs by a forced reordering pass instead of letting
+        // CUDD grow its tables; the next pass only happens after memory grows again
+        void check_memory_budget() {
+            size_t in_use = Cudd_ReadMemoryInUse(manager);
+            if (in_use < next_memory_check) return;
+
+            Cudd_ReorderingType method = reorder.enabled ? reorder.method : CUDD_REORDER_SIFT;
+            if (Cudd_ReduceHeap(manager, method, 0)) {
+                forced_reorderings++;
+            }
+            size_t headroom = (max_memory - min(in_use, max_memory)) / 2;
+            next_memory_check = in_use + max<size_t>(headroom, max_memory / 64);
+        }
+
+        void apply_reorder_policy() {
+            if (!reorder.active(input_num)) return;
+
+            if (reorder.groups) make_variable_groups();
+            if (reorder.min_nodes > 0) Cudd_SetNextReordering(manager, reorder.min_nodes);
+            Cudd_AutodynEnable(manager, reorder.method);
+        }
+
+        // One group per multi-bit word var_x (the levels its bits occupy), so group sifting
+        // moves bit-vectors as a whole. Words whose level ranges overlap (interleaved bits,
+        // e.g. a[0] b[0] a[1] b[1]) share one group; if such a range mixes too many words,
+        // only the runs of consecutive bits of one word inside it are grouped.
+        // Called right after the inputs are created, when level == variable index.
+        void make_variable_groups() {
+            unordered_map<int, pair<int, int>> word_range;   // x -> [first level, last level]
+            for(int level = 0 ; level < input_num ; level++){
+                int x = idx_to_name[Cudd_ReadInvPerm(manager, level)].first;
+                auto it = word_range.find(x);
+                if (it == word_range.end()) {
+                    word_range[x] = {level, level};
+                } else {
+                    it->second.second = level;
+                }
+            }
+
+            vector<pair<int, int>> ranges;
+            for (const auto& entry : word_range) ranges.push_back(entry.second);
+            sort(ranges.begin(), ranges.end());
+
+            auto make_group = [this](int low_level, int high_level) {
+                if (high_level <= low_level) return;
+                unsigned low = Cudd_ReadInvPerm(manager, low_level);
+                if (Cudd_MakeTreeNode(manager, low, high_level - low_level + 1, MTR_DEFAULT) != nullptr) {
+                    group_num++;
+                }
+            };
+
+            size_t i = 0;
+            while (i < ranges.size()) {
+                int low = ranges[i].first, high = ranges[i].second;
+                size_t words = 1;
+                for (i++; i < ranges.size() && ranges[i].first <= high; i++, words++) {
+                    high = max(high, ranges[i].second);
+                }
+                if ((int)words <= GROUP_MAX_WORDS) {
+                    make_group(low, high);
+                    continue;
+                }
+                int run_start = low;
+                for (int level = low + 1 ; level <= high + 1 ; level++) {
+                    if (level > high || idx_to_name[Cudd_ReadInvPerm(manager, level)].first !=
+                                        idx_to_name[Cudd_ReadInvPerm(manager, run_start)].first) {
+                        make_group(run_start, level - 1);
+                        run_start = level;
+                    }
+                }
+            }
+            cout << "variable groups: " << group_num << endl;
+        }
+
+        // try the remaining candidate orders on the built BDD and keep the smallest one
+        void choose_order(const vector<int>& var_of_input) {
+            // the heap as built (candidate 0, possibly improved by dynamic reordering);
+            // candidates only permute the levels held by this split's variables
+            int heap_size = Cudd_ReadSize(manager);
+            vector<int> best_perm(heap_size), split_levels;
+            for(int level = 0 ; level < heap_size ; level++){
+                best_perm[level] = Cudd_ReadInvPerm(manager, level);
+                if (best_perm[level] >= var_base && best_perm[level] < var_base + input_num) {
+                    split_levels.push_back(level);
+                }
+            }
+            vector<int> perm = best_perm;
+            int best_size = Cudd_DagSize(out_node);
+            cout << "order candidate 0: " << best_size << " nodes" << endl;
+
+            for(size_t k = 1 ; k < candidate_orders.size() ; k++){
+                for(int pos = 0 ; pos < input_num ; pos++){
+                    perm[split_levels[pos]] = var_base + var_of_input[candidate_orders[k][pos]];
+                }
+                if (!Cudd_ShuffleHeap(manager, perm.data())) {
+                    cerr << "Warning: Cudd_ShuffleHeap failed for order candidate " << k << endl;
+                    continue;
+                }
+                int size = Cudd_DagSize(out_node);
+                cout << "order candidate " << k << ": " << size << " nodes" << endl;
+                if(size < best_size){
+                    best_size = size;
+                    best_perm = perm;
+                    chosen_order = (int)k;
+                }
+            }
+
+            bool at_best = true;
+            for(int level = 0 ; level < heap_size ; level++){
+                at_best = at_best && Cudd_ReadInvPerm(manager, level) == best_perm[level];
+            }
+            if(!at_best && !Cudd_ShuffleHeap(manager, best_perm.data())){
+                cerr << "Warning: failed to restore the best order candidate" << endl;
+            }
+            cout << "chosen order candidate " << chosen_order << " (" << best_size << " nodes)" << endl;
+        }
+
+        const pair<__float128, __float128>& path_count(unsigned ref) const {
+            return FlatBDD::is_complement(ref) ? dp_neg[FlatBDD::node_of(ref)] : dp_pos[FlatBDD::node_of(ref)];
+        }
+
+        void cal_dp() {
+            // children precede parents in the node table: one forward sweep, no recursion
+            size_t n = flat.size();
+            dp_pos.assign(n, {(__float128)0.0, (__float128)0.0});
+            dp_neg.assign(n, {(__float128)0.0, (__float128)0.0});
+
+            // for constant node: the one terminal counts as an even path, the zero terminal as none
+            dp_pos[0] = {(__float128)0.0, (__float128)1.0};
+            dp_neg[0] = {(__float128)0.0, (__float128)0.0};
+
+            for (size_t i = 1; i < n; i++) {
+                unsigned T = flat.then_ref[i];
+                unsigned E = flat.else_ref[i];
+
+                // regular entry: sum of the children
+                const auto& t_pos = path_count(T);
+                const auto& e_pos = path_count(E);
+                dp_pos[i] = {t_pos.first + e_pos.first, t_pos.second + e_pos.second};
+
+                // complemented entry: children are complemented too, and odd/even swap
+                const auto& t_neg = path_count(T ^ 1u);
+                const auto& e_neg = path_count(E ^ 1u);
+                dp_neg[i] = {t_neg.second + e_neg.second, t_neg.first + e_neg.first};
+            }
+        }
+
+        void build_sampler() {
+            size_t n = flat.size();
+            sampler.assign(n, SampleNode{0, 0, -1, {0, 0, 0, 0}});
+
+            for (size_t i = 1; i < n; i++) {
+                SampleNode& node = sampler[i];
+                node.then_ref = flat.then_ref[i];
+                node.else_ref = flat.else_ref[i];
+                node.var = flat.var[i];
+
+                for (unsigned complement = 0; complement < 2; complement++) {
+                    // entering through a complemented edge complements both children
+                    const auto& t_result = path_count(node.then_ref ^ complement);
+                    const auto& e_result = path_count(node.else_ref ^ complement);
+
+                    for (unsigned odd = 0; odd < 2; odd++) {
+                        __float128 cnt_T = odd ? t_result.first : t_result.second;
+                        __float128 cnt_E = odd ? e_result.first : e_result.second;
+                        __float128 total_cnt = cnt_T + cnt_E;
+
+                        uint64_t threshold = THRESHOLD_ONE / 2;
+                        if (total_cnt > 0) {
+                            threshold = (uint64_t)(cnt_T / total_cnt * (__float128)THRESHOLD_ONE);
+                        }
+                        node.threshold[(complement << 1) | odd] = threshold;
+                    }
+                }
+            }
+        }
+
+        // double-mode count of the paths from ref with the given parity, as mantissa and exponent
+        double scaled_count(unsigned ref, unsigned odd, int& exponent) const {
+            unsigned n = FlatBDD::node_of(ref);
+            exponent = dp_exp[n];
+            return dp_scaled[4 * (size_t)n + ((FlatBDD::is_complement(ref) << 1) | odd)];
+        }
+
+        // same recurrence as cal_dp on scaled doubles; returns false when a nonzero count
+        // would underflow the shared exponent of its node, the caller then falls back to quad
+        bool cal_dp_double() {
+            size_t n = flat.size();
+            dp_scaled.assign(4 * n, 0.0);
+            dp_exp.assign(n, 0);
+
+            // constant node: a regular entry is one even path
+            dp_scaled[0] = 1.0;
+
+            for (size_t i = 1; i < n; i++) {
+                unsigned T = flat.then_ref[i];
+                unsigned E = flat.else_ref[i];
+                size_t t = FlatBDD::node_of(T);
+                size_t e = FlatBDD::node_of(E);
+
+                // align both children to the larger exponent
+                int exponent = max(dp_exp[t], dp_exp[e]);
+                double t_scale = ldexp(1.0, dp_exp[t] - exponent);
+                double e_scale = ldexp(1.0, dp_exp[e] - exponent);
+
+                double* counts = &dp_scaled[4 * i];
+                bool nonzero[4];
+                double largest = 0.0;
+                for (unsigned k = 0; k < 4; k++) {
+                    // entering with complement c complements the children and swaps odd/even
+                    unsigned complement = k >> 1;
+                    unsigned parity = (k & 1) ^ complement;
+                    double t_count = dp_scaled[4 * t + (((FlatBDD::is_complement(T) ^ complement) << 1) | parity)];
+                    double e_count = dp_scaled[4 * e + (((FlatBDD::is_complement(E) ^ complement) << 1) | parity)];
+                    nonzero[k] = t_count > 0 || e_count > 0;
+                    counts[k] = t_count * t_scale + e_count * e_scale;
+                    largest = max(largest, counts[k]);
+                }
+
+                if (largest > 0 && (largest > ldexp(1.0, COUNT_RESCALE_BITS) || largest < ldexp(1.0, -COUNT_RESCALE_BITS))) {
+                    int shift;
+                    frexp(largest, &shift);
+                    for (unsigned k = 0; k < 4; k++) {
+                        counts[k] = ldexp(counts[k], -shift);
+                    }
+                    exponent += shift;
+                }
+                dp_exp[i] = exponent;
+
+                for (unsigned k = 0; k < 4; k++) {
+                    if (nonzero[k] && counts[k] < DBL_MIN) {
+                        return false;
+                    }
+                }
+            }
+            return true;
+        }
+
+        void build_sampler_double() {
+            size_t n = flat.size();
+            sampler.assign(n, SampleNode{0, 0, -1, {0, 0, 0, 0}});
+
+            for (size_t i = 1; i < n; i++) {
+                SampleNode& node = sampler[i];
+                node.then_ref = flat.then_ref[i];
+                node.else_ref = flat.else_ref[i];
+                node.var = flat.var[i];
+
+                for (unsigned complement = 0; complement < 2; complement++) {
+                    for (unsigned odd = 0; odd < 2; odd++) {
+                        int t_exp, e_exp;
+                        double cnt_T = scaled_count(node.then_ref ^ complement, odd, t_exp);
+                        double cnt_E = scaled_count(node.else_ref ^ complement, odd, e_exp);
+
+                        uint64_t threshold = THRESHOLD_ONE / 2;
+                        if (cnt_T == 0 || cnt_E == 0) {
+                            if (cnt_T > 0 || cnt_E > 0) {
+                                threshold = cnt_T > 0 ? THRESHOLD_ONE : 0;
+                            }
+                        } else {
+                            // only the ratio matters: bring the larger count to [0.5, 1)
+                            int t_shift, e_shift;
+                            double t_frac = frexp(cnt_T, &t_shift);
+                            double e_frac = frexp(cnt_E, &e_shift);
+                            int exponent = max(t_exp + t_shift, e_exp + e_shift);
+                            t_frac = ldexp(t_frac, t_exp + t_shift - exponent);
+                            e_frac = ldexp(e_frac, e_exp + e_shift - exponent);
+                            threshold = (uint64_t)(t_frac / (t_frac + e_frac) * (double)THRESHOLD_ONE);
+                        }
+                        node.threshold[(complement << 1) | odd] = threshold;
+                    }
+                }
+            }
+        }
+
+        void sample_solution(bool odd, uint64_t* words) {
+            // variables skipped by the path are don't cares: start from uniform random bits
+            for (int w = 0; w < sample_word_num; w++) {
+                words[w] = rng();
+            }
+            if (input_num % 64 != 0) {
+                words[sample_word_num - 1] &= (1ULL << (input_num % 64)) - 1;
+            }
+
+            unsigned ref = flat.root;
+            while (FlatBDD::node_of(ref) != 0) {
+                const SampleNode& node = sampler[FlatBDD::node_of(ref)];
+                unsigned complement = ref & 1u;
+                odd = odd ^ complement;
+
+                bool take_then = (rng() >> 1) < node.threshold[(complement << 1) | odd];
+                uint64_t mask = 1ULL << (node.var & 63);
+                if (take_then) {
+                    words[node.var >> 6] |= mask;
+                } else {
+                    words[node.var >> 6] &= ~mask;
+                }
+                ref = (take_then ? node.then_ref : node.else_ref) ^ complement;
+            }
+        }
+
+        // --count-mode verify: largest difference between the double and the quad thresholds
+        void report_threshold_gap(const vector<SampleNode>& double_sampler) const {
+            uint64_t max_gap = 0;
+            for (size_t i = 1; i < sampler.size(); i++) {
+                for (int k = 0; k < 4; k++) {
+                    uint64_t a = sampler[i].threshold[k];
+                    uint64_t b = double_sampler[i].threshold[k];
+                    max_gap = max(max_gap, a > b ? a - b : b - a);
+                }
+            }
+            cout << "count check: max threshold difference " << max_gap << " / 2^63 over "
+                 << sampler.size() << " nodes" << endl;
+        }
+
+        // flat table, path counts and branch thresholds, built once and shared by all sampling jobs
+        void prepare_sampler() {
+            sample_word_num = (input_num + 63) / 64;
+            if(no_constraint){
+                return;
+            }
+
+            if (!compiled) {
+                flat = flatten_bdd(manager, out_node, var_base);
+            }
+
+            bool exact = (count_mode != COUNT_DOUBLE);
+            if (count_mode != COUNT_QUAD) {
+                if (cal_dp_double()) {
+                    build_sampler_double();
+                    int exponent;
+                    seek_odd = (scaled_count(flat.root, 1, exponent) > 0);
+                } else {
+                    cout << "double path counts out of range, falling back to quad precision" << endl;
+                    exact = true;
+                }
+            }
+            if (exact) {
+                vector<SampleNode> double_sampler;
+                double_sampler.swap(sampler);
+                cal_dp();
+                build_sampler();
+                seek_odd = (path_count(flat.root).first > 0);
+                if (count_mode == COUNT_VERIFY && !double_sampler.empty()) {
+                    report_threshold_gap(double_sampler);
+                }
+            }
+        }
+
+        // num_solutions samples drawn with a generator seeded like a standalone run with this seed
+        int generate_solutions(int seed, int num_solutions) {
+            random_seed = seed;
+            rng.seed(random_seed);
+            // if no constraint, then all solutions are false
+            sample_words.assign((size_t)num_solutions * sample_word_num, 0);
+
+            if(no_constraint){
+                return 0;
+            }
+
+            // zero counts are exact in both modes, so every walk ends on the wanted terminal
+            for(int i = 0; i < num_solutions; i++) {
+                sample_solution(seek_odd, &sample_words[(size_t)i * sample_word_num]);
+            }
+            
+            return 0;
+        }
+
+        // write the node table and the input names (call after prepare_sampler)
+        int save_compiled(const string& path) const {
+            FILE* out = fopen(path.c_str(), "wb");
+            if (!out) {
+                cerr << "Error: cannot write " << path << endl;
+                return -1;
+            }
+            int32_t header[3] = {input_num, and_num, no_constraint ? 1 : 0};
+            uint32_t shape[2] = {(uint32_t)flat.size(), flat.root};
+            vector<int32_t> names(2 * (size_t)input_num);
+            for (int j = 0; j < input_num; j++) {
+                names[2 * j] = idx_to_name[j].first;
+                names[2 * j + 1] = idx_to_name[j].second;
+            }
+
+            bool ok = fwrite(COMPILED_MAGIC, 1, sizeof(COMPILED_MAGIC), out) == sizeof(COMPILED_MAGIC)
+                   && fwrite(header, sizeof(header), 1, out) == 1
+                   && fwrite(shape, sizeof(shape), 1, out) == 1
+                   && fwrite(names.data(), sizeof(int32_t), names.size(), out) == names.size()
+                   && fwrite(flat.var.data(), sizeof(int), flat.size(), out) == flat.size()
+                   && fwrite(flat.then_ref.data(), sizeof(unsigned), flat.size(), out) == flat.size()
+                   && fwrite(flat.else_ref.data(), sizeof(unsigned), flat.size(), out) == flat.size();
+            ok = (fclose(out) == 0) && ok;
+            if (!ok) {
+                cerr << "Error: failed to write " << path << endl;
+                return -1;
+            }
+            return 0;
+        }
+
+        // replaces aag_to_BDD: the split is sampled straight from a saved node table
+        int load_compiled(const string& path) {
+            FILE* in = fopen(path.c_str(), "rb");
+            if (!in) {
+                cerr << "Error: cannot open " << path << endl;
+                return -1;
+            }
+            char magic[sizeof(COMPILED_MAGIC)];
+            int32_t header[3];
+            uint32_t shape[2];
+            bool ok = fread(magic, 1, sizeof(magic), in) == sizeof(magic)
+                   && memcmp(magic, COMPILED_MAGIC, sizeof(magic)) == 0
+                   && fread(header, sizeof(header), 1, in) == 1
+                   && fread(shape, sizeof(shape), 1, in) == 1
+                   && header[0] >= 0;
+            if (ok) {
+                input_num = header[0];
+                and_num = header[1];
+                no_constraint = header[2] != 0;
+                size_t n = shape[0];
+                vector<int32_t> names(2 * (size_t)input_num);
+                flat.var.resize(n);
+                flat.then_ref.resize(n);
+                flat.else_ref.resize(n);
+                flat.root = shape[1];
+                ok = fread(names.data(), sizeof(int32_t), names.size(), in) == names.size()
+                  && fread(flat.var.data(), sizeof(int), n, in) == n
+                  && fread(flat.then_ref.data(), sizeof(unsigned), n, in) == n
+                  && fread(flat.else_ref.data(), sizeof(unsigned), n, in) == n;
+                idx_to_name.assign(input_num, {0, 0});
+                for (int j = 0; ok && j < input_num; j++) {
+                    idx_to_name[j] = {names[2 * j], names[2 * j + 1]};
+                }
+                // a damaged file must not send the sampler outside the table
+                ok = ok && (no_constraint || (n > 0 && FlatBDD::node_of(flat.root) < n));
+                for (size_t i = 1; ok && i < n; i++) {
+                    ok = flat.var[i] >= 0 && flat.var[i] < input_num
+                      && FlatBDD::node_of(flat.then_ref[i]) < i && FlatBDD::node_of(flat.else_ref[i]) < i;
+                }
+            }
+            fclose(in);
+            if (!ok) {
+                cerr << "Error: " << path << " is not a valid compiled BDD" << endl;
+                return -1;
+            }
+            compiled = true;
+            return 0;
+        }
+
+        // OR the samples into the packed rows over all original variables:
+        // rows[i * row_words ...] holds solution i, var_x bit y at bit var_offset[x] + y
+        int scatter_solutions(vector<uint64_t>& rows, const vector<int>& var_offset, int row_words) const {
+            // output bit of every BDD variable, -1 for names outside the variable table
+            vector<int> target(input_num, -1);
+            for(int j = 0 ; j < input_num ; j++){
+                int x = idx_to_name[j].first;
+                int y = idx_to_name[j].second;
+                if (x >= 0 && x < ori_var_num && y >= 0 && y < idx_to_len[x]) {
+                    target[j] = var_offset[x] + y;
+                }
+            }
+
+            size_t num_solutions = sample_word_num > 0 ? sample_words.size() / sample_word_num : 0;
+            for(size_t i = 0 ; i < num_solutions ; i++){
+                const uint64_t* src = &sample_words[i * sample_word_num];
+                uint64_t* dst = &rows[i * row_words];
+                for(int w = 0 ; w < sample_word_num ; w++){
+                    // only the set bits matter for the OR
+                    for (uint64_t bits = src[w]; bits != 0; bits &= bits - 1) {
+                        int t = target[w * 64 + __builtin_ctzll(bits)];
+                        if (t >= 0) dst[t >> 6] |= 1ULL << (t & 63);
+                    }
+                }
+            }
+            return 0;
+        }
+};
+
+// hex value of the len bits starting at bit offset of a packed row, without leading zeros
+void append_hex(string& out, const uint64_t* row, int offset, int len) {
+    static const char digits[] = "0123456789abcdef";
+    bool started = false;
+    for (int k = (len + 3) / 4 - 1; k >= 0; k--) {
+        int pos = offset + 4 * k;
+        int width = min(4, len - 4 * k);
+        uint64_t bits = row[pos >> 6] >> (pos & 63);
+        if ((pos & 63) + width > 64) {
+            bits |= row[(pos >> 6) + 1] << (64 - (pos & 63));
+        }
+        unsigned nibble = (unsigned)(bits & ((1u << width) - 1));
+        if (!started && nibble == 0) continue;
+        started = true;
+        out.push_back(digits[nibble]);
+    }
+    if (!started) out.push_back('0');
+}
+
+// buffered output; the buffer is flushed whenever it grows past OUTPUT_BUFFER_BYTES
+const size_t OUTPUT_BUFFER_BYTES = 1 << 20;
+
+// One sampling request: every job samples the same BDDs and path-count tables, and gets
+// exactly the solutions of a standalone run with its seed.
+struct SampleJob {
+    int seed;
+    int solution_num;
+    string output_file;
+    vector<uint64_t> rows;      // packed solution rows, filled by scatter_solutions
+};
+
+// "--job SEED:NUM:OUTPUT", the output path may itself contain ':'
+bool parse_job(const string& spec, SampleJob& job) {
+    size_t first = spec.find(':');
+    size_t second = first == string::npos ? string::npos : spec.find(':', first + 1);
+    if (second == string::npos || second + 1 >= spec.size()) {
+        return false;
+    }
+    try {
+        job.seed = stoi(spec.substr(0, first));
+        job.solution_num = stoi(spec.substr(first + 1, second - first - 1));
+    } catch (const exception&) {
+        return false;
+    }
+    job.output_file = spec.substr(second + 1);
+    return job.solution_num >= 0;
+}
+
+int output_solutions(const vector<uint64_t>& rows, int row_words, int solution_num,
+                     const vector<int>& var_offset, const vector<int>& var_len,
+                     const string& output_file) {
+    FILE* out_file = fopen(output_file.c_str(), "wb");
+    if (!out_file) {
+        cerr << "Error: Failed to open output file: " << output_file << endl;
+        return -1;
+    }
+
+    string buf;
+    buf.reserve(OUTPUT_BUFFER_BYTES + 4096);
+    bool write_ok = true;
+    auto flush = [&]() {
+        if (!buf.empty() && fwrite(buf.data(), 1, buf.size(), out_file) != buf.size()) {
+            write_ok = false;
+        }
+        buf.clear();
+    };
+
+    // same bytes as nlohmann::json::dump(4) of {"assignment_list": [[{"value": hex}, ...], ...]}
+    int var_num = var_len.size();
+    buf += "{\n    \"assignment_list\": ";
+    if (solution_num == 0) {
+        buf += "[]";
+    } else {
+        buf += "[\n";
+        for (int i = 0; i < solution_num; i++) {
+            const uint64_t* row = &rows[(size_t)i * row_words];
+            if (var_num == 0) {
+                buf += "        []";
+            } else {
+                buf += "        [\n";
+                for (int x = 0; x < var_num; x++) {
+                    buf += "            {\n                \"value\": \"";
+                    append_hex(buf, row, var_offset[x], var_len[x]);
+                    buf += x + 1 < var_num ? "\"\n            },\n" : "\"\n            }\n";
+                }
+                buf += "        ]";
+            }
+            buf += i + 1 < solution_num ? ",\n" : "\n";
+            if (buf.size() >= OUTPUT_BUFFER_BYTES) flush();
+        }
+        buf += "    ]";
+    }
+    buf += "\n}";
+    flush();
+
+    if (fclose(out_file) != 0 || !write_ok) {
+        cerr << "Error: Failed to write output file: " << output_file << endl;
+        return -1;
+    }
+    return 0;
+}
+
+int main(int argc, char** argv) {
+    // options may appear anywhere, the remaining arguments are positional
+    vector<string> args;
+    ReorderPolicy reorder;
+    size_t max_memory = 0;
+    CountMode count_mode = COUNT_DOUBLE;
+    bool share_manager = true;
+    string save_bdd_dir, load_bdd_dir;
+    vector<SampleJob> jobs(1);      // jobs[0] comes from the positional arguments
+    for (int i = 1; i < argc; i++) {
+        string arg = argv[i];
+        if (arg == "--reorder" && i + 1 < argc) {
+            string mode = argv[++i];
+            if (!parse_reorder_mode(mode, reorder)) {
+                cerr << "Unknown reorder mode: " << mode << " (expected none, sift, group-sift or group-converge)" << endl;
+                return 1;
+            }
+        } else if (arg == "--reorder-nodes" && i + 1 < argc) {
+            reorder.min_nodes = (unsigned)stoul(argv[++i]);
+        } else if (arg == "--count-mode" && i + 1 < argc) {
+            string mode = argv[++i];
+            if (!parse_count_mode(mode, count_mode)) {
+                cerr << "Unknown count mode: " << mode << " (expected double, quad or verify)" << endl;
+                return 1;
+            }
+        } else if (arg == "--manager" && i + 1 < argc) {
+            string mode = argv[++i];
+            if (mode != "shared" && mode != "per-split") {
+                cerr << "Unknown manager mode: " << mode << " (expected shared or per-split)" << endl;
+                return 1;
+            }
+            share_manager = (mode == "shared");
+        } else if (arg == "--save-bdd" && i + 1 < argc) {
+            save_bdd_dir = argv[++i];
+        } else if (arg == "--load-bdd" && i + 1 < argc) {
+            load_bdd_dir = argv[++i];
+        } else if (arg == "--job" && i + 1 < argc) {
+            SampleJob job;
+            if (!parse_job(argv[++i], job)) {
+                cerr << "Invalid job: " << argv[i] << " (expected SEED:NUM:OUTPUT)" << endl;
+                return 1;
+            }
+            jobs.push_back(job);
+        } else if (arg == "--max-memory" && i + 1 < argc) {
+            // budget per split in MB
+            max_memory = (size_t)stoull(argv[++i]) * 1024 * 1024;
+        } else {
+            args.push_back(arg);
+        }
+    }
+    if (args.size() != 5 && args.size() != 6) {
+        cerr << "Usage: " << argv[0] << "<input_dir> <random_seed> <solution_num> <output_file> <split_num> [aag|aig]"
+             << " [--reorder none|sift|group-sift|group-converge] [--reorder-nodes N] [--max-memory MB]"
+             << " [--count-mode double|quad|verify] [--manager shared|per-split]"
+             << " [--save-bdd DIR | --load-bdd DIR] [--job SEED:NUM:OUTPUT ...]" << endl;
+        return 1;
+    }
+    
+    string input_dir = args[0];
+    jobs[0].seed = stoi(args[1]);
+    jobs[0].solution_num = stoi(args[2]);
+    jobs[0].output_file = args[3];
+    int split_num = stoi(args[4]);
+    // extension of the reordered_N files, their content format is detected from the header
+    string aiger_ext = args.size() == 6 ? args[5] : "aag";
+    if (aiger_ext != "aag" && aiger_ext != "aig") {
+        cerr << "Unknown AIGER format: " << aiger_ext << " (expected aag or aig)" << endl;
+        return 1;
+    }
+
+    // variable widths from the json2verilog sidecar (or its Verilog header)
+    for (auto& job : jobs) {
+        job.seed = job.seed + 114514;
+    }
+    vector<int> Variable_len;
+    string error;
+    if (!load_variable_widths(input_dir, Variable_len, error)) {
+        cerr << "Error: " << error << endl;
+        return 1;
+    }
+    int Variable_num = (int)Variable_len.size();
+    int Input_num = 0;
+    for(int i = 0; i < Variable_num; i++) {
+        Input_num += Variable_len[i];
+    }
+
+    // packed solution rows: var_x occupies bits [Variable_offset[x], Variable_offset[x] + Variable_len[x])
+    vector<int> Variable_offset(Variable_num, 0);
+    for(int i = 1; i < Variable_num; i++) {
+        Variable_offset[i] = Variable_offset[i - 1] + Variable_len[i - 1];
+    }
+    int row_words = (Input_num + 63) / 64;
+    for (auto& job : jobs) {
+        job.rows.assign((size_t)job.solution_num * row_words, 0);
+    }
+
+    // declared before the solvers so it outlives the nodes they release
+    SharedManager shared_manager;
+
+    cout << "split_num: " << split_num << endl;
+    // solve each split
+    for(int q = 0 ; q < split_num ; q++){
+        cout << "Processing split " << q << "..." << endl;
+        // a reordered_N.order permutation is applied to the original split_N file,
+        // otherwise the reorder stage wrote a reordered copy of the netlist
+        string reordered_base = input_dir + "/reordered_aags/reordered_" + to_string(q);
+        string order_file = reordered_base + ".order";
+        bool has_order_file = ifstream(order_file).good();
+        string aiger_file = has_order_file
+            ? input_dir + "/split_aags/split_" + to_string(q) + "." + aiger_ext
+            : reordered_base + "." + aiger_ext;
+
+        BDD_Solver solver(aiger_file, 
+                        input_dir + "/solution_" + to_string(q) + ".json", 
+                        jobs[0].seed, jobs[0].solution_num, Variable_num, Variable_len);
+        if (has_order_file) {
+            solver.order_file = order_file;
+        }
+        solver.reorder = reorder;
+        solver.max_memory = max_memory;
+        solver.count_mode = count_mode;
+        if (share_manager) {
+            solver.shared = &shared_manager;
+        }
+
+
+        // compiled splits of an earlier run replace the AIG and the BDD construction
+        string compiled_name = "/split_" + to_string(q) + ".bdd";
+
+        auto build_start = chrono::steady_clock::now();
+        if (!load_bdd_dir.empty()) {
+            if (solver.load_compiled(load_bdd_dir + compiled_name) != 0) {
+                return 1;
+            }
+        } else if (solver.aag_to_BDD() != 0) {
+            cerr << "Error building BDD from AAG file" << endl;
+            return 1;
+        }
+        auto build_end = chrono::steady_clock::now();
+
+        
+        // the tables are built once, then every job draws its own samples from them
+        solver.prepare_sampler();
+        for (auto& job : jobs) {
+            if (solver.generate_solutions(job.seed, job.solution_num) != 0) {
+                cerr << "Error generating solutions" << endl;
+                return 1;
+            }
+            if (solver.scatter_solutions(job.rows, Variable_offset, row_words) != 0) {
+                cerr << "Error collecting solutions" << endl;
+                return 1;
+            }
+        }
+        auto sample_end = chrono::steady_clock::now();
+
+        if (!save_bdd_dir.empty() && solver.save_compiled(save_bdd_dir + compiled_name) != 0) {
+            return 1;
+        }
+
+        if (solver.compiled) {
+            cout << "[stats] split=" << q
+                 << " inputs=" << solver.input_num
+                 << " ands=" << solver.and_num
+                 << " load_time=" << chrono::duration<double>(build_end - build_start).count()
+                 << " bdd_nodes=" << max<size_t>(solver.flat.size(), 1)
+                 << " sample_time=" << chrono::duration<double>(sample_end - build_end).count()
+                 << endl;
+        } else {
+            // per-split statistics, one "key=value" line parsed by benchmark.py
+            cout << "[stats] split=" << q
+                 << " inputs=" << solver.input_num
+                 << " ands=" << solver.and_num
+                 << " build_time=" << chrono::duration<double>(build_end - build_start).count()
+                 << " bdd_nodes=" << Cudd_DagSize(solver.out_node)
+                 << " peak_nodes=" << Cudd_ReadPeakNodeCount(solver.manager)
+                 << " live_nodes=" << Cudd_ReadNodeCount(solver.manager)
+                 << " reorderings=" << Cudd_ReadReorderings(solver.manager) - solver.reorderings_before
+                 << " forced_reorderings=" << solver.forced_reorderings
+                 << " memory_mb=" << fixed << setprecision(1) << Cudd_ReadMemoryInUse(solver.manager) / 1048576.0
+                 << defaultfloat << setprecision(6)
+                 << " sample_time=" << chrono::duration<double>(sample_end - build_end).count()
+                 << " shared_manager=" << (solver.owns_manager ? 0 : 1)
+                 << endl;
+        }
+
+
+        cout << "Split " << q << " processed successfully." << endl;
+    }
+    cout << "All splits processed successfully." << endl;
+    // output the final solutions, one file per job
+    for (const auto& job : jobs) {
+        if (output_solutions(job.rows, row_words, job.solution_num, Variable_offset, Variable_len, job.output_file) != 0) {
+            cerr << "Error outputting solutions" << endl;
+            return 1;
+        }
+        cout << "Solutions generated and saved to " << job.output_file << endl;
+    }
+    return 0;
 }
\ No newline at end of file
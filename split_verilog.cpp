@@ -3,6 +3,7 @@
 #include <string>
 #include <vector>
 #include <map>
+#include <sstream>
 using namespace std;
 /* input format:
     module generated_module(var_0, var_1, var_2, var_3, var_4, x);
@@ -90,6 +91,7 @@ public:
     vector<string> constraints;
     vector<string> variables;
     vector<int> constraint_order;
+    vector<double> constraint_costs;
 
     UnionFind uf;
     vector<int> variable_to_set;
@@ -158,6 +160,33 @@ public:
         }
     }
 
+    // constraint costs from json2verilog.costs, constraints not listed (divisor checks) cost 0;
+    // a malformed file is ignored as a whole (returns false, split.costs is not written)
+    bool read_cost_file(const string& cost_file) {
+        ifstream infile(cost_file);
+        if (!infile.is_open()) {
+            cerr << "Error opening cost file: " << cost_file << endl;
+            return false;
+        }
+
+        constraint_costs.assign(total_constraints, 0.0);
+        while(getline(infile, line)) {
+            if(line.empty() || line[0] == '#' || line[0] == '\r') continue;
+            istringstream fields(line);
+            int constraint_idx;
+            double cost;
+            if(!(fields >> constraint_idx >> cost)) {
+                cerr << "Warning: malformed line in cost file " << cost_file << ": " << line << endl;
+                constraint_costs.clear();
+                return false;
+            }
+            if(constraint_idx >= 0 && constraint_idx < total_constraints) {
+                constraint_costs[constraint_idx] = cost;
+            }
+        }
+        return true;
+    }
+
     void find_relativity(){
         uf = UnionFind(total_variables);
         variable_to_set.resize(total_variables);
@@ -301,11 +330,33 @@ public:
             }
         }
     }
+
+    // split.costs: <split_index> <cost> <constraint_count>, the summed constraint costs of each split
+    void write_cost_file() {
+        string output_file = output_dir + "/split.costs";
+        ofstream outfile(output_file);
+        if (!outfile.is_open()) {
+            cerr << "Error opening output file: " << output_file << endl;
+            return;
+        }
+
+        vector<double> split_costs(set_cnt, 0.0);
+        vector<int> split_constraints(set_cnt, 0);
+        for(int i = 0 ; i < total_constraints ; i++){
+            split_costs[constraint_to_set[i]] += constraint_costs[i];
+            split_constraints[constraint_to_set[i]]++;
+        }
+
+        outfile << "# split costs: <split_index> <cost> <constraint_count>\n";
+        for(int s = 0 ; s < set_cnt ; s++){
+            outfile << s << " " << split_costs[s] << " " << split_constraints[s] << "\n";
+        }
+    }
 };
 
 int main(int argc, char* argv[]) {
-    if (argc != 3) {
-        cerr << "Usage: " << argv[0] << " <input_file> <output_directory>" << endl;
+    if (argc != 3 && argc != 4) {
+        cerr << "Usage: " << argv[0] << " <input_file> <output_directory> [cost_file]" << endl;
         return 1;
     }
 
@@ -316,6 +367,9 @@ int main(int argc, char* argv[]) {
     splitter.read_input_file();
     splitter.find_relativity();
     splitter.write_output_files();
+    if (argc == 4 && splitter.read_cost_file(argv[3])) {
+        splitter.write_cost_file();
+    }
 
     cout << "Verilog module successfully split into " << splitter.set_cnt << " separate modules." << endl;
     